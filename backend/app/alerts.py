@@ -0,0 +1,271 @@
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
+import os
+import threading
+import time
+
+from . import metrics
+from .broadcast import Broadcaster
+from .tracker import _iou
+
+
+# Hysteresis: an alert opens after ALERT_OPEN_HITS sightings within ALERT_OPEN_WINDOW_S and closes
+# only after ALERT_CLOSE_AFTER_S without one; while open, updates are sent at most every
+# ALERT_UPDATE_INTERVAL_S (cooldown)
+_OPEN_HITS = int(os.getenv("ALERT_OPEN_HITS", "3"))
+_OPEN_WINDOW_S = float(os.getenv("ALERT_OPEN_WINDOW_S", "2"))
+_CLOSE_AFTER_S = float(os.getenv("ALERT_CLOSE_AFTER_S", "10"))
+_UPDATE_INTERVAL_S = float(os.getenv("ALERT_UPDATE_INTERVAL_S", "5"))
+# Bounded memory: at most this many candidate/open alerts (oldest evicted first) and this many
+# past events kept for subscribers
+_MAX_ACTIVE = int(os.getenv("ALERT_MAX_ACTIVE", "1000"))
+_HISTORY = int(os.getenv("ALERT_HISTORY", "1000"))
+# An unknown face on a new track that overlaps a live alert's last box continues that alert
+_LOCATION_IOU = 0.3
+_SWEEP_INTERVAL_S = 0.5
+
+
+class _Alert:
+    __slots__ = (
+        "alert_id", "camera", "key", "label", "category", "track_id", "bbox", "confidence",
+        "first_seen", "last_seen", "hits", "recent", "opened", "last_update", "started_at",
+    )
+
+    def __init__(
+        self, alert_id: int, camera: str, key: Tuple[Any, ...], det: Dict[str, Any], now: float, open_hits: int
+    ) -> None:
+        self.alert_id = alert_id
+        self.camera = camera
+        self.key = key
+        self.label = det.get("label", "unknown")
+        self.category = det.get("category", "unknown")
+        self.track_id = det.get("track_id")
+        self.bbox = det.get("bbox")
+        self.confidence = float(det.get("confidence", 0.0))
+        self.first_seen = now
+        self.last_seen = now
+        self.hits = 0
+        # Sighting times inside the open window (only used until the alert opens)
+        self.recent: Deque[float] = deque(maxlen=open_hits)
+        self.opened = False
+        self.last_update = 0.0
+        self.started_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "alert_id": self.alert_id,
+            "camera": self.camera,
+            "label": self.label,
+            "category": self.category,
+            "track_id": self.track_id,
+            "bbox": self.bbox,
+            "confidence": self.confidence,
+            "sightings": self.hits,
+            "started_at": self.started_at,
+            "duration_s": round(self.last_seen - self.first_seen, 3),
+        }
+
+
+class AlertEngine:
+    # Turns per-frame alert flags into open/update/close alert events. Sightings are grouped per
+    # camera by identity (criminal label) or track (unknown face), and an unknown face that moves
+    # to a new track id in the same place continues its alert. Events go to a bounded history
+    # and subscribers are woken through a Broadcaster of the newest event seq.
+
+    def __init__(
+        self,
+        open_hits: int = _OPEN_HITS,
+        open_window_s: float = _OPEN_WINDOW_S,
+        close_after_s: float = _CLOSE_AFTER_S,
+        update_interval_s: float = _UPDATE_INTERVAL_S,
+        max_active: int = _MAX_ACTIVE,
+        history: int = _HISTORY,
+    ) -> None:
+        self.open_hits = max(1, open_hits)
+        self.open_window_s = open_window_s
+        self.close_after_s = close_after_s
+        self.update_interval_s = update_interval_s
+        self.max_active = max(1, max_active)
+        self._lock = threading.Lock()
+        # alert_id -> alert, least recently seen first
+        self._active: "OrderedDict[int, _Alert]" = OrderedDict()
+        self._by_key: Dict[Tuple[Any, ...], int] = {}
+        self._next_id = 1
+        self._seq = 0
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max(1, history))
+        self.broadcaster: "Broadcaster[int]" = Broadcaster()
+        self._stats = {"sightings": 0, "opened": 0, "updated": 0, "closed": 0, "evicted": 0}
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def _key(camera: str, det: Dict[str, Any]) -> Tuple[Any, ...]:
+        if det.get("face_match"):
+            return (camera, "person", det.get("label"))
+        if det.get("track_id") is not None:
+            return (camera, "track", det.get("track_id"))
+        # Untracked unknown face: coarse location cell
+        x, y, w, h = det.get("bbox") or (0, 0, 0, 0)
+        return (camera, "cell", (x + w // 2) // 64, (y + h // 2) // 64)
+
+    def ingest(self, camera: str, detections: Sequence[Dict[str, Any]], now: Optional[float] = None) -> int:
+        # Called once per published frame; returns the number of events emitted
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            seq_before = self._seq
+            for det in detections:
+                if not det.get("alert"):
+                    continue
+                self._stats["sightings"] += 1
+                key = self._key(camera, det)
+                alert_id = self._by_key.get(key)
+                alert = self._active.get(alert_id) if alert_id is not None else None
+                if alert is None:
+                    alert = self._continued(camera, key, det, now) or self._create(camera, key, det, now)
+                self._sighting(alert, det, now)
+            self._expire(now)
+            emitted = self._seq - seq_before
+        if emitted:
+            self.broadcaster.publish(self._seq)
+        return emitted
+
+    def _continued(self, camera: str, key: Tuple[Any, ...], det: Dict[str, Any], now: float) -> Optional[_Alert]:
+        if key[1] != "track" or not det.get("bbox"):
+            return None
+        for alert in reversed(self._active.values()):
+            if now - alert.last_seen > self.close_after_s:
+                break
+            if alert.camera == camera and alert.key[1] == "track" and alert.bbox is not None:
+                if alert.last_seen < now and _iou(tuple(alert.bbox), tuple(det["bbox"])) >= _LOCATION_IOU:
+                    self._by_key.pop(alert.key, None)
+                    alert.key = key
+                    self._by_key[key] = alert.alert_id
+                    return alert
+        return None
+
+    def _create(self, camera: str, key: Tuple[Any, ...], det: Dict[str, Any], now: float) -> _Alert:
+        while len(self._active) >= self.max_active:
+            _, oldest = self._active.popitem(last=False)
+            self._by_key.pop(oldest.key, None)
+            self._stats["evicted"] += 1
+            if oldest.opened:
+                self._emit("close", oldest, reason="evicted")
+        alert = _Alert(self._next_id, camera, key, det, now, self.open_hits)
+        self._next_id += 1
+        self._active[alert.alert_id] = alert
+        self._by_key[key] = alert.alert_id
+        return alert
+
+    def _sighting(self, alert: _Alert, det: Dict[str, Any], now: float) -> None:
+        alert.hits += 1
+        alert.last_seen = now
+        alert.bbox = det.get("bbox", alert.bbox)
+        alert.track_id = det.get("track_id", alert.track_id)
+        alert.confidence = float(det.get("confidence", alert.confidence))
+        self._active.move_to_end(alert.alert_id)
+        if not alert.opened:
+            alert.recent.append(now)
+            if len(alert.recent) >= self.open_hits and now - alert.recent[0] <= self.open_window_s:
+                alert.opened = True
+                alert.last_update = now
+                alert.recent.clear()
+                self._emit("open", alert)
+        elif now - alert.last_update >= self.update_interval_s:
+            alert.last_update = now
+            self._emit("update", alert)
+
+    def _expire(self, now: float) -> None:
+        # Least recently seen first, so stop at the first alert that is still live
+        while self._active:
+            alert = next(iter(self._active.values()))
+            # Candidates that never opened are kept as long too, so a track change can still continue them
+            if now - alert.last_seen < self.close_after_s:
+                break
+            self._active.popitem(last=False)
+            self._by_key.pop(alert.key, None)
+            if alert.opened:
+                self._emit("close", alert, reason="not seen")
+
+    def _emit(self, kind: str, alert: _Alert, reason: Optional[str] = None) -> None:
+        self._seq += 1
+        event = {"seq": self._seq, "type": kind, "time": time.time(), **alert.to_dict()}
+        if reason is not None:
+            event["reason"] = reason
+        self._events.append(event)
+        self._stats["opened" if kind == "open" else "updated" if kind == "update" else "closed"] += 1
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        # Closes alerts whose camera stopped sending frames
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            seq_before = self._seq
+            self._expire(now)
+            emitted = self._seq - seq_before
+        if emitted:
+            self.broadcaster.publish(self._seq)
+        return emitted
+
+    def events_since(self, seq: int, limit: int = 1000) -> Tuple[List[Dict[str, Any]], bool]:
+        # Events after seq, oldest first; the flag is True when older events were already dropped
+        with self._lock:
+            if not self._events:
+                return [], False
+            missed = self._events[0]["seq"] > seq + 1
+            out = [e for e in self._events if e["seq"] > seq][:limit]
+        return out, missed
+
+    def active(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [a.to_dict() for a in self._active.values() if a.opened]
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    async def subscribe(self, last_seq: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        # Every event after last_seq, in order (a subscriber slower than the history size sees a gap)
+        async for _ in self.broadcaster.subscribe():
+            while True:
+                events, _ = self.events_since(last_seq)
+                if not events:
+                    break
+                for event in events:
+                    yield event
+                last_seq = events[-1]["seq"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "active": sum(1 for a in self._active.values() if a.opened),
+                "candidates": sum(1 for a in self._active.values() if not a.opened),
+                "seq": self._seq,
+            }
+
+    def _sweep_loop(self) -> None:
+        while not self._stop_event.wait(_SWEEP_INTERVAL_S):
+            self.sweep()
+
+    def start(self) -> None:
+        if self._sweeper is not None:
+            return
+        self._stop_event.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="alert-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop(self) -> None:
+        if self._sweeper is None:
+            return
+        self._stop_event.set()
+        self._sweeper.join(timeout=2.0)
+        self._sweeper = None
+
+
+engine = AlertEngine()
+
+
+metrics.callback(
+    "veerdrishti_alert_events_total", "Alert lifecycle events emitted",
+    lambda: {(kind,): engine.get_stats()[kind] for kind in ("opened", "updated", "closed")}, "counter", ("kind",),
+)
+metrics.callback("veerdrishti_alerts_active", "Open alerts", lambda: engine.get_stats()["active"])
@@ -0,0 +1,361 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from . import detectors
+from . import face_db
+from .inference import annotate_and_build_payload, recognize_tracks
+from .tracker import FaceTracker
+
+
+# Offline processing of archived footage and image folders with the live pipeline's detection,
+# tracking, recognition and annotation code:
+#
+#   python -m app.batch INPUT... --out DIR [--format jsonl|parquet] [--video] [--workers N]
+#
+# Inputs are split into chunks (frame ranges of a video, groups of images) that run in a process
+# pool. Every finished chunk is written to DIR/parts/ atomically, so re-running the same command
+# skips finished chunks and resumes an interrupted job; the parts are merged at the end.
+
+_VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov", ".m4v", ".mpg", ".mpeg", ".wmv", ".webm", ".ts"}
+_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+
+# Settings a resumed job must share with the run that wrote its parts
+_MANIFEST_KEYS = ("inputs", "chunk_frames", "chunk_images", "stride", "detect_width", "detect_every", "recognize_every")
+
+# Each chunk of a video tracks on its own, so its track ids are offset by chunk * this to keep them
+# unique within the video (a person crossing a chunk boundary gets a new id)
+_TRACK_IDS_PER_CHUNK = 1_000_000
+
+
+def _collect_inputs(paths: List[str]) -> List[Tuple[str, Path]]:
+    # (kind, path): a video file, or a directory/file list of images
+    sources: List[Tuple[str, Path]] = []
+    loose_images: List[Path] = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            images = sorted(p for p in path.rglob("*") if p.suffix.lower() in _IMAGE_EXTENSIONS)
+            videos = sorted(p for p in path.rglob("*") if p.suffix.lower() in _VIDEO_EXTENSIONS)
+            if images:
+                sources.append(("images", path))
+            sources.extend(("video", v) for v in videos)
+        elif path.suffix.lower() in _IMAGE_EXTENSIONS:
+            loose_images.append(path)
+        elif path.exists():
+            sources.append(("video", path))
+        else:
+            raise FileNotFoundError(raw)
+    if loose_images:
+        sources.append(("files", Path(os.path.commonpath([str(p.parent) for p in loose_images]))))
+    return sources
+
+
+def _plan(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    tasks: List[Dict[str, Any]] = []
+    loose = [Path(p) for p in args.inputs if Path(p).suffix.lower() in _IMAGE_EXTENSIONS]
+    for n, (kind, path) in enumerate(_collect_inputs(args.inputs)):
+        key = f"{n:03d}-{path.stem or 'input'}"
+        common = {
+            "key": key,
+            "kind": kind,
+            "path": str(path),
+            "stride": args.stride,
+            "detect_width": args.detect_width,
+            "detect_every": args.detect_every,
+            "recognize_every": args.recognize_every,
+            "all_frames": args.all_frames,
+        }
+        if kind == "video":
+            cap = cv2.VideoCapture(str(path))
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0) or 25.0
+            cap.release()
+            # Unknown length (some containers/streams): one chunk read to the end
+            bounds = [(s, min(s + args.chunk_frames, total)) for s in range(0, total, args.chunk_frames)] or [(0, -1)]
+            for chunk, (start, end) in enumerate(bounds):
+                tasks.append({**common, "chunk": chunk, "start": start, "end": end, "fps": fps,
+                              "frames": (end - start) if end >= 0 else 0})
+        else:
+            if kind == "images":
+                files = sorted(p for p in path.rglob("*") if p.suffix.lower() in _IMAGE_EXTENSIONS)
+            else:
+                files = sorted(loose)
+            for chunk, start in enumerate(range(0, len(files), args.chunk_images)):
+                batch = files[start : start + args.chunk_images]
+                tasks.append({**common, "chunk": chunk, "files": [str(f) for f in batch], "frames": len(batch)})
+    return tasks
+
+
+def _init_worker() -> None:
+    # One OpenCV thread per worker: parallelism comes from the pool, and oversubscribing cores
+    # is what keeps throughput from scaling with workers
+    cv2.setNumThreads(1)
+    # The data dir may belong to a running server: workers only read it
+    face_db.initialize(read_only=True)
+    detectors.warm_up()
+
+
+def _detect_scale(width: int, detect_width: int) -> float:
+    return detect_width / float(width) if 0 < detect_width < width else 1.0
+
+
+def _analyze(frame: np.ndarray, tracker: Optional[FaceTracker], detect_width: int) -> Dict[str, Any]:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    scale = _detect_scale(gray.shape[1], detect_width)
+    if tracker is None:
+        # Stills: detect and recognize every face
+        boxes = detectors.detect_face_boxes(gray, scale)
+        crops = [gray[y : y + h, x : x + w] for (x, y, w, h) in boxes]
+        found = [(x, y, w, h, *identity, None) for (x, y, w, h), identity in zip(boxes, face_db.match_faces(crops))]
+    else:
+        tracks = tracker.step(gray, lambda g: detectors.detect_face_boxes(g, scale))
+        found = recognize_tracks(tracker, gray, tracks)
+    return annotate_and_build_payload(frame, found)
+
+
+def _video_frames(task: Dict[str, Any]) -> Iterator[Tuple[int, np.ndarray]]:
+    cap = cv2.VideoCapture(task["path"])
+    try:
+        if task["start"] > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, task["start"])
+        index = task["start"]
+        while task["end"] < 0 or index < task["end"]:
+            # Skipped frames are only grabbed, not decoded
+            if index % task["stride"]:
+                if not cap.grab():
+                    break
+            else:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                yield index, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.stem}.tmp{path.suffix}")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _process_chunk(task: Dict[str, Any], parts_dir: str, write_video: bool) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    parts = Path(parts_dir)
+    name = f"{task['key']}-{task['chunk']:06d}"
+    lines: List[bytes] = []
+    frames = detections = 0
+    writer: Optional[cv2.VideoWriter] = None
+    video_tmp = parts / f"{name}.tmp.avi"
+
+    if task["kind"] == "video":
+        tracker = FaceTracker(
+            detect_every=task["detect_every"],
+            recognize_every=task["recognize_every"],
+            match_threshold=face_db.MATCH_THRESHOLD,
+            confidence_decay=face_db.MATCH_THRESHOLD / 85.0,
+        )
+        items: Iterator[Tuple[Any, np.ndarray]] = _video_frames(task)
+    else:
+        tracker = None
+        items = ((f, cv2.imread(f)) for f in task["files"])
+
+    for ref, frame in items:
+        if frame is None:
+            continue
+        payload = _analyze(frame, tracker, task["detect_width"])
+        frames += 1
+        detections += len(payload["detections"])
+        if task["kind"] == "video":
+            for det in payload["detections"]:
+                if det.get("track_id") is not None:
+                    det["track_id"] += task["chunk"] * _TRACK_IDS_PER_CHUNK
+            if write_video:
+                if writer is None:
+                    h, w = frame.shape[:2]
+                    fps = task["fps"] / task["stride"]
+                    writer = cv2.VideoWriter(str(video_tmp), cv2.VideoWriter_fourcc(*"MJPG"), fps, (w, h))
+                writer.write(frame)
+            record = {"source": task["path"], "frame": ref, "time_s": round(ref / task["fps"], 3)}
+        else:
+            record = {"source": ref, "frame": 0, "time_s": 0.0}
+        if payload["detections"] or task["all_frames"]:
+            record.update(payload)
+            lines.append(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+
+    if writer is not None:
+        writer.release()
+        os.replace(video_tmp, parts / f"{name}.avi")
+    # The .jsonl part is written last: its presence marks the chunk (and its video segment) done
+    _write_atomic(parts / f"{name}.jsonl", b"".join(lines))
+    return {"key": task["key"], "frames": frames, "detections": detections, "seconds": time.perf_counter() - t0}
+
+
+def _merge(tasks: List[Dict[str, Any]], out_dir: Path, fmt: str, write_video: bool) -> Path:
+    parts = out_dir / "parts"
+    names = [f"{t['key']}-{t['chunk']:06d}" for t in tasks]
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # One row per detection
+        rows: Dict[str, list] = {k: [] for k in (
+            "source", "frame", "time_s", "label", "category", "confidence", "face_match", "alert",
+            "track_id", "x", "y", "w", "h",
+        )}
+        for name in names:
+            with open(parts / f"{name}.jsonl", "rb") as f:
+                for line in f:
+                    record = json.loads(line)
+                    for det in record["detections"]:
+                        for k in ("source", "frame", "time_s"):
+                            rows[k].append(record[k])
+                        for k in ("label", "category", "confidence", "face_match", "alert", "track_id"):
+                            rows[k].append(det.get(k))
+                        for k, v in zip("xywh", det["bbox"]):
+                            rows[k].append(v)
+        target = out_dir / "detections.parquet"
+        pq.write_table(pa.table(rows), str(target))
+    else:
+        target = out_dir / "detections.jsonl"
+        with open(target, "wb") as out:
+            for name in names:
+                with open(parts / f"{name}.jsonl", "rb") as f:
+                    out.write(f.read())
+
+    if write_video:
+        # Concatenate each video's annotated segments in chunk order
+        for key in dict.fromkeys(t["key"] for t in tasks if t["kind"] == "video"):
+            writer: Optional[cv2.VideoWriter] = None
+            for task in (t for t in tasks if t["key"] == key):
+                segment = parts / f"{key}-{task['chunk']:06d}.avi"
+                cap = cv2.VideoCapture(str(segment))
+                while True:
+                    ok, frame = cap.read()
+                    if not ok:
+                        break
+                    if writer is None:
+                        h, w = frame.shape[:2]
+                        fps = task["fps"] / task["stride"]
+                        writer = cv2.VideoWriter(
+                            str(out_dir / f"{key}.annotated.avi"), cv2.VideoWriter_fourcc(*"MJPG"), fps, (w, h)
+                        )
+                    writer.write(frame)
+                cap.release()
+            if writer is not None:
+                writer.release()
+    return target
+
+
+def run(args: argparse.Namespace) -> int:
+    out_dir = Path(args.out)
+    parts = out_dir / "parts"
+    parts.mkdir(parents=True, exist_ok=True)
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("--format parquet needs pyarrow (pip install pyarrow)", file=sys.stderr)
+            return 2
+
+    settings = {k: getattr(args, k) for k in _MANIFEST_KEYS}
+    settings["inputs"] = [str(Path(p).resolve()) for p in args.inputs]
+    manifest = out_dir / "manifest.json"
+    if manifest.exists():
+        previous = json.loads(manifest.read_text())
+        if previous != settings:
+            print(f"{out_dir} holds a job with different inputs or settings; use another --out", file=sys.stderr)
+            return 2
+    else:
+        _write_atomic(manifest, json.dumps(settings, indent=2).encode("utf-8"))
+
+    tasks = _plan(args)
+    todo = [t for t in tasks if not (parts / f"{t['key']}-{t['chunk']:06d}.jsonl").exists()]
+    if args.video:
+        # A chunk finished without --video has no segment to concatenate
+        todo += [
+            t for t in tasks
+            if t["kind"] == "video" and t not in todo and not (parts / f"{t['key']}-{t['chunk']:06d}.avi").exists()
+        ]
+    planned_frames = sum(t["frames"] // args.stride if t["kind"] == "video" else t["frames"] for t in todo)
+    print(f"{len(tasks)} chunks, {len(tasks) - len(todo)} already done, {len(todo)} to run on {args.workers} workers")
+
+    started = time.perf_counter()
+    frames = detections = 0
+    busy_s = 0.0
+    if todo:
+        pool = ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+        )
+        try:
+            pending = {pool.submit(_process_chunk, t, str(parts), args.video) for t in todo}
+            done_chunks = 0
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    done_chunks += 1
+                    frames += result["frames"]
+                    detections += result["detections"]
+                    busy_s += result["seconds"]
+                    elapsed = time.perf_counter() - started
+                    fps = frames / elapsed if elapsed > 0 else 0.0
+                    eta = (planned_frames - frames) / fps if fps > 0 and planned_frames > frames else 0.0
+                    print(
+                        f"[{done_chunks}/{len(todo)}] {result['key']}: {frames} frames, {fps:.1f} fps"
+                        + (f", eta {eta:.0f} s" if eta else ""),
+                        flush=True,
+                    )
+        except KeyboardInterrupt:
+            print("interrupted; finished chunks are kept, re-run the same command to resume", file=sys.stderr)
+            pool.shutdown(wait=False, cancel_futures=True)
+            return 130
+        pool.shutdown()
+
+    target = _merge(tasks, out_dir, args.format, args.video)
+    elapsed = time.perf_counter() - started
+    if frames:
+        print(
+            f"processed {frames} frames ({detections} detections) in {elapsed:.1f} s: {frames / elapsed:.1f} fps, "
+            f"{frames / busy_s:.1f} fps per worker"
+        )
+    print(f"wrote {target}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch", description="Run face detection and recognition over video files and image folders"
+    )
+    parser.add_argument("inputs", nargs="+", help="video files, image files or directories")
+    parser.add_argument("--out", required=True, help="output directory (re-use it to resume)")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    parser.add_argument("--video", action="store_true", help="also write annotated video per input video")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-frames", type=int, default=1500, help="video frames per chunk")
+    parser.add_argument("--chunk-images", type=int, default=200, help="images per chunk")
+    parser.add_argument("--stride", type=int, default=1, help="process every Nth video frame")
+    parser.add_argument("--detect-width", type=int, default=int(os.getenv("DETECT_WIDTH", "0")))
+    parser.add_argument("--detect-every", type=int, default=int(os.getenv("TRACK_DETECT_EVERY", "5")))
+    parser.add_argument("--recognize-every", type=int, default=int(os.getenv("TRACK_RECOGNIZE_EVERY", "30")))
+    parser.add_argument("--all-frames", action="store_true", help="also write records for frames without faces")
+    args = parser.parse_args(argv)
+    args.stride = max(1, args.stride)
+    args.workers = max(1, args.workers)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, Generic, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class Broadcaster(Generic[T]):
+    # Latest-value publish/subscribe from a producer thread to asyncio subscribers.
+    # Only the newest item is kept: a subscriber that is still sending when new items arrive
+    # skips straight to the latest one, so slow clients drop frames instead of buffering them.
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._item: Optional[T] = None
+        self._closed = False
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def publish(self, item: T) -> int:
+        with self._lock:
+            self._seq += 1
+            self._item = item
+            seq = self._seq
+            waiters = list(self._waiters)
+        self._notify(waiters)
+        return seq
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            waiters = list(self._waiters)
+        self._notify(waiters)
+
+    def _notify(self, waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]) -> None:
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Subscriber's loop already closed; it unregisters itself on exit
+                pass
+
+    def latest(self) -> Tuple[int, Optional[T]]:
+        with self._lock:
+            return self._seq, self._item
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"seq": self._seq, "subscribers": len(self._waiters)}
+
+    async def subscribe(self, last_seq: int = 0) -> AsyncIterator[Tuple[int, T]]:
+        # Yields (seq, item) for every item newer than last_seq that is current when the
+        # subscriber is ready for it; ends when the broadcaster is closed
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            while True:
+                seq, item = self.latest()
+                if seq > last_seq and item is not None:
+                    last_seq = seq
+                    yield seq, item
+                    continue
+                if self._closed:
+                    return
+                await waiter[1].wait()
+                waiter[1].clear()
+        finally:
+            with self._lock:
+                self._waiters.remove(waiter)
+
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from . import metrics
+
+try:
+    # Optional: libjpeg-turbo through PyTurboJPEG (needs the libturbojpeg shared library)
+    from turbojpeg import TJPF_BGR, TJPF_GRAY, TJSAMP_420, TJSAMP_GRAY, TurboJPEG
+except ImportError:  # pragma: no cover - depends on the environment
+    TurboJPEG = None
+
+
+# JPEG_CODEC=auto (turbojpeg if it loads, else OpenCV), turbojpeg or opencv. Both release the GIL, so
+# encodes on the shared pool run in parallel with each other and with detection.
+_CODEC = os.getenv("JPEG_CODEC", "auto").lower()
+_THREADS = int(os.getenv("JPEG_THREADS", str(min(4, os.cpu_count() or 1))))
+
+# Start-of-frame markers (baseline, progressive, ...); C4/C8/CC are not frames
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_REDUCED_FLAGS = {
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+_SECONDS = metrics.histogram("veerdrishti_jpeg_seconds", "JPEG encode/decode time", ("op",))
+_ENCODE_SECONDS = _SECONDS.labels("encode")
+_DECODE_SECONDS = _SECONDS.labels("decode")
+
+
+def _load_turbo() -> Optional[Any]:
+    if _CODEC == "opencv" or TurboJPEG is None:
+        if _CODEC == "turbojpeg":
+            raise RuntimeError("JPEG_CODEC=turbojpeg but PyTurboJPEG is not installed")
+        return None
+    try:
+        return TurboJPEG()
+    except (OSError, RuntimeError):  # library not found
+        if _CODEC == "turbojpeg":
+            raise
+        return None
+
+
+_turbo = _load_turbo()
+BACKEND = "turbojpeg" if _turbo is not None else "opencv"
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def executor() -> ThreadPoolExecutor:
+    # Shared by every camera's encode stage and by on-demand variant encodes
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, _THREADS), thread_name_prefix="jpeg")
+        return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def resize_to_width(image: np.ndarray, width: int) -> np.ndarray:
+    if width <= 0 or width >= image.shape[1]:
+        return image
+    # Halving with INTER_AREA has a fast path; arbitrary INTER_AREA ratios are several times slower,
+    # and under 2x linear interpolation does not alias
+    while image.shape[1] >= 2 * width:
+        image = cv2.resize(image, (image.shape[1] // 2, image.shape[0] // 2), interpolation=cv2.INTER_AREA)
+    h, w = image.shape[:2]
+    if w == width:
+        return image
+    return cv2.resize(image, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_LINEAR)
+
+
+def encode(image: np.ndarray, quality: int = 80, width: int = 0) -> Optional[bytes]:
+    # BGR or grayscale image to JPEG, downscaled to `width` first if it is narrower than the image
+    t0 = time.perf_counter()
+    image = resize_to_width(image, width)
+    if _turbo is not None:
+        gray = image.ndim == 2
+        data = _turbo.encode(
+            image if not gray else image[:, :, None],
+            quality=quality,
+            pixel_format=TJPF_GRAY if gray else TJPF_BGR,
+            jpeg_subsample=TJSAMP_GRAY if gray else TJSAMP_420,
+        )
+    else:
+        ok, buf = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        data = buf.tobytes() if ok else None
+    _ENCODE_SECONDS.observe(time.perf_counter() - t0)
+    return data
+
+
+def jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    # (width, height) from the JPEG frame header without decoding; None if not a JPEG
+    if data[:2] != b"\xff\xd8":
+        return None
+    i, n = 2, len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF or marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Fill byte or a marker without a length field
+            i += 1 if marker == 0xFF else 2
+            continue
+        if marker in _SOF_MARKERS:
+            return int.from_bytes(data[i + 7 : i + 9], "big"), int.from_bytes(data[i + 5 : i + 7], "big")
+        i += 2 + int.from_bytes(data[i + 2 : i + 4], "big")
+    return None
+
+
+def _reduction(size: Optional[Tuple[int, int]], max_side: int) -> int:
+    # Largest DCT scaling (1/2, 1/4, 1/8) that keeps the longer side at or above max_side
+    if size is None or max_side <= 0:
+        return 1
+    longest = max(size)
+    for factor in (8, 4, 2):
+        if longest // factor >= max_side:
+            return factor
+    return 1
+
+
+def decode(data: bytes, gray: bool = False, max_side: int = 0) -> Optional[np.ndarray]:
+    # With max_side, large JPEGs are decoded at 1/2, 1/4 or 1/8 size directly in the DCT domain
+    # (much less work than decoding in full and resizing); other formats are decoded and resized.
+    # None if the data does not decode.
+    t0 = time.perf_counter()
+    size = jpeg_size(data)
+    factor = _reduction(size, max_side)
+    image: Optional[np.ndarray] = None
+    if _turbo is not None and size is not None:
+        try:
+            image = _turbo.decode(
+                data,
+                pixel_format=TJPF_GRAY if gray else TJPF_BGR,
+                scaling_factor=(1, factor) if factor > 1 else None,
+            )
+            if gray and image is not None and image.ndim == 3:
+                image = image[:, :, 0]
+        except OSError:
+            image = None
+    if image is None:
+        buf = np.frombuffer(data, dtype=np.uint8)
+        flag = _REDUCED_FLAGS[(factor, gray)] if factor > 1 else cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR
+        image = cv2.imdecode(buf, flag)
+    if image is not None and max_side > 0 and size is None and max(image.shape[:2]) > 2 * max_side:
+        scale = max_side / float(max(image.shape[:2]))
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    _DECODE_SECONDS.observe(time.perf_counter() - t0)
+    return image
+
+
+def get_stats() -> Dict[str, Any]:
+    return {"backend": BACKEND, "threads": max(1, _THREADS)}
@@ -0,0 +1,157 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from . import metrics
+
+
+# OpenCV cascades (and HOG) keep scratch state per object and are not safe to share
+# across threads, so every thread lazily builds its own instance and reuses it.
+_local = threading.local()
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+# Calls made in detection pool workers are counted there, not in the server process
+_CALL_SECONDS = metrics.histogram("veerdrishti_detector_seconds", "Detector call latency", ("detector",))
+
+_CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+# Default people detector window (width, height); smaller inputs crash detectMultiScale
+_HOG_WINDOW = (64, 128)
+
+
+def _create_face_cascade() -> cv2.CascadeClassifier:
+    cascade = cv2.CascadeClassifier(_CASCADE_PATH)
+    if cascade.empty():
+        raise RuntimeError(f"Failed to load Haar cascade from {_CASCADE_PATH}")
+    return cascade
+
+
+def _create_hog() -> cv2.HOGDescriptor:
+    hog = cv2.HOGDescriptor()
+    hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+    return hog
+
+
+_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "face_cascade": _create_face_cascade,
+    "hog_people": _create_hog,
+}
+
+
+def _record(name: str, key: str, seconds: float) -> None:
+    with _stats_lock:
+        entry = _stats.setdefault(
+            name, {"loads": 0, "load_ms_total": 0.0, "calls": 0, "call_ms_total": 0.0, "last_call_ms": 0.0}
+        )
+        if key == "load":
+            entry["loads"] += 1
+            entry["load_ms_total"] += seconds * 1000.0
+        else:
+            entry["calls"] += 1
+            entry["call_ms_total"] += seconds * 1000.0
+            entry["last_call_ms"] = seconds * 1000.0
+    if key != "load":
+        _CALL_SECONDS.labels(name).observe(seconds)
+
+
+def get(name: str) -> Any:
+    instances = getattr(_local, "instances", None)
+    if instances is None:
+        instances = _local.instances = {}
+    detector = instances.get(name)
+    if detector is None:
+        t0 = time.perf_counter()
+        detector = _FACTORIES[name]()
+        _record(name, "load", time.perf_counter() - t0)
+        instances[name] = detector
+    return detector
+
+
+def warm_up() -> None:
+    # Load every detector in the calling thread (e.g. at startup) so first use is cheap
+    for name in _FACTORIES:
+        get(name)
+
+
+def detect_faces(
+    gray_image: np.ndarray,
+    scale_factor: float = 1.2,
+    min_neighbors: int = 5,
+    min_size: Tuple[int, int] = (50, 50),
+) -> List[Tuple[int, int, int, int]]:
+    cascade = get("face_cascade")
+    t0 = time.perf_counter()
+    faces = cascade.detectMultiScale(
+        gray_image, scaleFactor=scale_factor, minNeighbors=min_neighbors, minSize=min_size
+    )
+    _record("face_cascade", "call", time.perf_counter() - t0)
+    return [(int(x), int(y), int(w), int(h)) for (x, y, w, h) in faces]
+
+
+def detect_people(
+    gray_image: np.ndarray, win_stride: Tuple[int, int] = (8, 8)
+) -> List[Tuple[int, int, int, int]]:
+    if gray_image.shape[0] < _HOG_WINDOW[1] or gray_image.shape[1] < _HOG_WINDOW[0]:
+        return []
+    hog = get("hog_people")
+    t0 = time.perf_counter()
+    rects, _ = hog.detectMultiScale(gray_image, winStride=win_stride)
+    _record("hog_people", "call", time.perf_counter() - t0)
+    return [(int(x), int(y), int(w), int(h)) for (x, y, w, h) in rects]
+
+
+def get_stats() -> Dict[str, Dict[str, float]]:
+    with _stats_lock:
+        out: Dict[str, Dict[str, float]] = {}
+        for name, entry in _stats.items():
+            item = dict(entry)
+            item["load_ms_avg"] = entry["load_ms_total"] / entry["loads"] if entry["loads"] else 0.0
+            item["call_ms_avg"] = entry["call_ms_total"] / entry["calls"] if entry["calls"] else 0.0
+            out[name] = item
+        return out
+
+
+def detect_face_boxes(gray_full: np.ndarray, scale: float = 1.0) -> List[Tuple[int, int, int, int]]:
+    # HOG people first, then the cascade inside each person box; whole-frame cascade as fallback.
+    # With scale < 1, HOG and the fallback cascade run on a downscaled copy and boxes are mapped
+    # back; the per-person cascade still runs on the full-resolution ROI.
+    # Module-level so it can run in a detection process pool.
+    if 0 < scale < 1:
+        small = cv2.resize(gray_full, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    else:
+        scale, small = 1.0, gray_full
+    rects = [
+        (int(x / scale), int(y / scale), int(w / scale), int(h / scale))
+        for (x, y, w, h) in detect_people(small, win_stride=(8, 8))
+    ]
+
+    face_boxes: List[Tuple[int, int, int, int]] = []
+    if len(rects) > 0:
+        for (px, py, pw, ph) in rects:
+            px, py = max(px, 0), max(py, 0)
+            gray_roi = gray_full[py : py + ph, px : px + pw]
+            faces = detect_faces(gray_roi, scale_factor=1.2, min_neighbors=5, min_size=(50, 50))
+            for (fx, fy, fw, fh) in faces:
+                # Coordinates relative to full frame
+                face_boxes.append((px + fx, py + fy, fw, fh))
+    else:
+        # The cascade's own window is 24x24, so the minimum face size cannot shrink below that
+        min_side = max(24, int(round(50 * scale)))
+        faces = detect_faces(small, scale_factor=1.2, min_neighbors=5, min_size=(min_side, min_side))
+        face_boxes = [(int(x / scale), int(y / scale), int(w / scale), int(h / scale)) for (x, y, w, h) in faces]
+    return face_boxes
+
+
+def detect_face_boxes_in_rois(
+    rois: List[Tuple[int, int, np.ndarray]], scale: float = 1.0
+) -> List[Tuple[int, int, int, int]]:
+    # detect_face_boxes on (x, y, gray_roi) sub-images, mapped back to full-frame coordinates.
+    # Takes the crops rather than the whole frame so only the regions are pickled to a pool.
+    face_boxes: List[Tuple[int, int, int, int]] = []
+    for (ox, oy, gray_roi) in rois:
+        for (x, y, w, h) in detect_face_boxes(gray_roi, scale):
+            face_boxes.append((ox + x, oy + y, w, h))
+    return face_boxes
@@ -0,0 +1,405 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+_DATA_DIR = Path(os.getenv("VEERDRISHTI_DATA_DIR", str(_BACKEND_DIR / "data")))
+_DB_PATH = Path(os.getenv("EVENTS_DB", str(_DATA_DIR / "events.db")))
+
+# Retention: rows older than EVENT_RETENTION_DAYS and beyond the newest EVENT_MAX_ROWS are deleted
+# by the writer thread every _RETENTION_INTERVAL_S; 0 disables either limit
+_RETENTION_DAYS = float(os.getenv("EVENT_RETENTION_DAYS", "7"))
+_MAX_ROWS = int(os.getenv("EVENT_MAX_ROWS", "0"))
+_RETENTION_INTERVAL_S = 300.0
+# Deletes run in chunks so readers and the next insert batch never wait long for the write lock
+_DELETE_CHUNK = 50_000
+# Free pages handed back to the filesystem per retention pass (auto_vacuum=INCREMENTAL)
+_VACUUM_PAGES = 10_000
+
+# Frames waiting for the writer; when full, record() drops the frame instead of blocking the caller
+_QUEUE_FRAMES = int(os.getenv("EVENT_QUEUE_FRAMES", "10000"))
+# One transaction per batch: whichever comes first of this many rows or this much delay
+_BATCH_ROWS = 5000
+_BATCH_DELAY_S = 0.25
+
+QUERY_MAX_LIMIT = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    camera TEXT NOT NULL,
+    track_id INTEGER,
+    label TEXT NOT NULL,
+    category TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    face_match INTEGER NOT NULL,
+    alert INTEGER NOT NULL,
+    x INTEGER, y INTEGER, w INTEGER, h INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_label_ts ON events (label, ts);
+CREATE INDEX IF NOT EXISTS events_category_ts ON events (category, ts);
+CREATE INDEX IF NOT EXISTS events_camera_ts ON events (camera, ts);
+CREATE INDEX IF NOT EXISTS events_alert_ts ON events (ts) WHERE alert = 1;
+"""
+
+_INSERT = (
+    "INSERT INTO events (ts, camera, track_id, label, category, confidence, face_match, alert, x, y, w, h)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_db_path: Optional[Path] = None
+_queue: "queue.Queue[Any]" = queue.Queue(maxsize=_QUEUE_FRAMES)
+_writer: Optional[threading.Thread] = None
+_lifecycle_lock = threading.Lock()
+_local = threading.local()
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, float] = {
+    "frames_dropped": 0,
+    "rows_written": 0,
+    "rows_deleted": 0,
+    "batches": 0,
+    "last_batch_rows": 0,
+    "last_batch_ms": 0.0,
+    "write_errors": 0,
+}
+
+# Queue sentinels
+_STOP = object()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=30.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL: a crash can lose the last batches but never corrupts the log
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def start(db_path: Optional[Path] = None) -> None:
+    global _db_path, _writer
+    with _lifecycle_lock:
+        if _writer is not None:
+            return
+        _db_path = db_path or _DB_PATH
+        _db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = _connect(_db_path)
+        # Only takes effect on a new database (before the first table is created)
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        _writer = threading.Thread(target=_writer_loop, args=(conn,), name="event-writer", daemon=True)
+        _writer.start()
+
+
+def stop() -> None:
+    global _writer
+    with _lifecycle_lock:
+        if _writer is None:
+            return
+        # Blocking put: everything queued before stop() is written
+        _queue.put(_STOP)
+        _writer.join()
+        _writer = None
+        conn = getattr(_local, "conn", None)
+        if conn is not None:
+            conn.close()
+            _local.conn = None
+
+
+def record(camera_id: str, detections: Sequence[Dict[str, Any]], ts: Optional[float] = None) -> bool:
+    # Called from the inference threads: never blocks, drops the frame if the writer is behind
+    if _writer is None or not detections:
+        return False
+    try:
+        _queue.put_nowait((time.time() if ts is None else ts, camera_id, detections))
+    except queue.Full:
+        with _stats_lock:
+            _stats["frames_dropped"] += 1
+        return False
+    return True
+
+
+def flush(timeout: float = 30.0) -> bool:
+    # Waits until everything recorded so far is committed
+    if _writer is None:
+        return True
+    done = threading.Event()
+    _queue.put(done, timeout=timeout)
+    return done.wait(timeout)
+
+
+def _rows(item: Tuple[float, str, Sequence[Dict[str, Any]]]) -> List[Tuple[Any, ...]]:
+    ts, camera_id, detections = item
+    rows = []
+    for det in detections:
+        x, y, w, h = det.get("bbox") or (None, None, None, None)
+        rows.append((
+            ts,
+            camera_id,
+            det.get("track_id"),
+            det.get("label", "unknown"),
+            det.get("category", "unknown"),
+            float(det.get("confidence", 0.0)),
+            1 if det.get("face_match") else 0,
+            1 if det.get("alert") else 0,
+            x, y, w, h,
+        ))
+    return rows
+
+
+def _write_batch(conn: sqlite3.Connection, rows: List[Tuple[Any, ...]]) -> None:
+    t0 = time.perf_counter()
+    with conn:
+        conn.executemany(_INSERT, rows)
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0
+    with _stats_lock:
+        _stats["rows_written"] += len(rows)
+        _stats["batches"] += 1
+        _stats["last_batch_rows"] = len(rows)
+        _stats["last_batch_ms"] = elapsed_ms
+
+
+def _write_error(what: str, *args: Any) -> None:
+    logger.exception("event log write failed: " + what, *args)
+    with _stats_lock:
+        _stats["write_errors"] += 1
+
+
+def _writer_loop(conn: sqlite3.Connection) -> None:
+    next_retention = time.monotonic() + _RETENTION_INTERVAL_S
+    stopping = False
+    while not stopping:
+        try:
+            item = _queue.get(timeout=1.0)
+        except queue.Empty:
+            item = None
+        rows: List[Tuple[Any, ...]] = []
+        waiters: List[threading.Event] = []
+        deadline = time.monotonic() + _BATCH_DELAY_S
+        while item is not None:
+            if item is _STOP:
+                stopping = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            else:
+                rows.extend(_rows(item))
+            if stopping or len(rows) >= _BATCH_ROWS:
+                break
+            try:
+                item = _queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+        # A failed batch (disk full, locked or corrupt database) is logged and counted; its rows are
+        # lost but the writer keeps draining the queue
+        try:
+            if rows:
+                _write_batch(conn, rows)
+        except sqlite3.Error:
+            _write_error("batch of %d rows", len(rows))
+        for waiter in waiters:
+            waiter.set()
+        if time.monotonic() >= next_retention:
+            try:
+                apply_retention(conn)
+            except sqlite3.Error:
+                _write_error("retention")
+            next_retention = time.monotonic() + _RETENTION_INTERVAL_S
+    conn.close()
+
+
+def apply_retention(conn: Optional[sqlite3.Connection] = None) -> int:
+    # Deletes expired rows in chunks and returns freed pages to the filesystem; returns rows deleted
+    conn = conn or _reader()
+    deleted = 0
+    if _RETENTION_DAYS > 0:
+        cutoff = time.time() - _RETENTION_DAYS * 86400.0
+        while True:
+            with conn:
+                cur = conn.execute(
+                    "DELETE FROM events WHERE id IN (SELECT id FROM events WHERE ts < ? LIMIT ?)",
+                    (cutoff, _DELETE_CHUNK),
+                )
+            deleted += cur.rowcount
+            if cur.rowcount < _DELETE_CHUNK:
+                break
+    if _MAX_ROWS > 0:
+        # Row ids only grow, so everything below the newest _MAX_ROWS ids goes
+        (newest,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+        floor = newest - _MAX_ROWS
+        while floor > 0:
+            with conn:
+                cur = conn.execute(
+                    "DELETE FROM events WHERE id IN (SELECT id FROM events WHERE id <= ? LIMIT ?)",
+                    (floor, _DELETE_CHUNK),
+                )
+            deleted += cur.rowcount
+            if cur.rowcount < _DELETE_CHUNK:
+                break
+    if deleted:
+        conn.execute(f"PRAGMA incremental_vacuum({_VACUUM_PAGES})")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        with _stats_lock:
+            _stats["rows_deleted"] += deleted
+    return deleted
+
+
+def _reader() -> sqlite3.Connection:
+    # One connection per querying thread; WAL lets readers run alongside the writer
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        if _db_path is None:
+            raise RuntimeError("event log is not started")
+        conn = _local.conn = _connect(_db_path)
+    return conn
+
+
+def parse_time(value: str) -> float:
+    # Epoch seconds or ISO-8601 (naive times are UTC); raises ValueError
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _where(
+    start: Optional[float],
+    end: Optional[float],
+    person: Optional[str],
+    category: Optional[str],
+    camera: Optional[str],
+    alert: Optional[bool],
+) -> Tuple[str, List[Any]]:
+    clauses: List[str] = []
+    params: List[Any] = []
+    if start is not None:
+        clauses.append("ts >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("ts < ?")
+        params.append(end)
+    if person is not None:
+        clauses.append("label = ?")
+        params.append(person)
+    if category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    if camera is not None:
+        clauses.append("camera = ?")
+        params.append(camera)
+    if alert is not None:
+        # Literal (not a parameter) so the planner can use the partial alert index
+        clauses.append("alert = 1" if alert else "alert = 0")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def query(
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    person: Optional[str] = None,
+    category: Optional[str] = None,
+    camera: Optional[str] = None,
+    alert: Optional[bool] = None,
+    limit: int = 100,
+    before_id: Optional[int] = None,
+    before_ts: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    # Newest first; page further back with the last returned row's ts and id as before_ts and
+    # before_id. Paging follows the (ts, id) sort order, so rows recorded out of time order are
+    # neither skipped nor repeated, and the cursor stays valid after retention deletes its row.
+    # before_id alone is looked up; LookupError if that row is gone.
+    where, params = _where(start, end, person, category, camera, alert)
+    if before_id is not None:
+        if before_ts is None:
+            row = _reader().execute("SELECT ts FROM events WHERE id = ?", (before_id,)).fetchone()
+            if row is None:
+                raise LookupError(f"event {before_id} no longer exists")
+            before_ts = row[0]
+        where += (" AND " if where else " WHERE ") + "(ts, id) < (?, ?)"
+        params.extend([before_ts, before_id])
+    limit = max(1, min(limit, QUERY_MAX_LIMIT))
+    cur = _reader().execute(
+        "SELECT id, ts, camera, track_id, label, category, confidence, face_match, alert, x, y, w, h"
+        f" FROM events{where} ORDER BY ts DESC, id DESC LIMIT ?",
+        params + [limit],
+    )
+    out: List[Dict[str, Any]] = []
+    for (event_id, ts, camera_id, track_id, label, cat, conf, is_match, is_alert, x, y, w, h) in cur:
+        out.append({
+            "id": event_id,
+            "timestamp": datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "ts": ts,
+            "camera": camera_id,
+            "track_id": track_id,
+            "label": label,
+            "category": cat,
+            "confidence": conf,
+            "face_match": bool(is_match),
+            "alert": bool(is_alert),
+            "bbox": [x, y, w, h] if x is not None else None,
+        })
+    return out
+
+
+def summarize(
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    category: Optional[str] = None,
+    camera: Optional[str] = None,
+    alert: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    # Who was seen in the window: per label, sighting count and first/last time
+    where, params = _where(start, end, None, category, camera, alert)
+    # "+label": grouping must not pull the planner onto the label index (a full scan) when a
+    # time range is given
+    cur = _reader().execute(
+        f"SELECT label, category, COUNT(*), MIN(ts), MAX(ts), SUM(alert) FROM events{where}"
+        " GROUP BY +label, +category ORDER BY MAX(ts) DESC",
+        params,
+    )
+    return [
+        {
+            "label": label,
+            "category": cat,
+            "events": count,
+            "first_seen": first,
+            "last_seen": last,
+            "alerts": int(alerts or 0),
+        }
+        for (label, cat, count, first, last, alerts) in cur
+    ]
+
+
+def get_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        out: Dict[str, Any] = dict(_stats)
+    out["running"] = _writer is not None
+    out["queued_frames"] = _queue.qsize()
+    out["path"] = str(_db_path) if _db_path is not None else None
+    return out
+
+
+metrics.callback("veerdrishti_event_rows_written_total", "Detection rows written to the event log",
+                 lambda: _stats["rows_written"], "counter")
+metrics.callback("veerdrishti_event_frames_dropped_total", "Frames not logged because the writer queue was full",
+                 lambda: _stats["frames_dropped"], "counter")
+metrics.callback("veerdrishti_event_write_errors_total", "Event log batches or retention runs that failed",
+                 lambda: _stats["write_errors"], "counter")
+metrics.callback("veerdrishti_event_queue_frames", "Frames waiting for the event log writer", lambda: _queue.qsize())
@@ -1,215 +1,424 @@
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import os
 import pickle
-import uuid
+import threading
+import time
 
 import cv2
 import numpy as np
 
+from . import codec
+from . import detectors
+from . import gallery
+from . import metrics
+from . import recognizers
+
 
 # Paths
 _BACKEND_DIR = Path(__file__).resolve().parents[1]
-_DATA_DIR = _BACKEND_DIR / "data"
+_DATA_DIR = Path(os.getenv("VEERDRISHTI_DATA_DIR", str(_BACKEND_DIR / "data")))
 _FACES_DIR = _DATA_DIR / "faces"
-_MODEL_PATH = _DATA_DIR / "lbph_model.yml"
+_MODEL_NAME = recognizers.model_filename()
+# None: the backend is rebuilt from the gallery on start instead of loaded
+_MODEL_PATH: Optional[Path] = _DATA_DIR / _MODEL_NAME if _MODEL_NAME else None
 _LABELS_PATH = _DATA_DIR / "labels.pkl"
 
 
-_recognizer: Optional[cv2.face_LBPHFaceRecognizer] = None  # type: ignore[attr-defined]
+# RECOGNIZER_BACKEND=lbph (default) or embedding, see recognizers
+_recognizer: Optional[recognizers.Recognizer] = None
 _label_to_id: Dict[str, int] = {}
 _id_to_label: Dict[int, str] = {}
 _id_to_category: Dict[str, str] = {}
 
 _VALID_CATEGORIES = {"citizen", "official", "criminal"}
 
+_FACE_SIZE = (100, 100)
+# Lower confidence is better for every backend. Relaxed LBPH default (85) for better recall.
+MATCH_THRESHOLD = float(os.getenv("MATCH_THRESHOLD", str(recognizers.default_threshold())))
+_UNKNOWN: Tuple[str, float, bool, str] = ("unknown", 0.0, False, "unknown")
+# Uploads larger than this (longer side, px) are decoded at a reduced JPEG scale; faces stay far
+# above the 100x100 crop size while detection runs on a fraction of the pixels. 0 = full size.
+_UPLOAD_DECODE_MAX_SIDE = int(os.getenv("UPLOAD_DECODE_MAX_SIDE", "1600"))
+
+_initialized = False
+# Set by initialize(read_only=True): nothing under the data dir is written
+_read_only = False
+# Set while the gallery and model load, so callers that must not block (the camera pipelines) can skip
+_loading = threading.Event()
+
+_PREDICT_SECONDS = metrics.histogram("veerdrishti_recognizer_predict_seconds", "Recognizer predict latency per batch")
+_TRAIN_SECONDS = metrics.histogram(
+    "veerdrishti_retrain_seconds", "Full recognizer retrain duration", buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+)
+_ENROLL_SECONDS = metrics.histogram("veerdrishti_enroll_seconds", "Gallery append plus incremental recognizer update")
+metrics.callback("veerdrishti_gallery_people", "Registered people", lambda: len(gallery.persons()))
+metrics.callback("veerdrishti_gallery_samples", "Stored face crops", gallery.sample_count)
+
+
+class _RWLock:
+    # Many concurrent matchers, one writer; a waiting writer blocks new readers so it cannot starve
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+# Guards the recognizer object and label maps seen by matchers. Writers swap in new maps
+# (copy-on-write) and hold it only for the swap or an in-place LBPH update.
+_model_lock = _RWLock()
+
+# Serializes writers (enrollment and full retrain) touching recognizer, labels and model files
+_write_lock = threading.RLock()
+
+# Persisting the model and labels rewrites them in full, so enrollment hands that to a background writer
+_save_pending = threading.Event()
+_saver_thread: Optional[threading.Thread] = None
+
+
+def initialize(read_only: bool = False) -> None:
+    # Idempotent; after the first call this is a flag check with no filesystem access.
+    # read_only is for processes that share the data dir with the server (batch workers): no
+    # migration, and a missing or stale model is rebuilt in memory only.
+    global _initialized, _read_only
+    if _initialized:
+        return
+    with _write_lock:
+        if _initialized:
+            return
+        _loading.set()
+        try:
+            _read_only = read_only
+            if read_only:
+                gallery.initialize(_DATA_DIR, create=False)
+                _load_model_if_exists()
+            else:
+                _DATA_DIR.mkdir(parents=True, exist_ok=True)
+                gallery.initialize(_DATA_DIR)
+                if not gallery.exists():
+                    _migrate_png_tree()
+                else:
+                    _load_model_if_exists()
+            _initialized = True
+        finally:
+            _loading.clear()
+
+
+def loading() -> bool:
+    # True while another thread runs initialize(); match_faces would block until it finishes
+    return _loading.is_set() and not _initialized
+
+
+def _check_writable() -> None:
+    if _read_only:
+        raise RuntimeError("face database was opened read-only")
 
-def initialize() -> None:
-    _DATA_DIR.mkdir(parents=True, exist_ok=True)
-    _FACES_DIR.mkdir(parents=True, exist_ok=True)
-    _load_model_if_exists()
 
+def _migrate_png_tree() -> None:
+    # One-time import of the legacy faces/ PNG tree into the gallery store
+    with _write_lock:
+        gallery.reset()
+        if gallery.import_png_tree(_FACES_DIR) > 0:
+            _train_from_disk()
 
-def _create_recognizer():
-    # Requires opencv-contrib-python
-    return cv2.face.LBPHFaceRecognizer_create()
+
+def _create_recognizer() -> recognizers.Recognizer:
+    return recognizers.create()
+
+
+def _tmp_path(path: Path) -> Path:
+    # Keep the real suffix last: OpenCV picks the storage format from the extension
+    return path.with_name(f"{path.stem}.tmp{path.suffix}")
 
 
 def _save_labels() -> None:
-    with open(_LABELS_PATH, "wb") as f:
+    if _read_only:
+        return
+    tmp = _tmp_path(_LABELS_PATH)
+    with open(tmp, "wb") as f:
         pickle.dump({
             "label_to_id": _label_to_id,
             "id_to_label": _id_to_label,
             "id_to_category": _id_to_category,
         }, f)
+    os.replace(tmp, _LABELS_PATH)
 
 
-def _load_labels() -> None:
-    global _label_to_id, _id_to_label, _id_to_category
+def _save_model() -> None:
+    if _recognizer is None or _MODEL_PATH is None or _read_only:
+        return
+    tmp = _tmp_path(_MODEL_PATH)
+    _recognizer.write(tmp)
+    os.replace(tmp, _MODEL_PATH)
+
+
+def _saver_loop() -> None:
+    while True:
+        _save_pending.wait()
+        with _write_lock:
+            if not _save_pending.is_set():
+                continue
+            _save_pending.clear()
+            _save_model()
+            _save_labels()
+
+
+def _schedule_save() -> None:
+    global _saver_thread
+    _save_pending.set()
+    if _saver_thread is None or not _saver_thread.is_alive():
+        _saver_thread = threading.Thread(target=_saver_loop, daemon=True)
+        _saver_thread.start()
+
+
+def flush_pending_saves() -> None:
+    with _write_lock:
+        if _save_pending.is_set():
+            _save_pending.clear()
+            _save_model()
+            _save_labels()
+
+
+def _swap_model(
+    recognizer: Optional[recognizers.Recognizer],
+    label_to_id: Dict[str, int],
+    id_to_label: Dict[int, str],
+    id_to_category: Dict[str, str],
+) -> None:
+    global _recognizer, _label_to_id, _id_to_label, _id_to_category
+    with _model_lock.write():
+        _recognizer = recognizer
+        _label_to_id = label_to_id
+        _id_to_label = id_to_label
+        _id_to_category = id_to_category
+
+
+def _load_model_if_exists() -> None:
+    label_to_id: Dict[str, int] = {}
+    id_to_label: Dict[int, str] = {}
+    id_to_category: Dict[str, str] = {}
     if _LABELS_PATH.exists():
         with open(_LABELS_PATH, "rb") as f:
             data = pickle.load(f)
-            _label_to_id = data.get("label_to_id", {})
-            _id_to_label = data.get("id_to_label", {})
-            _id_to_category = data.get("id_to_category", {})
+            label_to_id = data.get("label_to_id", {})
+            id_to_label = data.get("id_to_label", {})
+            id_to_category = data.get("id_to_category", {})
+    recognizer = None
+    if _MODEL_PATH is not None and _MODEL_PATH.exists():
+        recognizer = _create_recognizer()
+        try:
+            recognizer.read(_MODEL_PATH)
+        except (ValueError, OSError, cv2.error):
+            # Unreadable, or written by another backend/embedder: rebuilt from the gallery below
+            recognizer = None
+    if recognizer is not None and (
+        recognizer.samples != gallery.sample_count() or len(id_to_label) != len(gallery.persons())
+    ):
+        # The gallery is fsynced on enrollment, model and labels only by the background saver: after a
+        # crash in between they miss the newest enrollments, so they are rebuilt like a missing model
+        recognizer = None
+    _swap_model(recognizer, label_to_id, id_to_label, id_to_category)
+    if recognizer is None and gallery.sample_count() > 0:
+        _train_from_disk()
 
 
-def _load_model_if_exists() -> None:
-    global _recognizer
-    _load_labels()
-    if _MODEL_PATH.exists():
-        _recognizer = _create_recognizer()
-        _recognizer.read(str(_MODEL_PATH))
+def list_registered_ids() -> List[str]:
+    initialize()
+    return sorted(gallery.persons())
 
 
-def list_registered_ids() -> List[str]:
+def import_png_tree(faces_dir: Path) -> int:
+    # Import faces/{category}/{id}/*.png crops into the gallery and rebuild the recognizer
+    initialize()
+    _check_writable()
+    with _write_lock:
+        imported = gallery.import_png_tree(faces_dir)
+        if imported > 0:
+            _train_from_disk()
+    return imported
+
+
+def export_png_tree(faces_dir: Path) -> int:
     initialize()
-    ids: List[str] = []
-    for p in _FACES_DIR.iterdir():
-        if not p.is_dir():
-            continue
-        if p.name in _VALID_CATEGORIES:
-            for sub in p.iterdir():
-                if sub.is_dir():
-                    ids.append(sub.name)
-        else:
-            ids.append(p.name)
-    ids.sort()
-    return ids
+    with _write_lock:
+        return gallery.export_png_tree(faces_dir)
 
 
 def _detect_faces(gray_image: np.ndarray) -> List[Tuple[int, int, int, int]]:
-    cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-    face_cascade = cv2.CascadeClassifier(cascade_path)
-    faces = face_cascade.detectMultiScale(gray_image, scaleFactor=1.2, minNeighbors=5, minSize=(50, 50))
-    return [(int(x), int(y), int(w), int(h)) for (x, y, w, h) in faces]
+    return detectors.detect_faces(gray_image, scale_factor=1.2, min_neighbors=5, min_size=(50, 50))
 
 
 def _prepare_face(gray_face: np.ndarray) -> np.ndarray:
     # Normalize face crop to a fixed size for recognizer
-    face_resized = cv2.resize(gray_face, (100, 100))
+    face_resized = cv2.resize(gray_face, _FACE_SIZE)
     # Improve robustness across lighting by equalizing histogram
     face_eq = cv2.equalizeHist(face_resized)
     return face_eq
 
 
-def register_face_from_bytes(person_id: str, image_bytes: bytes, category: str = "citizen") -> int:
-    initialize()
+def _prepare_faces(gray_faces: Sequence[np.ndarray]) -> np.ndarray:
+    # Batch form of _prepare_face writing into one contiguous (N, 100, 100) buffer.
+    # OpenCV's per-crop equalizeHist beats a numpy-vectorized equivalent, so only the
+    # allocations are batched.
+    batch = np.empty((len(gray_faces),) + _FACE_SIZE, dtype=np.uint8)
+    for i, face in enumerate(gray_faces):
+        cv2.resize(face, _FACE_SIZE, dst=batch[i])
+        cv2.equalizeHist(batch[i], dst=batch[i])
+    return batch
+
+
+def normalize_category(category: Optional[str]) -> str:
     cat = (category or "citizen").strip().lower()
-    if cat not in _VALID_CATEGORIES:
-        cat = "citizen"
-    np_buf = np.frombuffer(image_bytes, dtype=np.uint8)
-    img = cv2.imdecode(np_buf, cv2.IMREAD_COLOR)
-    if img is None:
-        return 0
+    return cat if cat in _VALID_CATEGORIES else "citizen"
+
 
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+def prepare_faces_from_bytes(image_bytes: bytes) -> Optional[np.ndarray]:
+    # Decode, detect and prepare every face of an uploaded image; None if it does not decode.
+    # Needs no recognizer state, so it also runs in registration worker processes.
+    gray = codec.decode(image_bytes, gray=True, max_side=_UPLOAD_DECODE_MAX_SIDE)
+    if gray is None:
+        return None
     boxes = _detect_faces(gray)
-    saved = 0
+    return _prepare_faces([gray[y : y + h, x : x + w] for (x, y, w, h) in boxes])
+
+
+def register_face_from_bytes(person_id: str, image_bytes: bytes, category: str = "citizen") -> int:
+    initialize()
+    crops = prepare_faces_from_bytes(image_bytes)
+    if crops is None or len(crops) == 0:
+        return 0
+    enroll_faces(person_id, list(crops), normalize_category(category))
+    return len(crops)
 
-    # Save under faces/{category}/{id}
-    person_dir = _FACES_DIR / cat / person_id
-    person_dir.mkdir(parents=True, exist_ok=True)
 
-    for (x, y, w, h) in boxes:
-        crop = gray[y : y + h, x : x + w]
-        crop = _prepare_face(crop)
-        filename = person_dir / f"{uuid.uuid4().hex}.png"
-        cv2.imwrite(str(filename), crop)
-        saved += 1
+def enroll_faces(person_id: str, faces: List[np.ndarray], category: str = "citizen") -> None:
+    # Incremental enrollment: the crops are appended to the gallery store and only the
+    # new samples are histogrammed (LBPH update). Expects prepared 100x100 crops.
+    enroll_many([(person_id, faces, category)])
 
-    if saved > 0:
-        train_from_disk()
 
-    return saved
+def enroll_many(entries: Sequence[Tuple[str, Sequence[np.ndarray], str]]) -> None:
+    # enroll_faces for several people with one gallery index write and one recognizer update
+    global _label_to_id, _id_to_label, _id_to_category
+    entries = [(person_id, faces, category) for person_id, faces, category in entries if len(faces) > 0]
+    if not entries:
+        return
+    initialize()
+    _check_writable()
+    t0 = time.perf_counter()
+    with _write_lock:
+        label_ids = gallery.append_many(entries)
+        if _recognizer is None:
+            # No model to extend yet (first enrollment or model file missing): rebuild from the gallery
+            _train_from_disk()
+            return
+        label_to_id = dict(_label_to_id)
+        id_to_label = dict(_id_to_label)
+        id_to_category = dict(_id_to_category)
+        batch: List[np.ndarray] = []
+        labels: List[np.ndarray] = []
+        for (person_id, faces, category), label_id in zip(entries, label_ids):
+            label_to_id[person_id] = label_id
+            id_to_label[label_id] = person_id
+            id_to_category[person_id] = category
+            batch.extend(faces)
+            labels.append(np.full(len(faces), label_id, dtype=np.int32))
+        # update mutates the model in place, so matchers are held off for its duration
+        with _model_lock.write():
+            _recognizer.update(batch, np.concatenate(labels))
+            _label_to_id, _id_to_label, _id_to_category = label_to_id, id_to_label, id_to_category
+        _schedule_save()
+    _ENROLL_SECONDS.observe(time.perf_counter() - t0)
 
 
 def train_from_disk() -> None:
-    global _recognizer, _label_to_id, _id_to_label
+    # Full rebuild from the gallery store; an explicit maintenance operation
     initialize()
+    with _write_lock:
+        _train_from_disk()
 
-    images: List[np.ndarray] = []
-    labels: List[int] = []
-
-    _label_to_id = {}
-    _id_to_label = {}
-    global _id_to_category
-    _id_to_category = {}
-    next_id = 0
-
-    # Support both legacy faces/{id} and new faces/{category}/{id}
-    for top in sorted(_FACES_DIR.iterdir()):
-        if not top.is_dir():
-            continue
-        if top.name in _VALID_CATEGORIES:
-            category = top.name
-            for person_dir in sorted(top.iterdir()):
-                if not person_dir.is_dir():
-                    continue
-                person_label = person_dir.name  # use ID as label
-                _label_to_id[person_label] = next_id
-                _id_to_label[next_id] = person_label
-                _id_to_category[person_label] = category
-                label_id = next_id
-                next_id += 1
-
-                for img_path in person_dir.glob("*.png"):
-                    img = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
-                    if img is None:
-                        continue
-                    img = _prepare_face(img)
-                    images.append(img)
-                    labels.append(label_id)
-        else:
-            # Legacy layout: treat as citizen by default
-            person_dir = top
-            person_label = person_dir.name
-            _label_to_id[person_label] = next_id
-            _id_to_label[next_id] = person_label
-            _id_to_category[person_label] = "citizen"
-            label_id = next_id
-            next_id += 1
-
-            for img_path in person_dir.glob("*.png"):
-                img = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
-                if img is None:
-                    continue
-                img = _prepare_face(img)
-                images.append(img)
-                labels.append(label_id)
-
-    if len(images) == 0:
+
+def _train_from_disk() -> None:
+    # Label id is the person's position in the gallery, so incremental updates stay aligned
+    persons = gallery.persons()
+    label_to_id = {p: i for i, p in enumerate(persons)}
+    id_to_label = {i: p for i, p in enumerate(persons)}
+    id_to_category = gallery.categories()
+
+    if gallery.sample_count() == 0:
         # No data; reset recognizer
-        _recognizer = None
+        _swap_model(None, label_to_id, id_to_label, id_to_category)
         return
 
-    _recognizer = _create_recognizer()
-    _recognizer.train(images, np.array(labels))
-    _recognizer.write(str(_MODEL_PATH))
+    # One sequential read of the memory-mapped crops; training runs while matchers keep the old model
+    t0 = time.perf_counter()
+    images = np.array(gallery.crops())
+    recognizer = _create_recognizer()
+    recognizer.train(images, gallery.sample_labels())
+    _TRAIN_SECONDS.observe(time.perf_counter() - t0)
+    _swap_model(recognizer, label_to_id, id_to_label, id_to_category)
+    _save_pending.clear()
+    _save_model()
     _save_labels()
 
 
-def match_face(gray_face_crop: np.ndarray) -> Tuple[str, float, bool, str]:
+def match_faces(gray_face_crops: Sequence[Optional[np.ndarray]]) -> List[Tuple[str, float, bool, str]]:
+    # Match every face crop of a frame against one consistent recognizer/label snapshot
     initialize()
-    if gray_face_crop is None or gray_face_crop.size == 0:
-        return ("unknown", 0.0, False, "unknown")
-
-    face = _prepare_face(gray_face_crop)
-
-    if _recognizer is None:
-        _load_model_if_exists()
-    if _recognizer is None or len(_id_to_label) == 0:
-        return ("unknown", 0.0, False, "unknown")
-
-    try:
-        pred_label_id, confidence = _recognizer.predict(face)
-    except cv2.error:
-        return ("unknown", 0.0, False, "unknown")
-
-    label = _id_to_label.get(int(pred_label_id), "unknown")
-    # Lower confidence is better for LBPH. Relaxed threshold for better recall.
-    threshold = 85.0
-    is_match = float(confidence) < threshold
-    category = _id_to_category.get(label, "citizen") if is_match else "unknown"
-    return (label if is_match else "unknown", float(confidence), bool(is_match), category)
+    results: List[Tuple[str, float, bool, str]] = [_UNKNOWN] * len(gray_face_crops)
+    valid = [i for i, crop in enumerate(gray_face_crops) if crop is not None and crop.size > 0]
+    if not valid:
+        return results
+
+    faces = _prepare_faces([gray_face_crops[i] for i in valid])
+
+    with _model_lock.read():
+        recognizer, id_to_label, id_to_category = _recognizer, _id_to_label, _id_to_category
+        if recognizer is None or len(id_to_label) == 0:
+            return results
+        t0 = time.perf_counter()
+        predictions = recognizer.predict(faces)
+        _PREDICT_SECONDS.observe(time.perf_counter() - t0)
+        for i, (pred_label_id, confidence) in zip(valid, predictions):
+            if pred_label_id < 0:
+                continue
+            label = id_to_label.get(int(pred_label_id), "unknown")
+            is_match = float(confidence) < MATCH_THRESHOLD
+            category = id_to_category.get(label, "citizen") if is_match else "unknown"
+            results[i] = (label if is_match else "unknown", float(confidence), bool(is_match), category)
+    return results
 
 
+def match_face(gray_face_crop: np.ndarray) -> Tuple[str, float, bool, str]:
+    return match_faces([gray_face_crop])[0]
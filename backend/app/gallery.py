@@ -0,0 +1,230 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import os
+import pickle
+import sys
+import uuid
+
+import cv2
+import numpy as np
+
+
+# Prepared crops are fixed-size 100x100 equalized grayscale (see face_db._prepare_face)
+FACE_SHAPE = (100, 100)
+_FACE_BYTES = FACE_SHAPE[0] * FACE_SHAPE[1]
+
+_VALID_CATEGORIES = {"citizen", "official", "criminal"}
+
+# Store layout under {data}/gallery:
+#   crops.u8   raw uint8 crops, appended back to back (memory-mapped for reads)
+#   index.pkl  persons (label id == position), categories and per-sample label ids
+_gallery_dir: Optional[Path] = None
+_persons: List[str] = []
+_person_to_label: Dict[str, int] = {}
+_categories: Dict[str, str] = {}
+_sample_labels: np.ndarray = np.zeros(0, dtype=np.int32)
+_crops: Optional[np.memmap] = None
+
+
+def _crops_path() -> Path:
+    assert _gallery_dir is not None
+    return _gallery_dir / "crops.u8"
+
+
+def _index_path() -> Path:
+    assert _gallery_dir is not None
+    return _gallery_dir / "index.pkl"
+
+
+def initialize(data_dir: Path, create: bool = True) -> None:
+    # create=False only reads: a missing store is an empty gallery
+    global _gallery_dir
+    gallery_dir = data_dir / "gallery"
+    if _gallery_dir == gallery_dir:
+        return
+    if create:
+        gallery_dir.mkdir(parents=True, exist_ok=True)
+    _gallery_dir = gallery_dir
+    _load()
+
+
+def exists() -> bool:
+    return _gallery_dir is not None and _index_path().exists()
+
+
+def _load() -> None:
+    global _persons, _person_to_label, _categories, _sample_labels
+    _persons, _categories = [], {}
+    _sample_labels = np.zeros(0, dtype=np.int32)
+    if _index_path().exists():
+        with open(_index_path(), "rb") as f:
+            data = pickle.load(f)
+        _persons = list(data.get("persons", []))
+        _categories = dict(data.get("categories", {}))
+        _sample_labels = np.asarray(data.get("sample_labels", []), dtype=np.int32)
+    _person_to_label = {p: i for i, p in enumerate(_persons)}
+    _remap()
+
+
+def _remap() -> None:
+    global _crops, _sample_labels
+    count = len(_sample_labels)
+    path = _crops_path()
+    # Crops are appended before the index is replaced, so trailing bytes from an interrupted write are ignored
+    on_disk = path.stat().st_size // _FACE_BYTES if path.exists() else 0
+    if on_disk < count:
+        _sample_labels = _sample_labels[:on_disk]
+        count = on_disk
+    if count == 0:
+        _crops = None
+        return
+    _crops = np.memmap(path, dtype=np.uint8, mode="r", shape=(count,) + FACE_SHAPE)
+
+
+def _save_index() -> None:
+    path = _index_path()
+    tmp = path.with_name(f"{path.stem}.tmp{path.suffix}")
+    with open(tmp, "wb") as f:
+        pickle.dump({
+            "persons": _persons,
+            "categories": _categories,
+            "sample_labels": _sample_labels,
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _label_for(person_id: str, category: str) -> int:
+    label_id = _person_to_label.get(person_id)
+    if label_id is None:
+        label_id = len(_persons)
+        _persons.append(person_id)
+        _person_to_label[person_id] = label_id
+    _categories[person_id] = category
+    return label_id
+
+
+def _write_crops(person_id: str, crops: List[np.ndarray], category: str) -> int:
+    return _write_crops_many([(person_id, crops, category)])[0]
+
+
+def _write_crops_many(entries: Sequence[Tuple[str, Sequence[np.ndarray], str]]) -> List[int]:
+    # All crops go to the file in one append (and one fsync), in entry order
+    global _sample_labels
+    label_ids = [_label_for(person_id, category) for person_id, _, category in entries]
+    blocks = [
+        np.asarray(c, dtype=np.uint8).reshape(FACE_SHAPE) for _, crops, _ in entries for c in crops
+    ]
+    if blocks:
+        block = np.ascontiguousarray(np.stack(blocks))
+        with open(_crops_path(), "r+b" if _crops_path().exists() else "wb") as f:
+            # Truncate any torn tail so offsets stay aligned with the index
+            f.truncate(len(_sample_labels) * _FACE_BYTES)
+            f.seek(0, os.SEEK_END)
+            f.write(block.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        new_labels = [np.full(len(crops), label_id, dtype=np.int32) for (_, crops, _), label_id in zip(entries, label_ids)]
+        _sample_labels = np.concatenate([_sample_labels] + new_labels)
+    return label_ids
+
+
+def append(person_id: str, crops: List[np.ndarray], category: str = "citizen") -> int:
+    # Returns the person's label id; callers serialize writers (face_db._write_lock)
+    label_id = _write_crops(person_id, crops, category)
+    _save_index()
+    _remap()
+    return label_id
+
+
+def append_many(entries: Sequence[Tuple[str, Sequence[np.ndarray], str]]) -> List[int]:
+    # append for several (person_id, crops, category) with a single index write
+    label_ids = _write_crops_many(entries)
+    _save_index()
+    _remap()
+    return label_ids
+
+
+def reset() -> None:
+    global _persons, _person_to_label, _categories, _sample_labels
+    _persons, _person_to_label, _categories = [], {}, {}
+    _sample_labels = np.zeros(0, dtype=np.int32)
+    if _crops_path().exists():
+        _crops_path().unlink()
+    _save_index()
+    _remap()
+
+
+def crops() -> np.ndarray:
+    if _crops is None:
+        return np.zeros((0,) + FACE_SHAPE, dtype=np.uint8)
+    return _crops
+
+
+def sample_labels() -> np.ndarray:
+    return _sample_labels
+
+
+def persons() -> List[str]:
+    return list(_persons)
+
+
+def categories() -> Dict[str, str]:
+    return dict(_categories)
+
+
+def sample_count() -> int:
+    return len(_sample_labels)
+
+
+def import_png_tree(faces_dir: Path) -> int:
+    # Accepts faces/{category}/{id}/*.png and the legacy faces/{id}/*.png (treated as citizen).
+    # Crops are expected to be prepared already; they are only resized if a file is off-size.
+    imported = 0
+    if not faces_dir.exists():
+        return 0
+    for top in sorted(faces_dir.iterdir()):
+        if not top.is_dir():
+            continue
+        if top.name in _VALID_CATEGORIES:
+            people = [(p, top.name) for p in sorted(top.iterdir()) if p.is_dir()]
+        else:
+            people = [(top, "citizen")]
+        for person_dir, category in people:
+            batch: List[np.ndarray] = []
+            for img_path in sorted(person_dir.glob("*.png")):
+                img = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
+                if img is None:
+                    continue
+                if img.shape != FACE_SHAPE:
+                    img = cv2.equalizeHist(cv2.resize(img, FACE_SHAPE))
+                batch.append(img)
+            if batch:
+                _write_crops(person_dir.name, batch, category)
+                imported += len(batch)
+    _save_index()
+    _remap()
+    return imported
+
+
+def export_png_tree(faces_dir: Path) -> int:
+    data = crops()
+    for i, label_id in enumerate(_sample_labels):
+        person_id = _persons[int(label_id)]
+        person_dir = faces_dir / _categories.get(person_id, "citizen") / person_id
+        person_dir.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(person_dir / f"{uuid.uuid4().hex}.png"), np.asarray(data[i]))
+    return len(_sample_labels)
+
+
+if __name__ == "__main__":
+    # python -m app.gallery {import|export} DIR  (uses VEERDRISHTI_DATA_DIR or backend/data)
+    from . import face_db
+
+    if len(sys.argv) != 3 or sys.argv[1] not in ("import", "export"):
+        print("usage: python -m app.gallery {import|export} DIR")
+        sys.exit(2)
+    face_db.initialize()
+    if sys.argv[1] == "import":
+        print(f"imported {face_db.import_png_tree(Path(sys.argv[2]))} crops")
+    else:
+        print(f"exported {face_db.export_png_tree(Path(sys.argv[2]))} crops")
@@ -1,34 +1,163 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
 import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
+from . import alerts
+from . import codec
+from . import detectors
+from . import events
 from . import face_db
-
-
-# Shared state for serving endpoints
-_latest_frame_jpeg: Optional[bytes] = None
-_latest_detections: Optional[Dict[str, Any]] = None
-
-_thread: Optional[threading.Thread] = None
-_stop_event: Optional[threading.Event] = None
-
-
-def _get_haar_cascade() -> cv2.CascadeClassifier:
-    cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-    return cv2.CascadeClassifier(cascade_path)
-
-
-def _annotate_and_build_payload(
+from . import metrics
+from . import startup
+from .broadcast import Broadcaster
+from .motion import MotionGate, merge_boxes
+from .tracker import FaceTracker
+
+try:
+    # Optional: several times faster than json for the per-frame payload
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+# Frames offered to the pipeline per second; the camera is still drained at its own rate
+_TARGET_FPS = float(os.getenv("INFERENCE_FPS", "10"))
+# Small bounded queues between stages: under backpressure the oldest frame is dropped
+_QUEUE_SIZE = 2
+_STAGES = ("capture", "detect", "recognize", "encode")
+# HOG + cascade run in a process pool shared by all cameras; 0 keeps detection in the camera's thread
+_DETECT_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+
+# Camera (re)connection: exponential backoff between open attempts; a live source that delivers no
+# frame for CAMERA_STALL_S seconds is reopened
+_CAMERA_RETRY_MIN_S = float(os.getenv("CAMERA_RETRY_MIN_S", "1"))
+_CAMERA_RETRY_MAX_S = float(os.getenv("CAMERA_RETRY_MAX_S", "30"))
+_CAMERA_STALL_S = float(os.getenv("CAMERA_STALL_S", "5"))
+
+# Tracking: full detection every N frames (optical flow in between); identities refreshed every M frames
+_TRACK_DETECT_EVERY = int(os.getenv("TRACK_DETECT_EVERY", "5"))
+_TRACK_RECOGNIZE_EVERY = int(os.getenv("TRACK_RECOGNIZE_EVERY", "30"))
+
+# Width HOG and the whole-frame cascade run at (boxes are mapped back and faces are cropped from
+# the full-resolution frame); 0 = full resolution
+_DETECT_WIDTH = int(os.getenv("DETECT_WIDTH", "0"))
+
+# Motion gate: detection only runs where the (downscaled) frame changed or faces are tracked
+_MOTION_GATE = os.getenv("MOTION_GATE", "1") not in ("0", "false", "no")
+_MOTION_THRESHOLD = int(os.getenv("MOTION_THRESHOLD", "25"))
+_MOTION_MIN_AREA = float(os.getenv("MOTION_MIN_AREA", "0.002"))
+# Regions are padded so a moving limb still yields a window HOG can see a person in
+_ROI_PAD = 32
+_ROI_MIN_SIZE = (128, 256)
+# Above this fraction of the frame, one full-frame pass is cheaper than several ROIs
+_ROI_MAX_FRACTION = 0.6
+
+# JPEG served on the main stream; 0 width = frame size
+_JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "80"))
+_JPEG_WIDTH = int(os.getenv("JPEG_WIDTH", "0"))
+
+
+def _parse_variants(spec: str) -> Dict[str, Tuple[int, int]]:
+    # "thumb=320:60,small=640:70" -> {"thumb": (320, 60), ...} (width:quality)
+    variants: Dict[str, Tuple[int, int]] = {}
+    for item in spec.split(","):
+        name, _, rest = item.strip().partition("=")
+        if not name or not rest:
+            continue
+        width, _, quality = rest.partition(":")
+        variants[name.strip()] = (int(width), int(quality or _JPEG_QUALITY))
+    return variants
+
+
+# Extra encodings of each published frame, produced on first request and shared by all clients
+STREAM_VARIANTS = _parse_variants(os.getenv("STREAM_VARIANTS", "thumb=320:60"))
+
+DEFAULT_CAMERA = "default"
+
+logger = logging.getLogger(__name__)
+
+_pipelines: Dict[str, "_Pipeline"] = {}
+_pipelines_lock = threading.Lock()
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+_STAGE_SECONDS = metrics.histogram("veerdrishti_stage_seconds", "Pipeline stage time per frame", ("camera", "stage"))
+# The encode stage split into drawing/payload and JPEG compression
+_ENCODE_STEP_SECONDS = metrics.histogram(
+    "veerdrishti_encode_step_seconds", "Encode stage breakdown per frame", ("camera", "step")
+)
+_FACES_PER_FRAME = metrics.histogram(
+    "veerdrishti_faces_per_frame", "Faces published per frame", ("camera",), buckets=metrics.COUNT_BUCKETS
+)
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if _DETECT_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that already runs camera threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=_DETECT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _reset_broken_pool(broken: ProcessPoolExecutor) -> None:
+    # A worker died (OOM kill, crash in native code): drop the pool so the next call respawns it
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def warm_up() -> None:
+    # Loads the detectors and starts every detection pool worker (spawned processes import OpenCV
+    # and load their own detectors) before the first frames need them
+    detectors.warm_up()
+    pool = _get_pool()
+    if pool is not None:
+        for future in [pool.submit(detectors.warm_up) for _ in range(_DETECT_WORKERS)]:
+            future.result()
+
+
+def parse_source(source: Union[int, str]) -> Union[int, str]:
+    # "0" -> local device 0; anything else (file path, rtsp://...) is passed to VideoCapture as-is
+    if isinstance(source, str) and source.strip().isdigit():
+        return int(source.strip())
+    return source
+
+
+def annotate_and_build_payload(
     frame: np.ndarray,
-    detections: List[Tuple[int, int, int, int, str, float, bool, str]],
+    detections: List[Tuple[int, int, int, int, str, float, bool, str, Optional[int]]],
 ) -> Dict[str, Any]:
     h, w = frame.shape[:2]
     payload: Dict[str, Any] = {"frame_size": [int(w), int(h)], "detections": []}
 
-    for (x, y, ww, hh, label, conf, is_match, category) in detections:
+    for (x, y, ww, hh, label, conf, is_match, category, track_id) in detections:
         # Color by category: citizen=yellow, official=green, criminal=red, unknown=red
         if is_match:
             if category == "official":
@@ -79,102 +208,542 @@ def _annotate_and_build_payload(
                 "face_match": bool(is_match),
                 "category": category if is_match else "unknown",
                 "alert": True if (is_match and category == "criminal") or (not is_match) else False,
+                "track_id": track_id,
             }
         )
 
     return payload
 
 
-def _inference_loop(camera_index: int) -> None:
-    global _latest_frame_jpeg, _latest_detections
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+class PublishedFrame:
+    # One annotated frame as served to clients: JPEG and detections JSON are produced once.
+    # seq increases by one per published frame of a camera; the ETag also carries the pipeline
+    # instance so a restarted camera never revalidates against an old frame.
+    __slots__ = ("seq", "etag", "jpeg", "detections", "detections_json", "image", "_variants", "_lock")
+
+    def __init__(
+        self, seq: int, instance: str, jpeg: bytes, detections: Dict[str, Any], image: Optional[np.ndarray] = None
+    ) -> None:
+        self.seq = seq
+        self.etag = f'"{instance}-{seq}"'
+        self.jpeg = jpeg
+        self.detections = detections
+        self.detections_json = _dumps(detections)
+        # Annotated frame, kept for STREAM_VARIANTS encodes
+        self.image = image
+        self._variants: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def variant_etag(self, name: Optional[str]) -> str:
+        return self.etag if name is None else f'{self.etag[:-1]}-{name}"'
+
+    def variant(self, name: Optional[str]) -> Optional[bytes]:
+        # Blocking (encodes on first use); call it on codec.executor(). None without a source image.
+        if name is None:
+            return self.jpeg
+        with self._lock:
+            data = self._variants.get(name)
+            if data is None and self.image is not None:
+                width, quality = STREAM_VARIANTS[name]
+                data = codec.encode(self.image, quality, width)
+                if data is not None:
+                    self._variants[name] = data
+            return data
+
+
+def _detect_scale(frame_width: int) -> float:
+    if _DETECT_WIDTH <= 0 or frame_width <= _DETECT_WIDTH:
+        return 1.0
+    return _DETECT_WIDTH / float(frame_width)
+
+
+def _clip_box(box: Tuple[int, int, int, int], shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+    # Tracked boxes can drift past the frame edge
+    x, y, w, h = box
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, shape[1]), min(y + h, shape[0])
+    return (x0, y0, max(x1 - x0, 0), max(y1 - y0, 0))
+
+
+def recognize_tracks(
+    tracker: FaceTracker, gray_full: np.ndarray, tracks: List[Tuple[int, Tuple[int, int, int, int], bool]]
+) -> List[Tuple[int, int, int, int, str, float, bool, str, Optional[int]]]:
+    # Only new or stale tracks go to the recognizer, in one batch; returns annotate_and_build_payload input
+    pending = [(track_id, _clip_box(box, gray_full.shape)) for track_id, box, needs in tracks if needs]
+    # While the model loads, tracks stay unidentified (not shown) and are retried, rather than
+    # reported as unknown faces
+    if pending and not face_db.loading():
+        crops = [gray_full[y : y + h, x : x + w] for _, (x, y, w, h) in pending]
+        for (track_id, _), identity in zip(pending, face_db.match_faces(crops)):
+            tracker.set_identity(track_id, identity)
+        startup.milestone("first_recognition")
+    found: List[Tuple[int, int, int, int, str, float, bool, str, Optional[int]]] = []
+    for track_id, box, _ in tracks:
+        identity = tracker.identity(track_id)
+        if identity is None:
+            # Recognition request was dropped under backpressure; shown once it is recognized
+            continue
+        x, y, w, h = _clip_box(box, gray_full.shape)
+        found.append((x, y, w, h, *identity, track_id))
+    return found
+
+
+class _Pipeline:
+    # capture -> detect -> recognize -> encode, one thread per stage, joined by bounded queues
+
+    def __init__(self, camera_id: str, source: Union[int, str], target_fps: float, loop: bool = False) -> None:
+        self.camera_id = camera_id
+        self.source = source
+        self.target_fps = target_fps
+        # Rewind file sources at EOF (used to stand in for cameras when benchmarking)
+        self.loop = loop
+        self.stop_event = threading.Event()
+        self.queues: Dict[str, "queue.Queue[Any]"] = {
+            name: queue.Queue(maxsize=_QUEUE_SIZE) for name in _STAGES[1:]
+        }
+        self.threads: List[threading.Thread] = []
+        self.started_at = time.monotonic()
+        self.stats_lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, float]] = {
+            name: {"frames": 0, "dropped": 0, "errors": 0, "busy_s": 0.0} for name in _STAGES
+        }
+        self.instance = uuid.uuid4().hex[:8]
+        self.pool_failures = 0
+        self.latest: Optional[PublishedFrame] = None
+        self.last_publish: Optional[float] = None
+        # connecting | retrying | streaming | reconnecting | ended (file source without loop)
+        self.camera_state = "connecting"
+        self.open_attempts = 0
+        self.last_error: Optional[str] = None
+        self.retry_at: Optional[float] = None
+        # Each annotated frame is encoded once and shared by every streaming client
+        self.broadcaster: "Broadcaster[PublishedFrame]" = Broadcaster()
+        self.tracker = FaceTracker(
+            detect_every=_TRACK_DETECT_EVERY,
+            recognize_every=_TRACK_RECOGNIZE_EVERY,
+            match_threshold=face_db.MATCH_THRESHOLD,
+            # One point per frame at LBPH's default threshold of 85, proportionally for other backends
+            confidence_decay=face_db.MATCH_THRESHOLD / 85.0,
+        )
+        self.motion_gate: Optional[MotionGate] = (
+            MotionGate(threshold=_MOTION_THRESHOLD, min_area=_MOTION_MIN_AREA) if _MOTION_GATE else None
+        )
+        # Children resolved once so the per-frame cost is a bisect and a lock
+        self._stage_seconds = {name: _STAGE_SECONDS.labels(camera_id, name) for name in _STAGES}
+        self._annotate_seconds = _ENCODE_STEP_SECONDS.labels(camera_id, "annotate")
+        self._jpeg_seconds = _ENCODE_STEP_SECONDS.labels(camera_id, "jpeg")
+        self._faces_per_frame = _FACES_PER_FRAME.labels(camera_id)
+
+    def start(self) -> None:
+        loops = {
+            "capture": self._capture_loop,
+            "detect": self._detect_loop,
+            "recognize": self._recognize_loop,
+            "encode": self._encode_loop,
+        }
+        for name in _STAGES:
+            thread = threading.Thread(target=loops[name], name=f"inference-{self.camera_id}-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join(timeout=2.0)
+        self.threads = []
+        self.broadcaster.close()
+        for name in _STAGES:
+            _STAGE_SECONDS.remove(self.camera_id, name)
+        _ENCODE_STEP_SECONDS.remove(self.camera_id, "annotate")
+        _ENCODE_STEP_SECONDS.remove(self.camera_id, "jpeg")
+        _FACES_PER_FRAME.remove(self.camera_id)
+
+    def _error(self, stage: str) -> None:
+        # Logged and counted; the stage thread carries on with the next frame
+        logger.exception("camera %s: %s stage failed on a frame", self.camera_id, stage)
+        with self.stats_lock:
+            self.stats[stage]["errors"] += 1
+
+    def _count(self, stage: str, busy_s: float = 0.0, dropped: int = 0) -> None:
+        with self.stats_lock:
+            entry = self.stats[stage]
+            if dropped:
+                entry["dropped"] += dropped
+            else:
+                entry["frames"] += 1
+                entry["busy_s"] += busy_s
+        if not dropped:
+            self._stage_seconds[stage].observe(busy_s)
+
+    def _put(self, stage: str, item: Any) -> None:
+        # Never block the producer: replace the oldest queued frame so consumers see the newest
+        q = self.queues[stage]
+        while True:
+            try:
+                q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                    self._count(stage, dropped=1)
+                except queue.Empty:
+                    pass
+
+    def _get(self, stage: str) -> Optional[Any]:
+        try:
+            return self.queues[stage].get(timeout=0.2)
+        except queue.Empty:
+            return None
+
+    def _open_capture(self) -> Optional[Any]:
+        # Retries with exponential backoff until the source opens; None once the pipeline is stopped
+        delay = _CAMERA_RETRY_MIN_S
+        while not self.stop_event.is_set():
+            self.open_attempts += 1
+            cap = cv2.VideoCapture(self.source)
+            if cap.isOpened():
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+                self.camera_state, self.last_error, self.retry_at = "streaming", None, None
+                return cap
+            cap.release()
+            self.camera_state = "retrying"
+            self.last_error = f"could not open {self.source}"
+            self.retry_at = time.monotonic() + delay
+            self.stop_event.wait(delay)
+            delay = min(delay * 2, _CAMERA_RETRY_MAX_S)
+        return None
+
+    def _capture_loop(self) -> None:
+        cap = self._open_capture()
+        if cap is None:
+            return
+        interval = 1.0 / self.target_fps if self.target_fps > 0 else 0.0
+        # Files are paced by sleeping; live sources are drained with grab() so retrieved frames are fresh
+        is_file = isinstance(self.source, str) and os.path.isfile(self.source)
+        next_due = time.monotonic()
+        failing_since: Optional[float] = None
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    if is_file:
+                        delay = next_due - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                    t0 = time.perf_counter()
+                    if not cap.grab():
+                        if is_file and self.loop:
+                            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                            continue
+                        if is_file:
+                            self.camera_state = "ended"
+                        elif failing_since is None:
+                            failing_since = time.monotonic()
+                        elif time.monotonic() - failing_since >= _CAMERA_STALL_S:
+                            # Dropped network stream or unplugged device
+                            cap.release()
+                            self.camera_state = "reconnecting"
+                            self.last_error = f"no frames from {self.source} for {_CAMERA_STALL_S:g}s"
+                            cap = self._open_capture()
+                            if cap is None:
+                                return
+                            failing_since = None
+                            continue
+                        time.sleep(0.2)
+                        continue
+                    failing_since = None
+                    now = time.monotonic()
+                    if now < next_due:
+                        self._count("capture", dropped=1)
+                        continue
+                    ok, frame = cap.retrieve()
+                    if not ok or frame is None:
+                        continue
+                    next_due = max(next_due + interval, now)
+                    self._count("capture", time.perf_counter() - t0)
+                    self._put("detect", frame)
+                except Exception:
+                    self._error("capture")
+                    time.sleep(0.2)
+        finally:
+            cap.release()
+
+    def is_running(self) -> bool:
+        return any(t.is_alive() for t in self.threads)
+
+    def _detect_loop(self) -> None:
+        detectors.warm_up()
+        while not self.stop_event.is_set():
+            frame = self._get("detect")
+            if frame is None:
+                continue
+            try:
+                t0 = time.perf_counter()
+                gray_full = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                tracks = self.tracker.step(gray_full, self._detect)
+            except Exception:
+                self._error("detect")
+                continue
+            self._count("detect", time.perf_counter() - t0)
+            self._put("recognize", (frame, gray_full, tracks))
+
+    def _in_pool(self, fn: Any, *args: Any) -> Any:
+        # Runs fn in the detection pool, or in this thread when there is none or it just broke
+        pool = _get_pool()
+        if pool is not None:
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                logger.warning("camera %s: detection pool broke, respawning it", self.camera_id)
+                _reset_broken_pool(pool)
+                with self.stats_lock:
+                    self.pool_failures += 1
+        return fn(*args)
+
+    def _detect(self, gray_full: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        h, w = gray_full.shape[:2]
+        scale = _detect_scale(w)
+        if self.motion_gate is not None:
+            # Called by the tracker only on frames it detects on, so the gate's background also advances
+            # once per detection and motion since the last one still differs from it. Motion regions plus
+            # live tracks, so a person standing still is not dropped.
+            detect_regions = self.motion_gate.regions(gray_full) + self.tracker.boxes()
+            if not detect_regions:
+                self.motion_gate.record_detection(gated=True)
+                return []
+            regions = merge_boxes(detect_regions, pad=_ROI_PAD, bounds=(w, h), min_size=_ROI_MIN_SIZE)
+            scanned = sum(rw * rh for (_, _, rw, rh) in regions) / float(w * h)
+            if scanned < _ROI_MAX_FRACTION:
+                self.motion_gate.record_detection(gated=False, scanned_fraction=scanned)
+                rois = [(x, y, gray_full[y : y + rh, x : x + rw]) for (x, y, rw, rh) in regions]
+                return self._in_pool(detectors.detect_face_boxes_in_rois, rois, scale)
+            self.motion_gate.record_detection(gated=False, scanned_fraction=1.0)
+        return self._in_pool(detectors.detect_face_boxes, gray_full, scale)
+
+    def _recognize_loop(self) -> None:
+        while not self.stop_event.is_set():
+            item = self._get("recognize")
+            if item is None:
+                continue
+            frame, gray_full, tracks = item
+            t0 = time.perf_counter()
+            try:
+                found = recognize_tracks(self.tracker, gray_full, tracks)
+            except Exception:
+                self._error("recognize")
+                continue
+            self._count("recognize", time.perf_counter() - t0)
+            self._put("encode", (frame, found))
 
-    # Initialize detectors
-    hog = cv2.HOGDescriptor()
-    hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
-    face_cascade = _get_haar_cascade()
+    def _encode_loop(self) -> None:
+        while not self.stop_event.is_set():
+            item = self._get("encode")
+            if item is None:
+                continue
+            frame, found = item
+            try:
+                t0 = time.perf_counter()
+                # Draw and package payload
+                payload = annotate_and_build_payload(frame, found)
+                payload["camera"] = self.camera_id
+                self._annotate_seconds.observe(time.perf_counter() - t0)
+                self._faces_per_frame.observe(len(found))
+
+                # Encode to JPEG for serving on the shared codec pool; events and alerts overlap with it
+                t1 = time.perf_counter()
+                future = codec.executor().submit(codec.encode, frame, _JPEG_QUALITY, _JPEG_WIDTH)
+                events.record(self.camera_id, payload["detections"])
+                alerts.engine.ingest(self.camera_id, payload["detections"])
+                jpeg = future.result()
+                self._jpeg_seconds.observe(time.perf_counter() - t1)
+            except Exception:
+                self._error("encode")
+                continue
+            if jpeg is not None:
+                # Single publisher thread, so the broadcaster's next seq is this frame's seq
+                published = PublishedFrame(self.broadcaster.latest()[0] + 1, self.instance, jpeg, payload, frame)
+                if self.last_publish is None:
+                    startup.milestone("first_frame")
+                self.latest = published
+                self.last_publish = time.monotonic()
+                self.broadcaster.publish(published)
+            self._count("encode", time.perf_counter() - t0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        stages: Dict[str, Dict[str, float]] = {}
+        with self.stats_lock:
+            for name in _STAGES:
+                entry = self.stats[name]
+                frames = entry["frames"]
+                stages[name] = {
+                    "frames": int(frames),
+                    "dropped": int(entry["dropped"]),
+                    "errors": int(entry["errors"]),
+                    "fps": frames / elapsed,
+                    "avg_ms": entry["busy_s"] * 1000.0 / frames if frames else 0.0,
+                    # Depth of the queue feeding this stage
+                    "queue_depth": self.queues[name].qsize() if name in self.queues else 0,
+                }
+        return {
+            "camera": self.camera_id,
+            "source": str(self.source),
+            "target_fps": self.target_fps,
+            "stages": stages,
+            "detect_pool_failures": self.pool_failures,
+            "tracking": self.tracker.get_stats(),
+            "motion": self.motion_gate.get_stats() if self.motion_gate is not None else None,
+            "broadcast": self.broadcaster.get_stats(),
+            "codec": codec.get_stats(),
+        }
+
+    def get_health(self) -> Dict[str, Any]:
+        age = time.monotonic() - self.last_publish if self.last_publish is not None else None
+        retry_at = self.retry_at
+        return {
+            "camera": self.camera_id,
+            "source": str(self.source),
+            "running": self.is_running(),
+            "state": self.camera_state,
+            "open_attempts": self.open_attempts,
+            "last_error": self.last_error,
+            "retry_in_s": max(retry_at - time.monotonic(), 0.0) if retry_at is not None else None,
+            "last_frame_age_s": age,
+        }
+
+
+def start_camera(
+    camera_id: str, source: Union[int, str], target_fps: Optional[float] = None, loop: bool = False
+) -> bool:
+    # Returns False if a camera with this id is already running
+    with _pipelines_lock:
+        existing = _pipelines.get(camera_id)
+        if existing is not None and existing.is_running():
+            return False
+        pipeline = _Pipeline(camera_id, parse_source(source), _TARGET_FPS if target_fps is None else target_fps, loop)
+        _pipelines[camera_id] = pipeline
+    pipeline.start()
+    return True
+
+
+def stop_camera(camera_id: str) -> bool:
+    with _pipelines_lock:
+        pipeline = _pipelines.pop(camera_id, None)
+    if pipeline is None:
+        return False
+    pipeline.stop()
+    return True
+
+
+def list_cameras() -> List[Dict[str, Any]]:
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+    return [p.get_health() for p in pipelines]
+
+
+def _get_pipeline(camera_id: Optional[str]) -> Optional[_Pipeline]:
+    with _pipelines_lock:
+        if camera_id is None:
+            # No camera given: the first one started
+            return next(iter(_pipelines.values()), None)
+        return _pipelines.get(camera_id)
+
+
+def has_camera(camera_id: str) -> bool:
+    with _pipelines_lock:
+        return camera_id in _pipelines
+
+
+def start_inference(camera_index: Union[int, str] = 0, target_fps: Optional[float] = None) -> None:
+    start_camera(DEFAULT_CAMERA, camera_index, target_fps)
 
-    cap = cv2.VideoCapture(camera_index)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
 
-    try:
-        while _stop_event and not _stop_event.is_set():
-            ok, frame = cap.read()
-            if not ok or frame is None:
-                time.sleep(0.2)
-                continue
+def stop_inference() -> None:
+    with _pipelines_lock:
+        camera_ids = list(_pipelines)
+    for camera_id in camera_ids:
+        stop_camera(camera_id)
+    _shutdown_pool()
+    codec.shutdown()
 
-            # Person detection (full frame)
-            gray_full = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            rects, _ = hog.detectMultiScale(gray_full, winStride=(8, 8))
 
-            found: List[Tuple[int, int, int, int, str, float, bool, str]] = []
+def get_latest_frame(camera_id: Optional[str] = None) -> Optional[PublishedFrame]:
+    pipeline = _get_pipeline(camera_id)
+    return pipeline.latest if pipeline is not None else None
 
-            if len(rects) > 0:
-                # Within each person bbox, try finding faces
-                for (px, py, pw, ph) in rects:
-                    roi = frame[py : py + ph, px : px + pw]
-                    gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-                    faces = face_cascade.detectMultiScale(
-                        gray_roi, scaleFactor=1.2, minNeighbors=5, minSize=(50, 50)
-                    )
 
-                    for (fx, fy, fw, fh) in faces:
-                        # Coordinates relative to full frame
-                        x, y, w, h = px + fx, py + fy, fw, fh
-                        face_crop_gray = gray_full[y : y + h, x : x + w]
+def get_latest_frame_jpeg(camera_id: Optional[str] = None) -> Optional[bytes]:
+    published = get_latest_frame(camera_id)
+    return published.jpeg if published is not None else None
 
-                        label, confidence, is_match, category = face_db.match_face(face_crop_gray)
-                        found.append((x, y, w, h, label, confidence, is_match, category))
-            else:
-                # Fallback: detect faces on the whole frame if no persons detected
-                faces = face_cascade.detectMultiScale(
-                    gray_full, scaleFactor=1.2, minNeighbors=5, minSize=(50, 50)
-                )
-                for (x, y, w, h) in faces:
-                    face_crop_gray = gray_full[y : y + h, x : x + w]
-                    label, confidence, is_match, category = face_db.match_face(face_crop_gray)
-                    found.append((x, y, w, h, label, confidence, is_match, category))
-
-            # Draw and package payload
-            payload = _annotate_and_build_payload(frame, found)
-
-            # Encode to JPEG for serving
-            ok, jpeg = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
-            if ok:
-                _latest_frame_jpeg = jpeg.tobytes()
-            _latest_detections = payload
-
-            # Run ~1 FPS
-            time.sleep(1.0)
-    finally:
-        cap.release()
-
-
-def start_inference(camera_index: int = 0) -> None:
-    global _thread, _stop_event
-    if _thread and _thread.is_alive():
-        return
-    _stop_event = threading.Event()
-    _thread = threading.Thread(target=_inference_loop, args=(camera_index,), daemon=True)
-    _thread.start()
 
+def get_latest_detections(camera_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    published = get_latest_frame(camera_id)
+    return published.detections if published is not None else None
 
-def stop_inference() -> None:
-    global _thread, _stop_event
-    if _stop_event:
-        _stop_event.set()
-    if _thread and _thread.is_alive():
-        _thread.join(timeout=2.0)
-    _thread = None
-    _stop_event = None
+
+def get_pipeline_stats(camera_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    pipeline = _get_pipeline(camera_id)
+    return pipeline.get_stats() if pipeline is not None else None
+
+
+def get_broadcaster(camera_id: Optional[str] = None) -> Optional["Broadcaster[PublishedFrame]"]:
+    pipeline = _get_pipeline(camera_id)
+    return pipeline.broadcaster if pipeline is not None else None
+
+
+def get_camera_health(camera_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    pipeline = _get_pipeline(camera_id)
+    return pipeline.get_health() if pipeline is not None else None
+
+
+def _stage_series(key: str) -> Dict[Tuple[str, ...], float]:
+    # Frame/drop counters already kept per pipeline, read at scrape time
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+    out: Dict[Tuple[str, ...], float] = {}
+    for pipeline in pipelines:
+        with pipeline.stats_lock:
+            for name in _STAGES:
+                out[(pipeline.camera_id, name)] = pipeline.stats[name][key]
+    return out
 
 
-def get_latest_frame_jpeg() -> Optional[bytes]:
-    return _latest_frame_jpeg
+def _last_frame_ages() -> Dict[Tuple[str, ...], float]:
+    now = time.monotonic()
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+    return {(p.camera_id,): now - p.last_publish for p in pipelines if p.last_publish is not None}
 
 
-def get_latest_detections() -> Optional[Dict[str, Any]]:
-    return _latest_detections
+def _pool_failures() -> Dict[Tuple[str, ...], float]:
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+    return {(p.camera_id,): p.pool_failures for p in pipelines}
 
 
+metrics.callback(
+    "veerdrishti_frames_total", "Frames processed per stage", lambda: _stage_series("frames"), "counter",
+    ("camera", "stage"),
+)
+metrics.callback(
+    "veerdrishti_frames_dropped_total", "Frames dropped before a stage", lambda: _stage_series("dropped"), "counter",
+    ("camera", "stage"),
+)
+metrics.callback(
+    "veerdrishti_stage_errors_total", "Frames a stage failed on", lambda: _stage_series("errors"), "counter",
+    ("camera", "stage"),
+)
+metrics.callback(
+    "veerdrishti_detect_pool_failures_total", "Detection calls that found the process pool broken",
+    _pool_failures, "counter", ("camera",),
+)
+metrics.callback("veerdrishti_last_frame_age_seconds", "Time since the last published frame", _last_frame_ages,
+                 labelnames=("camera",))
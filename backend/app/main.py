@@ -1,12 +1,24 @@
-from fastapi import FastAPI, UploadFile, File, Form, Response
+from fastapi import FastAPI, UploadFile, File, Form, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
 import os
-from typing import Optional
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+from . import alerts
+from . import codec
+from . import detectors
+from . import events
 from . import inference
 from . import face_db
+from . import metrics
+from . import profiler
+from . import registration
 from . import soldier_data
+from . import startup
 
 
 # Create FastAPI app with permissive CORS for local development
@@ -19,44 +31,329 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_HTTP_SECONDS = metrics.histogram(
+    "veerdrishti_http_request_seconds", "Time until response headers, by route template", ("method", "route", "status")
+)
+
+
+class _RequestMetrics:
+    # Plain ASGI wrapper rather than BaseHTTPMiddleware, which buffers streaming responses. Timed until
+    # the response starts, so MJPEG/SSE streams report their set-up time rather than their lifetime.
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            startup.milestone("first_request")
+        if scope["type"] != "http" or not metrics.enabled():
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+
+        async def timed_send(message) -> None:
+            if message["type"] == "http.response.start":
+                # Route templates (/api/faces/bulk/{job_id}) keep label cardinality bounded
+                route = getattr(scope.get("route"), "path", "unmatched")
+                _HTTP_SECONDS.labels(scope["method"], route, message["status"]).observe(time.perf_counter() - t0)
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
+
+
+app.add_middleware(_RequestMetrics)
+
 
 @app.on_event("startup")
 def on_startup() -> None:
-    # Ensure data directories exist and try to load any existing model
-    face_db.initialize()
+    # Staged: only quick local set-up runs before the server accepts requests. The gallery and model
+    # load and the detectors warm up in background threads; cameras connect (with retries) in their
+    # own capture threads. Progress is reported by /api/health.
+    startup.run("events", events.start, background=False)
+    startup.run("alerts", alerts.engine.start, background=False)
+    startup.run("soldiers", soldier_data.start_simulator, background=False)
+    startup.run("model", face_db.initialize)
+    startup.run("detectors", inference.warm_up)
 
-    # Start background camera inference thread
-    camera_index_str: str = os.getenv("CAMERA_INDEX", "0")
-    try:
-        camera_index: int = int(camera_index_str)
-    except ValueError:
-        camera_index = 0
-    inference.start_inference(camera_index=camera_index)
-
-    # Start background soldier simulator
-    soldier_data.start_simulator()
+    # Start camera pipelines: CAMERAS="front=0,gate=rtsp://...,lobby=/path/clip.mp4", else CAMERA_INDEX
+    cameras_str: str = os.getenv("CAMERAS", "").strip()
+    if cameras_str:
+        for entry in cameras_str.split(","):
+            camera_id, _, source = entry.partition("=")
+            if camera_id.strip() and source.strip():
+                inference.start_camera(camera_id.strip(), source.strip())
+    else:
+        camera_index_str: str = os.getenv("CAMERA_INDEX", "0")
+        try:
+            camera_index: int = int(camera_index_str)
+        except ValueError:
+            camera_index = 0
+        inference.start_inference(camera_index=camera_index)
+    startup.milestone("startup_done")
 
 
 @app.on_event("shutdown")
 def on_shutdown() -> None:
     inference.stop_inference()
+    profiler.stop()
     soldier_data.stop_simulator()
+    alerts.engine.stop()
+    alerts.engine.broadcaster.close()
+    events.stop()
+    registration.shutdown()
+    face_db.flush_pending_saves()
+
+
+# Upper bound for ?since= long-polls
+_LONG_POLL_MAX_S = 30.0
+
+
+async def _frame_after(
+    camera: Optional[str], since: Optional[int], timeout: float
+) -> Optional[inference.PublishedFrame]:
+    # Latest frame; with since=seq, wait up to timeout for a frame newer than seq. seq restarts at 1
+    # when the camera's pipeline restarts, so a since ahead of the latest seq is a stale cursor and
+    # gets the current frame straight away.
+    published = inference.get_latest_frame(camera)
+    if since is None or (published is not None and published.seq != since):
+        return published
+    broadcaster = inference.get_broadcaster(camera)
+    if broadcaster is None:
+        return published
+
+    async def first_newer() -> Optional[inference.PublishedFrame]:
+        subscription = broadcaster.subscribe(last_seq=since)
+        try:
+            async for _, item in subscription:
+                return item
+        finally:
+            await subscription.aclose()
+        return None
+
+    try:
+        newer = await asyncio.wait_for(first_newer(), min(max(timeout, 0.0), _LONG_POLL_MAX_S))
+    except asyncio.TimeoutError:
+        return published
+    return newer or published
+
+
+def _frame_headers(published: inference.PublishedFrame, variant: Optional[str] = None) -> Dict[str, str]:
+    return {"ETag": published.variant_etag(variant), "X-Frame-Seq": str(published.seq), "Cache-Control": "no-cache"}
+
+
+def _not_modified(request: Request, published: inference.PublishedFrame, variant: Optional[str] = None) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    etag = published.variant_etag(variant)
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _unknown_variant(variant: Optional[str]) -> Optional[Response]:
+    if variant is None or variant in inference.STREAM_VARIANTS:
+        return None
+    return JSONResponse(
+        {"error": f"Unknown variant {variant!r}; available: {sorted(inference.STREAM_VARIANTS)}"}, status_code=400
+    )
+
+
+def _unknown_camera(camera: Optional[str]) -> Optional[Response]:
+    # A camera id that is not registered is an error, not a camera without a frame yet (204)
+    if camera is None or inference.has_camera(camera):
+        return None
+    return JSONResponse({"error": f"unknown camera {camera}"}, status_code=404)
+
+
+async def _frame_bytes(published: inference.PublishedFrame, variant: Optional[str]) -> Optional[bytes]:
+    if variant is None:
+        return published.jpeg
+    # Encoded once per frame on the codec pool, off the event loop
+    return await asyncio.get_running_loop().run_in_executor(codec.executor(), published.variant, variant)
 
 
 @app.get("/api/frame.jpg", summary="Latest annotated camera frame as JPEG")
-def get_frame_jpeg() -> Response:
-    frame_bytes: Optional[bytes] = inference.get_latest_frame_jpeg()
-    if not frame_bytes:
+async def get_frame_jpeg(
+    request: Request,
+    camera: Optional[str] = None,
+    since: Optional[int] = None,
+    timeout: float = 10.0,
+    variant: Optional[str] = None,
+) -> Response:
+    error = _unknown_variant(variant) or _unknown_camera(camera)
+    if error is not None:
+        return error
+    published = await _frame_after(camera, since, timeout)
+    if published is None:
+        return Response(status_code=204)
+    if _not_modified(request, published, variant) or published.seq == since:
+        return Response(status_code=304, headers=_frame_headers(published, variant))
+    jpeg = await _frame_bytes(published, variant)
+    if jpeg is None:
         return Response(status_code=204)
-    return Response(content=frame_bytes, media_type="image/jpeg")
+    return Response(content=jpeg, media_type="image/jpeg", headers=_frame_headers(published, variant))
 
 
 @app.get("/api/detections", summary="Latest detection results")
-def get_detections() -> JSONResponse:
-    payload = inference.get_latest_detections()
-    if payload is None:
-        payload = {"frame_size": [0, 0], "detections": []}
-    return JSONResponse(payload)
+async def get_detections(
+    request: Request, camera: Optional[str] = None, since: Optional[int] = None, timeout: float = 10.0
+) -> Response:
+    error = _unknown_camera(camera)
+    if error is not None:
+        return error
+    published = await _frame_after(camera, since, timeout)
+    if published is None:
+        return JSONResponse({"frame_size": [0, 0], "detections": []})
+    if _not_modified(request, published) or published.seq == since:
+        return Response(status_code=304, headers=_frame_headers(published))
+    return Response(content=published.detections_json, media_type="application/json", headers=_frame_headers(published))
+
+
+_MJPEG_BOUNDARY = "frame"
+
+
+@app.get("/api/stream.mjpg", summary="Live annotated frames as an MJPEG stream")
+def stream_mjpeg(camera: Optional[str] = None, variant: Optional[str] = None) -> Response:
+    error = _unknown_variant(variant)
+    if error is not None:
+        return error
+    broadcaster = inference.get_broadcaster(camera)
+    if broadcaster is None:
+        return Response(status_code=404)
+
+    async def frames() -> AsyncIterator[bytes]:
+        async for _, published in broadcaster.subscribe():
+            jpeg = await _frame_bytes(published, variant)
+            if jpeg is None:
+                continue
+            yield (
+                f"--{_MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+            ).encode("ascii") + jpeg + b"\r\n"
+
+    return StreamingResponse(frames(), media_type=f"multipart/x-mixed-replace; boundary={_MJPEG_BOUNDARY}")
+
+
+@app.get("/api/detections/stream", summary="Live detection results as server-sent events")
+def stream_detections(camera: Optional[str] = None) -> Response:
+    broadcaster = inference.get_broadcaster(camera)
+    if broadcaster is None:
+        return Response(status_code=404)
+
+    async def detection_stream() -> AsyncIterator[bytes]:
+        async for _, published in broadcaster.subscribe():
+            yield b"id: " + str(published.seq).encode("ascii") + b"\ndata: " + published.detections_json + b"\n\n"
+
+    return StreamingResponse(detection_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _time_range(start: Optional[str], end: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    return (
+        events.parse_time(start) if start is not None else None,
+        events.parse_time(end) if end is not None else None,
+    )
+
+
+@app.get("/api/events", summary="Detection events by time range, person, category, camera and alert flag")
+def query_events(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    person: Optional[str] = None,
+    category: Optional[str] = None,
+    camera: Optional[str] = None,
+    alert: Optional[bool] = None,
+    limit: int = 100,
+    before_id: Optional[int] = None,
+    before_ts: Optional[float] = None,
+) -> JSONResponse:
+    # start/end: epoch seconds or ISO-8601; newest first, page with the returned next_before_id and
+    # next_before_ts
+    try:
+        t_start, t_end = _time_range(start, end)
+    except ValueError:
+        return JSONResponse({"error": "start/end must be epoch seconds or ISO-8601"}, status_code=400)
+    # Clamped as query() does, so a full page is recognized as one
+    limit = max(1, min(limit, events.QUERY_MAX_LIMIT))
+    try:
+        rows = events.query(t_start, t_end, person, category, camera, alert, limit, before_id, before_ts)
+    except LookupError:
+        return JSONResponse(
+            {"error": f"before_id {before_id} was removed by retention; pass before_ts with it"}, status_code=410
+        )
+    more = len(rows) == limit
+    return JSONResponse({
+        "events": rows,
+        "next_before_id": rows[-1]["id"] if more else None,
+        "next_before_ts": rows[-1]["ts"] if more else None,
+    })
+
+
+@app.get("/api/events/summary", summary="Who was seen in a time range: per-person counts and first/last sighting")
+def summarize_events(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    category: Optional[str] = None,
+    camera: Optional[str] = None,
+    alert: Optional[bool] = None,
+) -> JSONResponse:
+    try:
+        t_start, t_end = _time_range(start, end)
+    except ValueError:
+        return JSONResponse({"error": "start/end must be epoch seconds or ISO-8601"}, status_code=400)
+    return JSONResponse({"people": events.summarize(t_start, t_end, category, camera, alert)})
+
+
+@app.get("/api/events/stats", summary="Event log writer throughput, drops and retention")
+def event_stats() -> JSONResponse:
+    return JSONResponse(events.get_stats())
+
+
+@app.get("/api/alerts", summary="Currently open alerts")
+def active_alerts() -> JSONResponse:
+    return JSONResponse({"alerts": alerts.engine.active(), "seq": alerts.engine.seq, "stats": alerts.engine.get_stats()})
+
+
+@app.get("/api/alerts/events", summary="Alert open/update/close events after a sequence number")
+def alert_events(since: int = 0, limit: int = 1000) -> JSONResponse:
+    items, missed = alerts.engine.events_since(since, max(1, min(limit, 1000)))
+    return JSONResponse({"events": items, "missed": missed, "seq": alerts.engine.seq})
+
+
+@app.get("/api/alerts/stream", summary="Alert open/update/close events as server-sent events")
+def stream_alerts(request: Request, since: Optional[int] = None) -> Response:
+    # Resumes after Last-Event-ID on reconnect; new subscribers start with events from now on
+    last_event_id = request.headers.get("last-event-id")
+    if since is None:
+        since = int(last_event_id) if last_event_id and last_event_id.isdigit() else alerts.engine.seq
+
+    async def alert_stream() -> AsyncIterator[bytes]:
+        async for event in alerts.engine.subscribe(last_seq=since):
+            yield f"id: {event['seq']}\nevent: {event['type']}\ndata: ".encode("ascii") + json.dumps(event).encode("utf-8") + b"\n\n"
+
+    return StreamingResponse(alert_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/api/cameras", summary="List camera streams")
+def list_cameras() -> JSONResponse:
+    return JSONResponse({"cameras": inference.list_cameras()})
+
+
+@app.post("/api/cameras", summary="Start a camera stream (device index, video file or RTSP URL)")
+def start_camera(
+    id: str = Form(...),
+    source: str = Form(...),
+    target_fps: Optional[float] = Form(None),
+    loop: bool = Form(False),
+) -> JSONResponse:
+    started = inference.start_camera(id, source, target_fps=target_fps, loop=loop)
+    if not started:
+        return JSONResponse({"error": f"camera {id} is already running"}, status_code=409)
+    return JSONResponse({"id": id, "source": source, "started": True})
+
+
+@app.delete("/api/cameras/{camera_id}", summary="Stop a camera stream")
+def stop_camera(camera_id: str) -> JSONResponse:
+    if not inference.stop_camera(camera_id):
+        return JSONResponse({"error": f"unknown camera {camera_id}"}, status_code=404)
+    return JSONResponse({"id": camera_id, "stopped": True})
 
 
 @app.post("/api/register-face", summary="Register a face for a given ID")
@@ -67,25 +364,185 @@ async def register_face(
 ) -> JSONResponse:
     # Read uploaded image bytes
     content: bytes = await file.read()
-    saved_count: int = face_db.register_face_from_bytes(person_id=id, image_bytes=content, category=category)
+    # Decode, detection and the recognizer update are blocking; keep them off the event loop
+    saved_count: int = await run_in_threadpool(
+        face_db.register_face_from_bytes, person_id=id, image_bytes=content, category=category
+    )
     return JSONResponse({"id": id, "faces_saved": saved_count, "category": category})
 
 
+_UPLOAD_CHUNK = 1 << 20
+
+
+@app.post("/api/faces/bulk", summary="Bulk face registration from a zip archive or several images", status_code=202)
+async def register_faces_bulk(
+    files: List[UploadFile] = File(...),
+    category: str = Form("citizen"),
+) -> JSONResponse:
+    # Person id per image: {category}/{id}/img.jpg or {id}/img.jpg inside a zip, else the file name up to
+    # the first "_" (alice_1.jpg -> alice). Returns a job id to poll.
+    job_id, job_dir = registration.new_job_dir()
+    uploads = []
+    for n, upload in enumerate(files):
+        name = upload.filename or f"upload-{n}"
+        path = job_dir / f"upload-{n:04d}"
+        with open(path, "wb") as out:
+            while True:
+                chunk = await upload.read(_UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                await run_in_threadpool(out.write, chunk)
+        uploads.append((name, path))
+    registration.submit(job_id, job_dir, uploads, category)
+    return JSONResponse({"job_id": job_id, "status_url": f"/api/faces/bulk/{job_id}"}, status_code=202)
+
+
+@app.get("/api/faces/bulk", summary="Bulk registration jobs")
+def list_bulk_jobs() -> JSONResponse:
+    return JSONResponse({"jobs": registration.list_jobs()})
+
+
+@app.get("/api/faces/bulk/{job_id}", summary="Bulk registration job progress")
+def bulk_job_status(job_id: str) -> JSONResponse:
+    job = registration.get_job(job_id)
+    if job is None:
+        return JSONResponse({"error": f"unknown job {job_id}"}, status_code=404)
+    return JSONResponse(job)
+
+
 @app.get("/api/faces", summary="List registered face IDs")
 def list_faces() -> JSONResponse:
     ids = face_db.list_registered_ids()
     return JSONResponse({"ids": ids})
 
 
-@app.get("/api/soldiers", summary="Get simulated soldier telemetry")
-def get_soldiers() -> JSONResponse:
-    data = soldier_data.get_soldiers()
-    return JSONResponse({"soldiers": data})
+@app.post("/api/faces/retrain", summary="Rebuild the face recognizer from all stored crops")
+def retrain_faces() -> JSONResponse:
+    face_db.train_from_disk()
+    return JSONResponse({"status": "ok", "ids": len(face_db.list_registered_ids())})
+
+
+def _floats(value: Optional[str], count: int, name: str) -> Optional[Tuple[float, ...]]:
+    if value is None:
+        return None
+    try:
+        parts = tuple(float(v) for v in value.split(","))
+    except ValueError:
+        parts = ()
+    if len(parts) != count:
+        raise ValueError(f"{name} must be {count} comma separated numbers")
+    return parts
+
+
+@app.get("/api/soldiers", summary="Soldier telemetry, optionally filtered by area and status or as a delta")
+def get_soldiers(
+    since: Optional[int] = None,
+    status: Optional[str] = None,
+    bbox: Optional[str] = None,
+    near: Optional[str] = None,
+    radius_m: Optional[float] = None,
+) -> Response:
+    snap = soldier_data.snapshot()
+    if since is None and status is None and bbox is None and near is None:
+        # Serialized once per snapshot version and shared by every poller
+        return Response(content=snap.json(), media_type="application/json")
+    try:
+        center = _floats(near, 2, "near")
+        if (center is None) != (radius_m is None):
+            raise ValueError("near and radius_m go together")
+        body = soldier_data.query(
+            snap,
+            statuses=status.split(",") if status else None,
+            bbox=_floats(bbox, 4, "bbox"),
+            near=(center[0], center[1], radius_m) if center is not None and radius_m is not None else None,
+            since=since,
+        )
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+    return Response(content=body, media_type="application/json")
+
+
+def _ingest_telemetry(body: bytes) -> Dict[str, int]:
+    payload = json.loads(body)
+    units = payload.get("units") if isinstance(payload, dict) else payload
+    if not isinstance(units, list):
+        raise ValueError("expected {\"units\": [...]} or a list of units")
+    return soldier_data.ingest(units)
+
+
+@app.post("/api/soldiers/telemetry", summary="Bulk ingest of real soldier telemetry")
+async def ingest_telemetry(request: Request) -> JSONResponse:
+    body = await request.body()
+    try:
+        # Parsing and applying large batches is CPU work; keep it off the event loop
+        result = await run_in_threadpool(_ingest_telemetry, body)
+    except ValueError as exc:  # includes malformed JSON
+        return JSONResponse({"error": str(exc)}, status_code=400)
+    return JSONResponse(result)
+
+
+@app.get("/api/soldiers/stats", summary="Telemetry engine unit counts, tick and ingest stats")
+def soldier_stats() -> JSONResponse:
+    return JSONResponse(soldier_data.get_stats())
+
+
+@app.get("/api/detectors", summary="Detector load and per-call timings")
+def detector_stats() -> JSONResponse:
+    return JSONResponse({"detectors": detectors.get_stats()})
+
+
+@app.get("/api/pipeline", summary="Inference pipeline per-stage throughput and queue depth")
+def pipeline_stats(camera: Optional[str] = None) -> JSONResponse:
+    stats = inference.get_pipeline_stats(camera)
+    if stats is None:
+        return JSONResponse({"running": False})
+    return JSONResponse({"running": True, **stats})
+
+
+@app.get("/api/metrics", summary="Prometheus text-format metrics")
+def prometheus_metrics() -> Response:
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.post("/api/profiler/start", summary="Start the sampling profiler (clears previous samples)")
+def start_profiler(interval_ms: float = 10.0) -> JSONResponse:
+    if not profiler.start(interval_ms):
+        return JSONResponse({"error": "profiler already running"}, status_code=409)
+    return JSONResponse(profiler.status())
+
+
+@app.post("/api/profiler/stop", summary="Stop the sampling profiler, keeping its samples")
+def stop_profiler() -> JSONResponse:
+    if not profiler.stop():
+        return JSONResponse({"error": "profiler not running"}, status_code=409)
+    return JSONResponse(profiler.status())
+
+
+@app.get("/api/profiler", summary="Sampling profiler status and most frequent stacks")
+def profiler_status(limit: int = 20) -> JSONResponse:
+    stacks = [{"stack": stack, "samples": count} for stack, count in profiler.top(limit)]
+    return JSONResponse({**profiler.status(), "top": stacks})
+
+
+@app.get("/api/profiler/collapsed", summary="Sampled stacks in collapsed format (flamegraph.pl, speedscope)")
+def profiler_collapsed() -> Response:
+    return Response(profiler.collapsed(), media_type="text/plain; charset=utf-8")
 
 
 # Health endpoint (optional)
 @app.get("/api/health")
-def health() -> JSONResponse:
-    return JSONResponse({"status": "ok"})
+def health(camera: Optional[str] = None, ready: bool = False) -> JSONResponse:
+    # Liveness by default; ?ready=1 answers 503 until every subsystem has started (readiness probes)
+    if camera is not None:
+        camera_health = inference.get_camera_health(camera)
+        if camera_health is None:
+            return JSONResponse({"status": "unknown camera", "camera": camera}, status_code=404)
+        return JSONResponse({"status": "ok", **camera_health})
+    boot = startup.status()
+    status_code = 503 if ready and not boot["ready"] else 200
+    return JSONResponse(
+        {"status": "ok" if boot["ready"] else "starting", **boot, "cameras": inference.list_cameras()},
+        status_code=status_code,
+    )
 
 
@@ -0,0 +1,229 @@
+import bisect
+import math
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+
+# Minimal Prometheus text-format instrumentation (no client library needed). Hot paths hold a
+# pre-resolved child (family.labels(...)) and pay one bisect plus a lock per observation; counters
+# that already exist elsewhere (pipeline stats, event log, gallery) are read at scrape time through
+# callbacks instead of being counted twice.
+_enabled = os.getenv("METRICS", "1") not in ("0", "false", "no")
+
+# Seconds; covers sub-millisecond predicts up to multi-second retrains
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32)
+
+Labels = Tuple[str, ...]
+_registry: List["_Family"] = []
+_registry_lock = threading.Lock()
+
+
+def set_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = enabled
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        if not _enabled:
+            return
+        i = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class _Family:
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Labels, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def labels(self, *values: object) -> object:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values: object) -> None:
+        with self._lock:
+            self._children.pop(tuple(str(v) for v in values), None)
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Family):
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, "counter", labelnames)
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)  # type: ignore[attr-defined]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._children.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(c.value)}" for k, c in items]  # type: ignore[attr-defined]
+
+
+class Histogram(_Family):
+    def __init__(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help_text, "histogram", labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)  # type: ignore[attr-defined]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._children.items())
+        lines: List[str] = []
+        for key, child in items:
+            counts, total, count = child.snapshot()  # type: ignore[attr-defined]
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = 'le="' + ("+Inf" if math.isinf(bound) else _format_value(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Callback(_Family):
+    # Values read at scrape time: fn returns a number, or {label values: number} for labelled series
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], Union[float, Dict[Labels, float]]],
+        kind: str = "gauge",
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        super().__init__(name, help_text, kind, labelnames)
+        self._fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            values = self._fn()
+        except Exception:  # a failing collector must not break the whole scrape
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in values.items()
+            if v is not None
+        ]
+
+
+def register(family: _Family) -> _Family:
+    # Re-registering a name (e.g. a reloaded module) replaces the old family
+    with _registry_lock:
+        _registry[:] = [f for f in _registry if f.name != family.name]
+        _registry.append(family)
+    return family
+
+
+def counter(name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+    return register(Counter(name, help_text, labelnames))  # type: ignore[return-value]
+
+
+def histogram(
+    name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+) -> Histogram:
+    return register(Histogram(name, help_text, labelnames, buckets))  # type: ignore[return-value]
+
+
+def callback(
+    name: str,
+    help_text: str,
+    fn: Callable[[], Union[float, Dict[Labels, float]]],
+    kind: str = "gauge",
+    labelnames: Sequence[str] = (),
+) -> Callback:
+    return register(Callback(name, help_text, fn, kind, labelnames))  # type: ignore[return-value]
+
+
+def render() -> str:
+    with _registry_lock:
+        families = list(_registry)
+    out: List[str] = []
+    for family in families:
+        out.append(f"# HELP {family.name} {family.help}")
+        out.append(f"# TYPE {family.name} {family.kind}")
+        out.extend(family.render())
+    return "\n".join(out) + "\n"
+
+
+def find(name: str) -> Optional[_Family]:
+    with _registry_lock:
+        return next((f for f in _registry if f.name == name), None)
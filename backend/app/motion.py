@@ -0,0 +1,117 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+Box = Tuple[int, int, int, int]
+
+
+def merge_boxes(
+    boxes: List[Box],
+    pad: int = 0,
+    bounds: Optional[Tuple[int, int]] = None,
+    min_size: Tuple[int, int] = (0, 0),
+) -> List[Box]:
+    # Pad, grow to at least min_size (width, height) around the centre, clamp to bounds
+    # (width, height) and union overlapping boxes until none overlap
+    rects = []
+    for (x, y, w, h) in boxes:
+        grow_w, grow_h = max(0, min_size[0] - w - 2 * pad), max(0, min_size[1] - h - 2 * pad)
+        x0, y0 = x - pad - grow_w // 2, y - pad - grow_h // 2
+        x1, y1 = x + w + pad + (grow_w - grow_w // 2), y + h + pad + (grow_h - grow_h // 2)
+        if bounds is not None:
+            x0, y0 = max(x0, 0), max(y0, 0)
+            x1, y1 = min(x1, bounds[0]), min(y1, bounds[1])
+        if x1 > x0 and y1 > y0:
+            rects.append([x0, y0, x1, y1])
+    merged = True
+    while merged:
+        merged = False
+        out: List[List[int]] = []
+        for r in rects:
+            for o in out:
+                if r[0] < o[2] and o[0] < r[2] and r[1] < o[3] and o[1] < r[3]:
+                    o[0], o[1] = min(o[0], r[0]), min(o[1], r[1])
+                    o[2], o[3] = max(o[2], r[2]), max(o[3], r[3])
+                    merged = True
+                    break
+            else:
+                out.append(r)
+        rects = out
+    return [(x0, y0, x1 - x0, y1 - y0) for (x0, y0, x1, y1) in rects]
+
+
+class MotionGate:
+    # Frame differencing against a running-average background on a small gray frame.
+    # `threshold` is the per-pixel difference (0-255) that counts as change and `min_area`
+    # the fraction of the frame a changed blob must cover; lower values = more sensitive.
+
+    def __init__(self, threshold: int = 25, min_area: float = 0.002, width: int = 160, alpha: float = 0.05) -> None:
+        self.threshold = threshold
+        self.min_area = min_area
+        self.width = width
+        self.alpha = alpha
+        self._background: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {
+            "frames": 0,
+            "motion_frames": 0,
+            "gated_frames": 0,
+            "roi_detections": 0,
+            "scanned_fraction_total": 0.0,
+        }
+
+    def regions(self, gray_full: np.ndarray) -> List[Box]:
+        # Motion bounding boxes in full-resolution coordinates (empty when the scene is static)
+        h, w = gray_full.shape[:2]
+        scale = self.width / float(w)
+        small = cv2.resize(gray_full, (self.width, max(1, int(round(h * scale)))), interpolation=cv2.INTER_AREA)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        if self._background is None or self._background.shape != small.shape:
+            self._background = small.astype(np.float32)
+            self._count(motion=False)
+            return []
+
+        diff = cv2.absdiff(small, cv2.convertScaleAbs(self._background))
+        cv2.accumulateWeighted(small, self._background, self.alpha)
+        _, mask = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+        mask = cv2.dilate(mask, None, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        min_pixels = self.min_area * small.shape[0] * small.shape[1]
+        boxes: List[Box] = []
+        for contour in contours:
+            if cv2.contourArea(contour) < min_pixels:
+                continue
+            x, y, bw, bh = cv2.boundingRect(contour)
+            boxes.append(
+                (int(x / scale), int(y / scale), int(np.ceil(bw / scale)), int(np.ceil(bh / scale)))
+            )
+        self._count(motion=bool(boxes))
+        return boxes
+
+    def _count(self, motion: bool) -> None:
+        with self._lock:
+            self.stats["frames"] += 1
+            if motion:
+                self.stats["motion_frames"] += 1
+
+    def record_detection(self, gated: bool, scanned_fraction: float = 0.0) -> None:
+        # gated: detection was due but skipped; otherwise it ran on `scanned_fraction` of the frame
+        with self._lock:
+            if gated:
+                self.stats["gated_frames"] += 1
+            else:
+                self.stats["roi_detections"] += 1
+                self.stats["scanned_fraction_total"] += scanned_fraction
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self.stats)
+        runs = stats.pop("scanned_fraction_total")
+        stats["avg_scanned_fraction"] = runs / stats["roi_detections"] if stats["roi_detections"] else 0.0
+        stats["static_fraction"] = 1.0 - stats["motion_frames"] / stats["frames"] if stats["frames"] else 0.0
+        return stats
@@ -0,0 +1,97 @@
+import collections
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Sampling profiler for hot-path investigation in a running server: every interval it walks the
+# current stack of every thread (sys._current_frames) and counts collapsed stacks, which feed
+# straight into flamegraph.pl / speedscope. Off unless started; costs nothing while stopped.
+_MAX_DEPTH = 64
+
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+_samples: "collections.Counter[str]" = collections.Counter()
+_state: Dict[str, float] = {"interval_s": 0.0, "started_at": 0.0, "stopped_at": 0.0, "ticks": 0, "sampling_s": 0.0}
+
+
+def _collapse(frame) -> str:
+    names: List[str] = []
+    while frame is not None and len(names) < _MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _run(interval_s: float) -> None:
+    me = threading.get_ident()
+    thread_names = {}
+    while not _stop.wait(interval_s):
+        t0 = time.perf_counter()
+        frames = sys._current_frames()
+        if len(thread_names) != len(frames):
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = [
+            f"{thread_names.get(ident, ident)};{_collapse(frame)}" for ident, frame in frames.items() if ident != me
+        ]
+        with _lock:
+            _samples.update(stacks)
+            _state["ticks"] += 1
+            _state["sampling_s"] += time.perf_counter() - t0
+
+
+def start(interval_ms: float = 10.0) -> bool:
+    # Clears previous samples; returns False if already running
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return False
+        _samples.clear()
+        _state.update(interval_s=max(interval_ms, 1.0) / 1000.0, started_at=time.time(), stopped_at=0.0,
+                      ticks=0, sampling_s=0.0)
+        _stop.clear()
+        _thread = threading.Thread(target=_run, args=(_state["interval_s"],), name="sampling-profiler", daemon=True)
+        _thread.start()
+    return True
+
+
+def stop() -> bool:
+    global _thread
+    with _lock:
+        thread, _thread = _thread, None
+    if thread is None:
+        return False
+    _stop.set()
+    thread.join(timeout=2.0)
+    with _lock:
+        _state["stopped_at"] = time.time()
+    return True
+
+
+def running() -> bool:
+    return _thread is not None
+
+
+def status() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_state)
+        out["running"] = _thread is not None
+        out["stacks"] = len(_samples)
+        # Share of wall time spent walking stacks, i.e. the profiler's own overhead
+        elapsed = (_state["stopped_at"] or time.time()) - _state["started_at"] if _state["started_at"] else 0.0
+        out["overhead"] = _state["sampling_s"] / elapsed if elapsed > 0 else 0.0
+        return out
+
+
+def top(limit: int = 0) -> List[Tuple[str, int]]:
+    # (collapsed stack, samples), most frequent first; 0 = all
+    with _lock:
+        return _samples.most_common(limit or None)
+
+
+def collapsed() -> str:
+    # "thread;outer;...;inner count" lines, the input format of flamegraph.pl and speedscope
+    return "".join(f"{stack} {count}\n" for stack, count in top())
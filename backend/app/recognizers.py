@@ -0,0 +1,295 @@
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+# Recognizer backends share the LBPH calling convention used by face_db: train/update with prepared
+# 100x100 crops and integer label ids, predict returning (label id, confidence) where lower is better,
+# write/read for persistence if the backend has a model_filename, and `samples`, the number of gallery
+# samples the model holds (checked against the gallery on load). Embedding backends report
+# 100 x cosine distance as the confidence so thresholds and the tracker's confidence decay stay on the
+# same scale as LBPH.
+
+_BACKEND = os.getenv("RECOGNIZER_BACKEND", "lbph").strip().lower()
+# ONNX (or any OpenCV-DNN loadable) face embedder, e.g. SFace; without it the LBP-histogram embedder is used
+_EMBEDDING_MODEL = os.getenv("FACE_EMBEDDING_MODEL", "")
+_EMBEDDING_INPUT = int(os.getenv("FACE_EMBEDDING_INPUT", "112"))
+# Coarse cluster index: built once a gallery has this many samples (0 = always exact search)
+_IVF_MIN_ROWS = int(os.getenv("EMBEDDING_IVF_MIN", "50000"))
+_IVF_NPROBE = int(os.getenv("EMBEDDING_NPROBE", "8"))
+
+# Calibrated on the bundled faces: lbp-hist at 15 accepts about the same share of right and wrong
+# leave-one-out matches as LBPH at 85; dnn is SFace's published cosine threshold (0.363)
+_DEFAULT_THRESHOLDS = {"lbph": 85.0, "lbp-hist": 15.0, "dnn": 63.7}
+
+
+class LBPHRecognizer:
+    name = "lbph"
+    # Not persisted: OpenCV can only save the histograms as YAML (~128 KB of text per sample), which
+    # parses about 3x slower than the histograms are rebuilt from the gallery's 10 KB uint8 crops
+    model_filename: Optional[str] = None
+
+    def __init__(self) -> None:
+        # Requires opencv-contrib-python
+        self._model = cv2.face.LBPHFaceRecognizer_create()
+        self.samples = 0
+
+    def train(self, faces: Sequence[np.ndarray], labels: np.ndarray) -> None:
+        self._model.train(list(faces), labels)
+        self.samples = len(labels)
+
+    def update(self, faces: Sequence[np.ndarray], labels: np.ndarray) -> None:
+        self._model.update(list(faces), labels)
+        self.samples += len(labels)
+
+    def predict(self, faces: Sequence[np.ndarray]) -> List[Tuple[int, float]]:
+        out: List[Tuple[int, float]] = []
+        for face in faces:
+            try:
+                label_id, confidence = self._model.predict(face)
+            except cv2.error:
+                label_id, confidence = -1, float("inf")
+            out.append((int(label_id), float(confidence)))
+        return out
+
+
+def _uniform_lbp_table() -> np.ndarray:
+    # 58 uniform patterns (at most two 0/1 transitions) get their own bin, everything else bin 58
+    table = np.full(256, 58, dtype=np.intp)
+    next_bin = 0
+    for code in range(256):
+        bits = [(code >> i) & 1 for i in range(8)]
+        if sum(bits[i] != bits[(i + 1) % 8] for i in range(8)) <= 2:
+            table[code] = next_bin
+            next_bin += 1
+    return table
+
+
+class LBPHistogramEmbedder:
+    # Uniform LBP histograms over a 7x7 grid, square-rooted and L2-normalized: the dot product of two
+    # vectors is then the Hellinger similarity of the histograms, close to what LBPH compares
+    name = "lbp-hist"
+    _GRID = 7
+    _BINS = 59
+
+    def __init__(self) -> None:
+        self._table = _uniform_lbp_table()
+        self._cells: Optional[np.ndarray] = None
+        self.dim = self._GRID * self._GRID * self._BINS
+
+    def _cell_map(self, shape: Tuple[int, int]) -> np.ndarray:
+        if self._cells is None or self._cells.shape != shape:
+            rows = np.minimum(np.arange(shape[0]) * self._GRID // shape[0], self._GRID - 1)
+            cols = np.minimum(np.arange(shape[1]) * self._GRID // shape[1], self._GRID - 1)
+            self._cells = (rows[:, None] * self._GRID + cols[None, :]) * self._BINS
+        return self._cells
+
+    def embed(self, faces: np.ndarray) -> np.ndarray:
+        faces = np.asarray(faces, dtype=np.uint8)
+        n, h, w = faces.shape
+        center = faces[:, 1:-1, 1:-1]
+        codes = np.zeros(center.shape, dtype=np.uint8)
+        for bit, (dy, dx) in enumerate(((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))):
+            codes |= (faces[:, 1 + dy : h - 1 + dy, 1 + dx : w - 1 + dx] >= center).astype(np.uint8) << bit
+        # One bincount for the whole batch: bin = sample * dim + cell * 59 + uniform code
+        bins = self._table[codes] + self._cell_map(codes.shape[1:])
+        bins += (np.arange(n) * self.dim)[:, None, None]
+        hist = np.bincount(bins.ravel(), minlength=n * self.dim).reshape(n, self.dim).astype(np.float32)
+        np.sqrt(hist, out=hist)
+        hist /= np.maximum(np.linalg.norm(hist, axis=1, keepdims=True), 1e-12)
+        return hist
+
+
+class DnnEmbedder:
+    # Face embedding network run with OpenCV DNN on the CPU (e.g. SFace ONNX, 112x112 BGR input)
+    def __init__(self, model_path: str, input_size: int = _EMBEDDING_INPUT) -> None:
+        self._net = cv2.dnn.readNet(model_path)
+        self._size = (input_size, input_size)
+        # One forward pass at a time; matchers from several cameras share the network
+        self._lock = threading.Lock()
+        self.name = f"dnn:{Path(model_path).name}"
+        self.dim = int(self.embed(np.zeros((1, 100, 100), dtype=np.uint8)).shape[1])
+
+    def embed(self, faces: np.ndarray) -> np.ndarray:
+        images = [cv2.cvtColor(np.ascontiguousarray(face), cv2.COLOR_GRAY2BGR) for face in faces]
+        blob = cv2.dnn.blobFromImages(images, 1.0, self._size, (0, 0, 0), swapRB=True)
+        with self._lock:
+            self._net.setInput(blob)
+            out = self._net.forward()
+        out = np.asarray(out, dtype=np.float32).reshape(len(images), -1)
+        out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out
+
+
+class EmbeddingIndex:
+    # L2-normalized float32 rows in one contiguous, geometrically grown matrix; k-NN by matmul.
+    # With a coarse cluster index (k-means centroids, rows [0, indexed) sorted by cluster so each
+    # inverted list is a contiguous slice) only the nprobe nearest clusters are scanned; rows appended
+    # since the last build form an unindexed tail that is always scanned exactly.
+
+    def __init__(self, dim: int, ivf_min_rows: int = _IVF_MIN_ROWS, nprobe: int = _IVF_NPROBE) -> None:
+        self.dim = dim
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = max(1, nprobe)
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._labels = np.zeros(0, dtype=np.int32)
+        self._size = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._indexed = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def reset(self, vectors: np.ndarray, labels: np.ndarray) -> None:
+        self._matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._labels = np.ascontiguousarray(labels, dtype=np.int32)
+        self._size = len(self._labels)
+        self._centroids, self._offsets, self._indexed = None, None, 0
+        self._maybe_build()
+
+    def add(self, vectors: np.ndarray, labels: np.ndarray) -> None:
+        n = len(labels)
+        if self._size + n > len(self._matrix):
+            capacity = max(self._size + n, 2 * len(self._matrix), 64)
+            grown = np.empty((capacity, self.dim), dtype=np.float32)
+            grown[: self._size] = self._matrix[: self._size]
+            grown_labels = np.empty(capacity, dtype=np.int32)
+            grown_labels[: self._size] = self._labels[: self._size]
+            self._matrix, self._labels = grown, grown_labels
+        self._matrix[self._size : self._size + n] = vectors
+        self._labels[self._size : self._size + n] = labels
+        self._size += n
+        self._maybe_build()
+
+    def vectors(self) -> np.ndarray:
+        return self._matrix[: self._size]
+
+    def labels(self) -> np.ndarray:
+        return self._labels[: self._size]
+
+    def _maybe_build(self) -> None:
+        if self.ivf_min_rows <= 0 or self._size < self.ivf_min_rows:
+            return
+        # Rebuild once the exact-search tail outgrows 10% of the clustered rows
+        if self._centroids is not None and self._size - self._indexed <= max(1000, self._indexed // 10):
+            return
+        self.build_clusters()
+
+    def build_clusters(self, nlist: Optional[int] = None) -> None:
+        data, labels = self.vectors(), self.labels()
+        # ~sqrt(N) lists; k-means on a bounded sample keeps a rebuild to seconds at 100k+ rows
+        nlist = nlist or int(min(4096, max(16, np.sqrt(self._size))))
+        rng = np.random.default_rng(0)
+        sample = data[rng.choice(self._size, size=min(self._size, 32 * nlist, 50_000), replace=False)]
+        criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_MAX_ITER, 10, 1e-3)
+        _, _, centroids = cv2.kmeans(sample, nlist, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        assign = np.empty(self._size, dtype=np.int32)
+        for start in range(0, self._size, 65536):
+            assign[start : start + 65536] = np.argmax(data[start : start + 65536] @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        self._matrix = np.ascontiguousarray(data[order])
+        self._labels = np.ascontiguousarray(labels[order])
+        self._offsets = np.searchsorted(assign[order], np.arange(nlist + 1))
+        self._centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._indexed = self._size
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        # Returns (labels, distances) of shape (len(queries), k); distance = 1 - cosine, -1/inf pads
+        m = len(queries)
+        out_labels = np.full((m, k), -1, dtype=np.int32)
+        out_dist = np.full((m, k), np.inf, dtype=np.float32)
+        if self._size == 0 or m == 0:
+            return out_labels, out_dist
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if self._centroids is None:
+            self._top_k(queries @ self.vectors().T, np.arange(self._size), k, out_labels, out_dist)
+            return out_labels, out_dist
+        assert self._offsets is not None
+        probe = np.argsort(-(queries @ self._centroids.T), axis=1)[:, : self.nprobe]
+        tail = np.arange(self._indexed, self._size)
+        for i in range(m):
+            rows = np.concatenate([np.arange(self._offsets[c], self._offsets[c + 1]) for c in probe[i]] + [tail])
+            scores = self._matrix[rows] @ queries[i]
+            self._top_k(scores[None, :], rows, k, out_labels[i : i + 1], out_dist[i : i + 1])
+        return out_labels, out_dist
+
+    def _top_k(self, scores: np.ndarray, rows: np.ndarray, k: int, out_labels: np.ndarray, out_dist: np.ndarray) -> None:
+        kk = min(k, scores.shape[1])
+        if kk == 0:
+            return
+        part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        part_scores = np.take_along_axis(scores, part, axis=1)
+        order = np.argsort(-part_scores, axis=1)
+        best = np.take_along_axis(part, order, axis=1)
+        out_labels[:, :kk] = self._labels[rows[best]]
+        out_dist[:, :kk] = 1.0 - np.take_along_axis(part_scores, order, axis=1)
+
+
+class EmbeddingRecognizer:
+    model_filename = "embedding_model.npz"
+
+    def __init__(self, embedder=None) -> None:
+        if embedder is None:
+            embedder = DnnEmbedder(_EMBEDDING_MODEL) if _EMBEDDING_MODEL and Path(_EMBEDDING_MODEL).exists() \
+                else LBPHistogramEmbedder()
+        self.embedder = embedder
+        self.name = embedder.name
+        self.index = EmbeddingIndex(embedder.dim)
+
+    @property
+    def samples(self) -> int:
+        # One stored vector per gallery sample
+        return len(self.index)
+
+    def _embed(self, faces: Sequence[np.ndarray]) -> np.ndarray:
+        out = np.empty((len(faces), self.embedder.dim), dtype=np.float32)
+        # Chunked so a full gallery rebuild does not materialize every LBP code image at once
+        for start in range(0, len(faces), 256):
+            out[start : start + 256] = self.embedder.embed(np.asarray(faces[start : start + 256]))
+        return out
+
+    def train(self, faces: Sequence[np.ndarray], labels: np.ndarray) -> None:
+        self.index.reset(self._embed(faces), labels)
+
+    def update(self, faces: Sequence[np.ndarray], labels: np.ndarray) -> None:
+        self.index.add(self._embed(faces), labels)
+
+    def predict(self, faces: Sequence[np.ndarray]) -> List[Tuple[int, float]]:
+        labels, dist = self.index.search(self._embed(faces), k=1)
+        return [(int(label), float(d) * 100.0) for label, d in zip(labels[:, 0], dist[:, 0])]
+
+    def write(self, path: Path) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, vectors=self.index.vectors(), labels=self.index.labels(), embedder=np.array(self.name))
+
+    def read(self, path: Path) -> None:
+        with np.load(path) as data:
+            if str(data["embedder"]) != self.name:
+                # Stored vectors come from a different embedder; the caller retrains from the gallery
+                raise ValueError(f"{path} holds {data['embedder']} embeddings, not {self.name}")
+            self.index.reset(data["vectors"], data["labels"])
+
+
+Recognizer = Union[LBPHRecognizer, EmbeddingRecognizer]
+
+
+def create(backend: str = _BACKEND) -> Recognizer:
+    if backend == "embedding":
+        return EmbeddingRecognizer()
+    return LBPHRecognizer()
+
+
+def model_filename(backend: str = _BACKEND) -> Optional[str]:
+    return EmbeddingRecognizer.model_filename if backend == "embedding" else LBPHRecognizer.model_filename
+
+
+def default_threshold(backend: str = _BACKEND) -> float:
+    if backend != "embedding":
+        return _DEFAULT_THRESHOLDS["lbph"]
+    return _DEFAULT_THRESHOLDS["dnn" if _EMBEDDING_MODEL and Path(_EMBEDDING_MODEL).exists() else "lbp-hist"]
@@ -0,0 +1,295 @@
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import face_db
+
+
+# Bulk registration: uploads are streamed to {data}/uploads/{job id}/, then a job thread fans the
+# images out to a process pool (decode, detect, prepare crops) and enrolls the whole batch with a
+# single recognizer update. One job runs at a time; later jobs wait in a FIFO queue.
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+_DATA_DIR = Path(os.getenv("VEERDRISHTI_DATA_DIR", str(_BACKEND_DIR / "data")))
+_UPLOADS_DIR = _DATA_DIR / "uploads"
+_WORKERS = int(os.getenv("REGISTER_WORKERS", str(os.cpu_count() or 1)))
+# Images per pool task: enough to amortize pickling the crops back, small enough for steady progress
+_FILES_PER_TASK = 16
+# Finished jobs kept for polling
+_MAX_JOBS = 100
+# Failed files listed per job (the count is always complete)
+_MAX_ERRORS = 50
+# Zip archives: members over REGISTER_MAX_IMAGE_MB uncompressed are skipped, archives whose images
+# add up to more than REGISTER_MAX_ARCHIVE_MB are rejected whole; checked before anything is extracted
+_MAX_IMAGE_BYTES = int(float(os.getenv("REGISTER_MAX_IMAGE_MB", "50")) * 1e6)
+_MAX_ARCHIVE_BYTES = int(float(os.getenv("REGISTER_MAX_ARCHIVE_MB", "4096")) * 1e6)
+
+_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+_CATEGORIES = {"citizen", "official", "criminal"}
+
+_jobs: "OrderedDict[str, _Job]" = OrderedDict()
+_jobs_lock = threading.Lock()
+_queue: "queue.Queue[_Job]" = queue.Queue()
+_runner: Optional[threading.Thread] = None
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class _Job:
+    def __init__(self, job_id: str, job_dir: Path, uploads: List[Tuple[str, Path]], category: str) -> None:
+        self.job_id = job_id
+        self.job_dir = job_dir
+        self.uploads = uploads
+        self.category = category
+        self.status = "queued"
+        self.total = 0
+        self.processed = 0
+        self.faces = 0
+        self.people: Dict[str, int] = {}
+        self.failed = 0
+        self.errors: List[Dict[str, str]] = []
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.message: Optional[str] = None
+
+    def fail_file(self, name: str, reason: str) -> None:
+        self.failed += 1
+        if len(self.errors) < _MAX_ERRORS:
+            self.errors.append({"file": name, "reason": reason})
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "images_total": self.total,
+            "images_processed": self.processed,
+            "progress": round(self.processed / self.total, 4) if self.total else 0.0,
+            "faces_enrolled": self.faces if self.status == "done" else 0,
+            "faces_found": self.faces,
+            "people": len(self.people),
+            "failed_images": self.failed,
+            "errors": list(self.errors),
+            "images_per_second": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "message": self.message,
+        }
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the server process runs camera threads, which fork would copy mid-flight
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, _WORKERS), mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _reset_broken_pool(broken: ProcessPoolExecutor) -> None:
+    # A crashed worker breaks the whole pool; the next _get_pool() starts a fresh one
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def new_job_dir() -> Tuple[str, Path]:
+    job_id = uuid.uuid4().hex[:12]
+    job_dir = _UPLOADS_DIR / job_id
+    job_dir.mkdir(parents=True, exist_ok=True)
+    return job_id, job_dir
+
+
+def submit(job_id: str, job_dir: Path, uploads: List[Tuple[str, Path]], category: str = "citizen") -> str:
+    # uploads: (original filename, saved path); zip archives are expanded by the job
+    global _runner
+    job = _Job(job_id, job_dir, uploads, face_db.normalize_category(category))
+    with _jobs_lock:
+        _jobs[job_id] = job
+        while len(_jobs) > _MAX_JOBS:
+            oldest_id = next(iter(_jobs))
+            if _jobs[oldest_id].status in ("queued", "running"):
+                break
+            del _jobs[oldest_id]
+        if _runner is None or not _runner.is_alive():
+            _runner = threading.Thread(target=_run_jobs, name="bulk-register", daemon=True)
+            _runner.start()
+    _queue.put(job)
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+
+
+def list_jobs() -> List[Dict[str, Any]]:
+    with _jobs_lock:
+        return [job.to_dict() for job in _jobs.values()]
+
+
+def _identify(name: str, default_category: str) -> Tuple[str, str]:
+    # {category}/{person}/img.jpg, {person}/img.jpg, or {person}_{n}.jpg / {person}.jpg
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    if len(parts) >= 3 and parts[-3].lower() in _CATEGORIES:
+        return parts[-2], parts[-3].lower()
+    if len(parts) >= 2:
+        return parts[-2], default_category
+    stem = PurePosixPath(name).stem
+    return stem.split("_")[0] or stem, default_category
+
+
+def _is_image_member(info: zipfile.ZipInfo) -> bool:
+    member = PurePosixPath(info.filename)
+    if info.is_dir() or member.suffix.lower() not in _IMAGE_EXTENSIONS:
+        return False
+    return not any(part.startswith(".") or part == "__MACOSX" for part in member.parts)
+
+
+def _expand(job: _Job) -> List[Tuple[str, str, str, Path]]:
+    # Returns (display name, person, category, path) per image; archive members are streamed to disk
+    images: List[Tuple[str, str, str, Path]] = []
+    for n, (filename, path) in enumerate(job.uploads):
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                members = [(m, info) for m, info in enumerate(archive.infolist()) if _is_image_member(info)]
+                # Declared sizes: reads of a member stop at its file_size, so these bound what is written
+                if sum(info.file_size for _, info in members) > _MAX_ARCHIVE_BYTES:
+                    job.fail_file(filename, f"archive expands to more than {_MAX_ARCHIVE_BYTES / 1e6:g} MB")
+                    members = []
+                for m, info in members:
+                    member = PurePosixPath(info.filename)
+                    if info.file_size > _MAX_IMAGE_BYTES:
+                        job.fail_file(f"{filename}:{info.filename}", f"larger than {_MAX_IMAGE_BYTES / 1e6:g} MB")
+                        continue
+                    # Member names are never used as paths, so archives cannot write outside the job dir
+                    target = job.job_dir / f"{n:04d}-{m:06d}{member.suffix.lower()}"
+                    with archive.open(info) as src, open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                    person, category = _identify(info.filename, job.category)
+                    images.append((f"{filename}:{info.filename}", person, category, target))
+            path.unlink()
+        elif PurePosixPath(filename).suffix.lower() in _IMAGE_EXTENSIONS:
+            person, category = _identify(filename, job.category)
+            images.append((filename, person, category, path))
+        else:
+            job.fail_file(filename, "not an image or zip archive")
+    return images
+
+
+def _prepare_files(paths: Sequence[str]) -> List[Optional[np.ndarray]]:
+    # Runs in a worker process: crops per file, None if the file does not decode
+    out: List[Optional[np.ndarray]] = []
+    for path in paths:
+        with open(path, "rb") as f:
+            out.append(face_db.prepare_faces_from_bytes(f.read()))
+    return out
+
+
+def _run_jobs() -> None:
+    while True:
+        job = _queue.get()
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            _run(job)
+            job.status = "done"
+        except Exception as exc:  # reported through the job status
+            job.status = "failed"
+            job.message = f"{type(exc).__name__}: {exc}"
+        finally:
+            job.finished_at = time.time()
+            shutil.rmtree(job.job_dir, ignore_errors=True)
+
+
+def _collect(
+    job: _Job,
+    chunk: Sequence[Tuple[str, str, str, Path]],
+    results: Sequence[Optional[np.ndarray]],
+    crops_by_person: "OrderedDict[Tuple[str, str], List[np.ndarray]]",
+) -> None:
+    for (name, person, category, _), crops in zip(chunk, results):
+        job.processed += 1
+        if crops is None:
+            job.fail_file(name, "could not decode image")
+        elif len(crops) == 0:
+            job.fail_file(name, "no face found")
+        else:
+            crops_by_person.setdefault((person, category), []).extend(crops)
+            job.faces += len(crops)
+            job.people[person] = job.people.get(person, 0) + len(crops)
+
+
+def _run(job: _Job) -> None:
+    images = _expand(job)
+    job.total = len(images)
+    crops_by_person: "OrderedDict[Tuple[str, str], List[np.ndarray]]" = OrderedDict()
+    chunks = deque(images[start : start + _FILES_PER_TASK] for start in range(0, len(images), _FILES_PER_TASK))
+    # A worker crash (e.g. OOM on one image) breaks the pool and every chunk in flight with it. Those
+    # chunks are then run one at a time on a fresh pool, so only the chunk that crashes again fails.
+    suspects: "deque[List[Tuple[str, str, str, Path]]]" = deque()
+    pending: "Dict[Future, List[Tuple[str, str, str, Path]]]" = {}
+    window = 2 * max(1, _WORKERS)
+    while chunks or suspects:
+        pool = _get_pool()
+        if suspects:
+            chunk = suspects.popleft()
+            try:
+                results = pool.submit(_prepare_files, [str(path) for _, _, _, path in chunk]).result()
+            except BrokenProcessPool:
+                _reset_broken_pool(pool)
+                for name, _, _, _ in chunk:
+                    job.processed += 1
+                    job.fail_file(name, "worker process crashed")
+                continue
+            _collect(job, chunk, results, crops_by_person)
+            continue
+        # Bounded in flight, so a crash puts only these chunks under suspicion
+        while chunks and len(pending) < window:
+            chunk = chunks.popleft()
+            pending[pool.submit(_prepare_files, [str(path) for _, _, _, path in chunk])] = chunk
+        while pending and not suspects:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk = pending.pop(future)
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    suspects.append(chunk)
+                    continue
+                _collect(job, chunk, results, crops_by_person)
+            if suspects:
+                _reset_broken_pool(pool)
+                suspects.extend(pending.values())
+                pending.clear()
+            elif chunks:
+                break
+    # One gallery write and one recognizer update for the whole batch
+    face_db.enroll_many([(person, crops, category) for (person, category), crops in crops_by_person.items()])
@@ -1,46 +1,408 @@
-import random
+import json
+import math
+import os
 import threading
 import time
-from typing import List, Dict, Optional
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import metrics
+
+try:
+    # Optional: several times faster than json for large rosters
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+# Telemetry is kept as NumPy columns (struct of arrays), one row per unit. Writers (simulator tick,
+# bulk ingest) build new column arrays and publish them as an immutable Snapshot; readers take the
+# current snapshot reference and never see a half-applied update.
+_SIM_UNITS = int(os.getenv("SOLDIER_UNITS", "4"))
+_TICK_S = float(os.getenv("SOLDIER_TICK_S", "3"))
+INGEST_MAX = int(os.getenv("SOLDIER_INGEST_MAX", "100000"))
+# Recent snapshots kept so filtered delta queries can tell which units left the filter
+_HISTORY = int(os.getenv("SOLDIER_HISTORY", "16"))
+
+STATUSES = ("ok", "warn", "critical")
+_STATUS_CODES = {name: code for code, name in enumerate(STATUSES)}
+ACTIVITIES = ("resting", "patrolling", "moving", "down")
+_DOWN = 3
+
+# Activity model, per activity: speed (m/s), resting heart rate target, transition rates (per second)
+# to each activity. "down" (casualty) is rare and ends slowly.
+_SPEED = np.array([0.0, 1.3, 3.5, 0.0])
+_HR_TARGET = np.array([66.0, 95.0, 145.0, 45.0])
+_TRANSITION_RATE = np.array(
+    [
+        [0.0, 1 / 120, 1 / 600, 1 / 36000],
+        [1 / 300, 0.0, 1 / 180, 1 / 36000],
+        [1 / 400, 1 / 60, 0.0, 1 / 18000],
+        [1 / 300, 0.0, 0.0, 0.0],
+    ]
+)
+# Heart rate relaxes towards the activity target with this time constant (seconds)
+_HR_TAU_S = 30.0
+_HR_RANGE = (35.0, 200.0)
+_METERS_PER_DEG = 111_320.0
+_EARTH_RADIUS_M = 6_371_000.0
+# Spatial grid cell size in degrees (0.01 ~ 1.1 km of latitude)
+_GRID_DEG = float(os.getenv("SOLDIER_GRID_DEG", "0.01"))
+# Cell key = row * _KEY_STRIDE + (column + _KEY_OFFSET); fits any cell size down to ~1e-5 degrees
+_KEY_OFFSET = 1 << 25
+_KEY_STRIDE = 1 << 26
+_ORIGIN = (28.6129, 77.2295)
+_NAMES = ("Alpha", "Bravo", "Charlie", "Delta")
+
+
+class Snapshot:
+    # Immutable view of every unit at one version; the JSON body is built once and shared by readers
+    __slots__ = (
+        "version", "ids", "names", "lat", "lon", "heart_rate", "status", "activity", "simulated", "updated_at",
+        "changed", "_json", "_grid", "_lock",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        ids: Tuple[str, ...],
+        names: Tuple[str, ...],
+        lat: np.ndarray,
+        lon: np.ndarray,
+        heart_rate: np.ndarray,
+        status: np.ndarray,
+        activity: np.ndarray,
+        simulated: np.ndarray,
+        updated_at: np.ndarray,
+        changed: np.ndarray,
+    ) -> None:
+        self.version = version
+        self.ids = ids
+        self.names = names
+        self.lat = lat
+        self.lon = lon
+        self.heart_rate = heart_rate
+        self.status = status
+        self.activity = activity
+        self.simulated = simulated
+        self.updated_at = updated_at
+        # Version at which each row's published values last changed (delta queries)
+        self.changed = changed
+        for column in (lat, lon, heart_rate, status, activity, simulated, updated_at, changed):
+            column.flags.writeable = False
+        self._json: Optional[bytes] = None
+        self._grid: Optional[_Grid] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def records(self, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        # rows: indices to include (default all); columns go through tolist() once, not per element
+        if rows is None:
+            ids, names, cols = self.ids, self.names, (self.lat, self.lon, self.heart_rate, self.status,
+                                                      self.activity, self.updated_at)
+        else:
+            ids = [self.ids[i] for i in rows.tolist()]
+            names = [self.names[i] for i in rows.tolist()]
+            cols = (self.lat[rows], self.lon[rows], self.heart_rate[rows], self.status[rows], self.activity[rows],
+                    self.updated_at[rows])
+        lat, lon, hr, status, activity, updated = cols
+        return [
+            {
+                "id": i,
+                "name": n,
+                "status": STATUSES[s],
+                "heart_rate": h,
+                "gps": [a, o],
+                "activity": ACTIVITIES[c],
+                "updated_at": t,
+            }
+            for i, n, a, o, h, s, c, t in zip(
+                ids,
+                names,
+                np.round(lat, 6).tolist(),
+                np.round(lon, 6).tolist(),
+                np.rint(hr).astype(np.int32).tolist(),
+                status.tolist(),
+                activity.tolist(),
+                np.round(updated, 3).tolist(),
+            )
+        ]
+
+    def json(self) -> bytes:
+        with self._lock:
+            if self._json is None:
+                self._json = _dumps({"version": self.version, "soldiers": self.records()})
+            return self._json
+
+    def grid(self) -> "_Grid":
+        # Built on the first spatial query against this version
+        with self._lock:
+            if self._grid is None:
+                self._grid = _Grid(self.lat, self.lon, _GRID_DEG)
+            return self._grid
+
+
+class _Grid:
+    # Rows bucketed by lat/lon cell, stored CSR-style: occupied cell keys (sorted), where each cell's
+    # rows start in `order`, and row indices sorted by cell
+    __slots__ = ("cell", "keys", "starts", "order")
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, cell: float) -> None:
+        self.cell = cell
+        key = self._keys(np.floor(lat / cell), np.floor(lon / cell))
+        self.order = np.argsort(key, kind="stable")
+        self.keys, starts = np.unique(key[self.order], return_index=True)
+        self.starts = np.append(starts, len(key))
+
+    @staticmethod
+    def _keys(row: np.ndarray, col: np.ndarray) -> np.ndarray:
+        return row.astype(np.int64) * _KEY_STRIDE + (col.astype(np.int64) + _KEY_OFFSET)
+
+    def candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        # Rows in every cell the box touches (a superset of the rows inside it)
+        r0, r1 = math.floor(min_lat / self.cell), math.floor(max_lat / self.cell)
+        c0, c1 = math.floor(min_lon / self.cell), math.floor(max_lon / self.cell)
+        if (r1 - r0 + 1) * (c1 - c0 + 1) > len(self.keys):
+            # Box spans more cells than are occupied: filter the occupied cells instead
+            rows, cols = self.keys // _KEY_STRIDE, self.keys % _KEY_STRIDE - _KEY_OFFSET
+            cells = np.flatnonzero((rows >= r0) & (rows <= r1) & (cols >= c0) & (cols <= c1))
+        else:
+            want = self._keys(np.arange(r0, r1 + 1)[:, None], np.arange(c0, c1 + 1)[None, :]).ravel()
+            pos = np.searchsorted(self.keys, want)
+            hit = pos < len(self.keys)
+            hit[hit] = self.keys[pos[hit]] == want[hit]
+            cells = pos[hit]
+        starts, ends = self.starts[cells], self.starts[cells + 1]
+        lengths = ends - starts
+        # Concatenate order[start:end] for every cell without a Python loop
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.order[offsets + np.arange(int(lengths.sum()))]
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _empty() -> Snapshot:
+    return Snapshot(
+        0, (), (), np.zeros(0), np.zeros(0), np.zeros(0, np.float32), np.zeros(0, np.uint8),
+        np.zeros(0, np.uint8), np.zeros(0, bool), np.zeros(0), np.zeros(0, np.int64),
+    )
 
 
 _thread: Optional[threading.Thread] = None
 _stop_event: Optional[threading.Event] = None
-_soldiers: List[Dict] = []
+_snapshot: Snapshot = _empty()
+_history: "Deque[Snapshot]" = deque(maxlen=max(_HISTORY, 1))
+# Serializes writers; readers only take the _snapshot reference
+_write_lock = threading.Lock()
+_rng = np.random.default_rng()
+# Heading (radians) of simulated units; writer-private, so not part of the snapshot
+_heading = np.zeros(0)
+_stats: Dict[str, float] = {"ticks": 0, "last_tick_ms": 0.0, "ingested": 0, "ingest_batches": 0}
 
 
-def _init_soldiers() -> None:
-    global _soldiers
-    # Simple initial positions and vitals
-    _soldiers = [
-        {"id": "S1", "name": "Alpha", "status": "ok", "heart_rate": 72, "gps": [28.6129, 77.2295]},
-        {"id": "S2", "name": "Bravo", "status": "ok", "heart_rate": 75, "gps": [28.6130, 77.2296]},
-        {"id": "S3", "name": "Charlie", "status": "ok", "heart_rate": 70, "gps": [28.6131, 77.2297]},
-        {"id": "S4", "name": "Delta", "status": "ok", "heart_rate": 73, "gps": [28.6132, 77.2298]},
-    ]
+def _publish(snap: Snapshot) -> None:
+    # Called with _write_lock held
+    global _snapshot
+    _snapshot = snap
+    _history.append(snap)
+
+
+def _at(version: int) -> Optional[Snapshot]:
+    for snap in list(_history):
+        if snap.version == version:
+            return snap
+    return None
+
+
+def _status_from_vitals(heart_rate: np.ndarray, activity: np.ndarray) -> np.ndarray:
+    status = np.zeros(len(heart_rate), np.uint8)
+    status[(heart_rate >= 160) | (heart_rate <= 50)] = 1
+    status[(heart_rate >= 180) | (heart_rate <= 40) | (activity == _DOWN)] = 2
+    return status
+
+
+def _init_soldiers(units: int = _SIM_UNITS) -> None:
+    # The first four keep the original call signs and spacing; more units are scattered over a few km
+    global _heading
+    n = max(units, 0)
+    ids = tuple(f"S{i + 1}" for i in range(n))
+    names = tuple(_NAMES[i] if i < len(_NAMES) else f"Unit-{i + 1:05d}" for i in range(n))
+    named = np.arange(n) < len(_NAMES)
+    lat = _ORIGIN[0] + np.where(named, np.arange(n) * 0.0001, _rng.normal(0, 0.025, n))
+    lon = _ORIGIN[1] + np.where(named, np.arange(n) * 0.0001, _rng.normal(0, 0.025, n))
+    activity = _rng.choice(3, size=n, p=[0.3, 0.5, 0.2]).astype(np.uint8)
+    heart_rate = (_HR_TARGET[activity] + _rng.normal(0, 4, n)).astype(np.float32)
+    with _write_lock:
+        _heading = _rng.uniform(0, 2 * math.pi, n)
+        version = _snapshot.version + 1
+        # A new roster: earlier versions do not describe the same units
+        _history.clear()
+        _publish(Snapshot(
+            version, ids, names, lat, lon, heart_rate, _status_from_vitals(heart_rate, activity),
+            activity, np.ones(n, bool), np.full(n, time.time()), np.full(n, version, np.int64),
+        ))
+
+
+def step(dt: float) -> None:
+    # One simulator tick over all simulated units, fully vectorized
+    global _heading
+    t0 = time.perf_counter()
+    with _write_lock:
+        snap = _snapshot
+        sim = np.flatnonzero(snap.simulated)
+        n = len(sim)
+        if n:
+            activity = snap.activity[sim]
+            # Markov activity transitions: leave with the total rate, pick the target by its share
+            rates = _TRANSITION_RATE[activity]
+            leave = _rng.random(n) < -np.expm1(-rates.sum(axis=1) * dt)
+            if leave.any():
+                cumulative = np.cumsum(rates[leave], axis=1)
+                pick = _rng.random(int(leave.sum())) * cumulative[:, -1]
+                activity = activity.copy()
+                activity[leave] = (pick[:, None] >= cumulative).sum(axis=1).astype(np.uint8)
+
+            heading = _heading[sim] + _rng.normal(0, 0.35 * math.sqrt(dt), n)
+            distance = _SPEED[activity] * dt
+            lat = snap.lat[sim] + distance * np.cos(heading) / _METERS_PER_DEG
+            lon = snap.lon[sim] + distance * np.sin(heading) / (_METERS_PER_DEG * np.cos(np.radians(lat)))
+
+            alpha = -math.expm1(-dt / _HR_TAU_S)
+            hr = snap.heart_rate[sim].astype(np.float64)
+            hr += (_HR_TARGET[activity] - hr) * alpha + _rng.normal(0, 1.5 * math.sqrt(min(dt, _HR_TAU_S)), n)
+            hr = np.clip(hr, *_HR_RANGE)
+
+            status = _status_from_vitals(hr, activity)
+            # Only rows whose published (rounded) values differ count as changed for delta readers
+            moved = (
+                (np.round(lat, 6) != np.round(snap.lat[sim], 6))
+                | (np.round(lon, 6) != np.round(snap.lon[sim], 6))
+                | (np.rint(hr) != np.rint(snap.heart_rate[sim]))
+                | (status != snap.status[sim])
+                | (activity != snap.activity[sim])
+            )
+            version = snap.version + 1
+            new_lat, new_lon = snap.lat.copy(), snap.lon.copy()
+            new_hr, new_activity = snap.heart_rate.copy(), snap.activity.copy()
+            new_status, updated, changed = snap.status.copy(), snap.updated_at.copy(), snap.changed.copy()
+            new_lat[sim], new_lon[sim], new_hr[sim], new_activity[sim] = lat, lon, hr, activity
+            new_status[sim] = status
+            updated[sim[moved]] = time.time()
+            changed[sim[moved]] = version
+            _heading = _heading.copy()
+            _heading[sim] = heading
+            _publish(Snapshot(
+                version, snap.ids, snap.names, new_lat, new_lon, new_hr, new_status, new_activity,
+                snap.simulated, updated, changed,
+            ))
+        _stats["ticks"] += 1
+        _stats["last_tick_ms"] = (time.perf_counter() - t0) * 1000.0
 
 
 def _simulate_loop() -> None:
-    statuses = ["ok", "ok", "ok", "warn", "ok", "ok", "ok", "critical"]
+    last = time.monotonic()
+    while _stop_event and not _stop_event.wait(_TICK_S):
+        now = time.monotonic()
+        step(now - last)
+        last = now
+
+
+def _column(records: Sequence[Dict[str, Any]], key: str, index: Optional[int] = None) -> np.ndarray:
+    # Float column with NaN where the field is absent; "gps": [lat, lon] is accepted for lat/lon
+    values = []
+    for r in records:
+        value = r.get(key)
+        if value is None and index is not None and r.get("gps") is not None:
+            gps = r["gps"]
+            if not isinstance(gps, (list, tuple)) or len(gps) != 2:
+                raise ValueError("'gps' must be [lat, lon]")
+            value = gps[index]
+        values.append(np.nan if value is None else value)
     try:
-        while _stop_event and not _stop_event.is_set():
-            for s in _soldiers:
-                # Random walk for GPS
-                lat, lon = s["gps"]
-                lat += random.uniform(-0.0002, 0.0002)
-                lon += random.uniform(-0.0002, 0.0002)
-                s["gps"] = [round(lat, 6), round(lon, 6)]
-
-                # Heart rate jitter
-                s["heart_rate"] = max(55, min(160, int(random.gauss(s["heart_rate"], 1.5))))
-
-                # Occasionally change status
-                if random.random() < 0.2:
-                    s["status"] = random.choice(statuses)
-
-            time.sleep(3.0)
-    finally:
-        return
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' must be a number")
+
+
+def ingest(records: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+    # Real telemetry: {"id", "lat", "lon" (or "gps"), "heart_rate", optional "status", "name", "ts"} per unit.
+    # Missing fields keep their current value; unknown ids are added. Ingested units are never simulated.
+    # Raises ValueError (whole batch rejected) on invalid input.
+    global _heading
+    if len(records) > INGEST_MAX:
+        raise ValueError(f"at most {INGEST_MAX} units per request")
+    if not all(isinstance(r, dict) and r.get("id") not in (None, "") for r in records):
+        raise ValueError("every unit needs an 'id'")
+    ids = [str(r["id"]) for r in records]
+    lat = _column(records, "lat", 0)
+    lon = _column(records, "lon", 1)
+    hr = _column(records, "heart_rate")
+    ts = _column(records, "ts")
+    if np.any(np.abs(lat) > 90) or np.any(np.abs(lon) > 180):
+        raise ValueError("lat/lon out of range")
+    if np.any((hr < 0) | (hr > 300)):
+        raise ValueError("heart_rate out of range")
+    try:
+        given_status = np.array([_STATUS_CODES[r["status"]] if r.get("status") is not None else -1 for r in records],
+                                dtype=np.int16)
+    except (KeyError, TypeError):
+        raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+    now = time.time()
+
+    with _write_lock:
+        snap = _snapshot
+        index = {unit_id: i for i, unit_id in enumerate(snap.ids)}
+        is_new = np.fromiter((u not in index for u in ids), dtype=bool, count=len(ids))
+        if np.any(is_new & (np.isnan(lat) | np.isnan(lon) | np.isnan(hr))):
+            raise ValueError("new units need lat, lon and heart_rate")
+        new_ids = list(dict.fromkeys(u for u, new in zip(ids, is_new.tolist()) if new))
+        names = dict(zip(ids, (r.get("name") for r in records)))
+        all_ids = snap.ids + tuple(new_ids)
+        all_names = snap.names + tuple(str(names[u] or u) for u in new_ids)
+        for u in new_ids:
+            index[u] = len(index)
+        grow = len(new_ids)
+
+        def extend(column: np.ndarray, fill: Any) -> np.ndarray:
+            return np.concatenate([column, np.full(grow, fill, dtype=column.dtype)])
+
+        new_lat, new_lon = extend(snap.lat, np.nan), extend(snap.lon, np.nan)
+        new_hr = extend(snap.heart_rate, np.nan)
+        new_activity = extend(snap.activity, 0)
+        new_status = extend(snap.status, 0)
+        simulated = extend(snap.simulated, False)
+        updated = extend(snap.updated_at, now)
+        changed = extend(snap.changed, 0)
+        version = snap.version + 1
+
+        rows = np.fromiter((index[u] for u in ids), dtype=np.int64, count=len(ids))
+        new_lat[rows] = np.where(np.isnan(lat), new_lat[rows], lat)
+        new_lon[rows] = np.where(np.isnan(lon), new_lon[rows], lon)
+        new_hr[rows] = np.where(np.isnan(hr), new_hr[rows], hr)
+        # Activity is not reported by real devices; "down" is cleared when telemetry resumes
+        new_activity[rows] = np.where(new_activity[rows] == _DOWN, 0, new_activity[rows])
+        derived = _status_from_vitals(new_hr[rows], new_activity[rows])
+        new_status[rows] = np.where(given_status >= 0, given_status, derived).astype(np.uint8)
+        simulated[rows] = False
+        updated[rows] = np.where(np.isnan(ts), now, ts)
+        changed[rows] = version
+
+        _heading = np.concatenate([_heading, np.zeros(grow)])
+        _publish(Snapshot(
+            version, all_ids, all_names, new_lat, new_lon, new_hr, new_status, new_activity, simulated, updated,
+            changed,
+        ))
+        _stats["ingested"] += len(records)
+        _stats["ingest_batches"] += 1
+    return {"accepted": len(records), "created": grow, "version": version}
 
 
 def start_simulator() -> None:
@@ -49,7 +411,7 @@ def start_simulator() -> None:
         return
     _init_soldiers()
     _stop_event = threading.Event()
-    _thread = threading.Thread(target=_simulate_loop, daemon=True)
+    _thread = threading.Thread(target=_simulate_loop, name="soldier-simulator", daemon=True)
     _thread.start()
 
 
@@ -63,7 +425,113 @@ def stop_simulator() -> None:
     _stop_event = None
 
 
+def snapshot() -> Snapshot:
+    return _snapshot
+
+
+def _distance_m(lat: np.ndarray, lon: np.ndarray, lat0: float, lon0: float) -> np.ndarray:
+    # Haversine
+    phi, phi0 = np.radians(lat), math.radians(lat0)
+    a = np.sin((phi - phi0) / 2) ** 2 + np.cos(phi) * math.cos(phi0) * np.sin(np.radians(lon - lon0) / 2) ** 2
+    return 2 * _EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _matches(
+    snap: Snapshot,
+    rows: np.ndarray,
+    codes: Optional[List[int]],
+    bbox: Optional[Tuple[float, float, float, float]],
+    near: Optional[Tuple[float, float, float]],
+) -> np.ndarray:
+    mask = np.ones(len(rows), bool)
+    if codes is not None:
+        mask &= np.isin(snap.status[rows], codes)
+    if bbox is not None:
+        lat, lon = snap.lat[rows], snap.lon[rows]
+        mask &= (lat >= bbox[0]) & (lat <= bbox[2]) & (lon >= bbox[1]) & (lon <= bbox[3])
+    if near is not None:
+        mask &= _distance_m(snap.lat[rows], snap.lon[rows], near[0], near[1]) <= near[2]
+    return mask
+
+
+def query(
+    snap: Snapshot,
+    statuses: Optional[Sequence[str]] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    near: Optional[Tuple[float, float, float]] = None,
+    since: Optional[int] = None,
+) -> bytes:
+    # Filtered and/or delta JSON body. bbox: (min_lat, min_lon, max_lat, max_lon); near: (lat, lon, radius_m).
+    # since: a version the client already has; only rows changed after it are returned. With filters,
+    # "removed" lists units that matched at that version and no longer do, which needs the version to
+    # still be in the history. Otherwise (too old, or from before a restart) the answer is a full one
+    # with "delta": false. Raises ValueError.
+    codes = None
+    if statuses is not None:
+        try:
+            codes = [_STATUS_CODES[name] for name in statuses]
+        except KeyError:
+            raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+    box = bbox
+    if bbox is not None:
+        if not (-90 <= bbox[0] <= bbox[2] <= 90 and -180 <= bbox[1] <= bbox[3] <= 180):
+            raise ValueError("bbox must be min_lat,min_lon,max_lat,max_lon within range")
+    if near is not None:
+        lat0, lon0, radius = near
+        if not (-90 <= lat0 <= 90 and -180 <= lon0 <= 180 and radius > 0):
+            raise ValueError("near must be lat,lon in range with a positive radius")
+        dlat = math.degrees(radius / _EARTH_RADIUS_M)
+        dlon = dlat / max(math.cos(math.radians(lat0)), 1e-6)
+        circle = (lat0 - dlat, lon0 - dlon, lat0 + dlat, lon0 + dlon)
+        box = circle if box is None else (
+            max(box[0], circle[0]), max(box[1], circle[1]), min(box[2], circle[2]), min(box[3], circle[3])
+        )
+
+    filtered = codes is not None or bbox is not None or near is not None
+    base = _at(since) if since is not None and filtered and since < snap.version else None
+    delta = since is not None and since <= snap.version and (not filtered or since == snap.version or base is not None)
+    if delta:
+        rows = np.flatnonzero(snap.changed > since)
+    elif box is not None:
+        rows = np.sort(snap.grid().candidates(*box)) if box[0] <= box[2] and box[1] <= box[3] else np.zeros(0, int)
+    else:
+        rows = np.arange(len(snap))
+    mask = _matches(snap, rows, codes, bbox, near)
+    payload: Dict[str, Any] = {"version": snap.version}
+    if since is not None:
+        payload["since"] = since
+        payload["delta"] = delta
+        if delta:
+            left = np.zeros(0, int)
+            if base is not None:
+                # Units that existed at `since`, matched then and do not match now
+                old = rows[~mask]
+                old = old[old < len(base)]
+                left = old[_matches(base, old, codes, bbox, near)]
+            payload["removed"] = [snap.ids[i] for i in left.tolist()]
+    payload["soldiers"] = snap.records(rows[mask])
+    return _dumps(payload)
+
+
 def get_soldiers() -> List[Dict]:
-    return _soldiers
+    # Plain records of the current snapshot (a copy; safe to keep or modify)
+    return _snapshot.records()
+
+
+def get_stats() -> Dict[str, Any]:
+    snap = _snapshot
+    return {
+        **_stats,
+        "units": len(snap),
+        "simulated": int(snap.simulated.sum()),
+        "version": snap.version,
+        "by_status": {name: int(np.count_nonzero(snap.status == code)) for code, name in enumerate(STATUSES)},
+    }
 
 
+metrics.callback(
+    "veerdrishti_soldier_units", "Units by status",
+    lambda: {(name,): count for name, count in get_stats()["by_status"].items()}, labelnames=("status",),
+)
+metrics.callback("veerdrishti_soldier_tick_seconds", "Duration of the last simulator tick",
+                 lambda: _stats["last_tick_ms"] / 1000.0)
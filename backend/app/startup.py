@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+# Staged start-up: slow subsystems come up in background threads while the server already accepts
+# requests. Their state and the boot milestones (first request, first frame, first recognition),
+# timed from process start, are reported by /api/health.
+
+
+def _process_start() -> float:
+    # time.monotonic() at process start, from /proc on Linux; elsewhere the time of this import
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.monotonic() - max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.monotonic()
+
+
+_STARTED = _process_start()
+
+_lock = threading.Lock()
+_subsystems: Dict[str, Dict[str, Any]] = {}
+_milestones: Dict[str, float] = {}
+
+
+def elapsed() -> float:
+    return time.monotonic() - _STARTED
+
+
+def set_state(name: str, state: str, error: Optional[str] = None) -> None:
+    # pending -> starting -> ready | failed
+    with _lock:
+        entry = _subsystems.setdefault(name, {})
+        entry["state"] = state
+        if state == "starting":
+            entry["started_at_s"] = elapsed()
+        elif state == "ready":
+            entry["ready_at_s"] = elapsed()
+            entry["duration_s"] = entry["ready_at_s"] - entry.get("started_at_s", entry["ready_at_s"])
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry.pop("error", None)
+
+
+def run(name: str, fn: Callable[[], Any], background: bool = True) -> Optional[threading.Thread]:
+    # Runs one subsystem's start-up and records its state; a failure is reported, not raised
+    set_state(name, "starting")
+
+    def target() -> None:
+        try:
+            fn()
+        except Exception as exc:  # reported through /api/health
+            set_state(name, "failed", f"{type(exc).__name__}: {exc}")
+            return
+        set_state(name, "ready")
+
+    if not background:
+        target()
+        return None
+    thread = threading.Thread(target=target, name=f"startup-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+def milestone(name: str) -> None:
+    # First occurrence only; cheap enough to call on every frame or request
+    if name in _milestones:
+        return
+    with _lock:
+        _milestones.setdefault(name, elapsed())
+
+
+def ready() -> bool:
+    with _lock:
+        return all(entry["state"] == "ready" for entry in _subsystems.values())
+
+
+def status() -> Dict[str, Any]:
+    with _lock:
+        subsystems = {name: dict(entry) for name, entry in _subsystems.items()}
+        milestones = dict(_milestones)
+    return {
+        "ready": all(entry["state"] == "ready" for entry in subsystems.values()),
+        "uptime_s": elapsed(),
+        "subsystems": subsystems,
+        "milestones": milestones,
+    }
@@ -0,0 +1,189 @@
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+Box = Tuple[int, int, int, int]
+Identity = Tuple[str, float, bool, str]
+
+_LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+)
+
+
+def _iou(a: Box, b: Box) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class _Track:
+    __slots__ = ("track_id", "box", "points", "missed", "identity", "recognized_at", "requested_at")
+
+    def __init__(self, track_id: int, box: Box) -> None:
+        self.track_id = track_id
+        self.box = box
+        self.points: Optional[np.ndarray] = None
+        self.missed = 0
+        self.identity: Optional[Identity] = None
+        self.recognized_at = -1
+        self.requested_at = -1
+
+
+class FaceTracker:
+    # Detection every `detect_every` frames (or as soon as a track is lost); in between, boxes
+    # follow Lucas-Kanade optical flow of a few corner points. Each track is recognized once and
+    # again when its identity goes stale (confidence decays with age, LBPH: lower is better).
+    # step() runs in the detection stage while identities are set from the recognition stage,
+    # so state is guarded by a lock that is not held during detection itself.
+
+    def __init__(
+        self,
+        detect_every: int = 5,
+        recognize_every: int = 30,
+        match_threshold: float = 85.0,
+        confidence_decay: float = 1.0,
+        iou_threshold: float = 0.3,
+        max_missed: int = 2,
+    ) -> None:
+        self.detect_every = max(1, detect_every)
+        self.recognize_every = max(1, recognize_every)
+        self.match_threshold = match_threshold
+        self.confidence_decay = confidence_decay
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.frame_index = -1
+        self.tracks: Dict[int, _Track] = {}
+        self._next_id = 1
+        self._prev_gray: Optional[np.ndarray] = None
+        self._lost = False
+        self.detections_run = 0
+        self.recognitions_run = 0
+        self._lock = threading.Lock()
+
+    def step(
+        self, gray: np.ndarray, detect: Callable[[np.ndarray], List[Box]]
+    ) -> List[Tuple[int, Box, bool]]:
+        # Advance one frame; returns (track_id, box, needs_recognition) for every live track
+        with self._lock:
+            self.frame_index += 1
+            if self._prev_gray is not None and self.tracks:
+                self._follow_flow(gray)
+            # An empty scene is also only re-checked every N frames
+            run_detection = self._lost or self.frame_index % self.detect_every == 0
+        boxes = detect(gray) if run_detection else None
+        with self._lock:
+            if boxes is not None:
+                self._associate(gray, boxes)
+                self.detections_run += 1
+            self._prev_gray = gray
+            out: List[Tuple[int, Box, bool]] = []
+            for track in self.tracks.values():
+                needs = self._needs_recognition(track)
+                if needs:
+                    track.requested_at = self.frame_index
+                out.append((track.track_id, track.box, needs))
+            return out
+
+    def _seed_points(self, gray: np.ndarray, track: _Track) -> None:
+        x, y, w, h = track.box
+        mask = np.zeros(gray.shape[:2], dtype=np.uint8)
+        mask[max(y, 0) : y + h, max(x, 0) : x + w] = 255
+        track.points = cv2.goodFeaturesToTrack(gray, maxCorners=20, qualityLevel=0.01, minDistance=5, mask=mask)
+
+    def _follow_flow(self, gray: np.ndarray) -> None:
+        self._lost = False
+        for track in self.tracks.values():
+            if track.points is None or len(track.points) < 3:
+                self._lost = True
+                continue
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, track.points, None, **_LK_PARAMS)
+            good = status.reshape(-1) == 1
+            if good.sum() < 3:
+                track.points = None
+                self._lost = True
+                continue
+            dx, dy = np.median(new_points[good] - track.points[good], axis=0).reshape(-1)
+            x, y, w, h = track.box
+            track.box = (int(round(x + dx)), int(round(y + dy)), w, h)
+            track.points = new_points[good].reshape(-1, 1, 2)
+
+    def _associate(self, gray: np.ndarray, boxes: List[Box]) -> None:
+        # Greedy IoU matching, best pairs first
+        pairs = sorted(
+            ((_iou(t.box, b), tid, i) for tid, t in self.tracks.items() for i, b in enumerate(boxes)),
+            reverse=True,
+        )
+        used_tracks, used_boxes = set(), set()
+        for score, tid, i in pairs:
+            if score < self.iou_threshold:
+                break
+            if tid in used_tracks or i in used_boxes:
+                continue
+            used_tracks.add(tid)
+            used_boxes.add(i)
+            track = self.tracks[tid]
+            track.box = boxes[i]
+            track.missed = 0
+            self._seed_points(gray, track)
+
+        for tid in list(self.tracks):
+            if tid not in used_tracks:
+                self.tracks[tid].missed += 1
+                if self.tracks[tid].missed > self.max_missed:
+                    del self.tracks[tid]
+
+        for i, box in enumerate(boxes):
+            if i not in used_boxes:
+                track = _Track(self._next_id, box)
+                self._next_id += 1
+                self._seed_points(gray, track)
+                self.tracks[track.track_id] = track
+        self._lost = False
+
+    def _needs_recognition(self, track: _Track) -> bool:
+        # A request still in flight to the recognition stage is not repeated until it is overdue
+        if track.requested_at > track.recognized_at and self.frame_index - track.requested_at < self.detect_every:
+            return False
+        if track.identity is None:
+            return True
+        age = self.frame_index - track.recognized_at
+        if age >= self.recognize_every:
+            return True
+        _, confidence, is_match, _ = track.identity
+        return is_match and confidence + self.confidence_decay * age >= self.match_threshold
+
+    def boxes(self) -> List[Box]:
+        with self._lock:
+            return [t.box for t in self.tracks.values()]
+
+    def set_identity(self, track_id: int, identity: Identity) -> None:
+        with self._lock:
+            track = self.tracks.get(track_id)
+            if track is None:
+                return
+            track.identity = identity
+            track.recognized_at = self.frame_index
+            self.recognitions_run += 1
+
+    def identity(self, track_id: int) -> Optional[Identity]:
+        with self._lock:
+            track = self.tracks.get(track_id)
+            return track.identity if track is not None else None
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "frames": self.frame_index + 1,
+                "tracks": len(self.tracks),
+                "detections_run": self.detections_run,
+                "recognitions_run": self.recognitions_run,
+            }
@@ -0,0 +1,2 @@
+# Offline benchmarks for the backend; run from the backend directory, e.g.
+#   python -m benchmarks.bench_enrollment
@@ -0,0 +1,56 @@
+# Offline batch throughput vs. worker count (python -m app.batch) on a recorded or generated clip.
+#
+#   python -m benchmarks.bench_batch --clip path/to/recording.mp4 --workers 1,2,4,8
+
+import argparse
+import importlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_tracking import _sample_face, _static_clip
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline batch processing scaling with workers")
+    parser.add_argument("--clip", default=None, help="recorded clip; a static synthetic clip is generated if omitted")
+    parser.add_argument("--frames", type=int, default=600, help="length of the generated clip")
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="comma separated worker counts")
+    parser.add_argument("--chunk-frames", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VEERDRISHTI_DATA_DIR"] = tmp
+        from app import face_db, gallery
+
+        gallery = importlib.reload(gallery)
+        face_db = importlib.reload(face_db)
+        face = _sample_face()
+        face_db.enroll_faces("sample", [face_db._prepare_face(face)])
+        face_db.flush_pending_saves()
+
+        clip = args.clip
+        if clip is None:
+            clip = os.path.join(tmp, "static.avi")
+            _static_clip(clip, face, args.frames)
+
+        from app import batch
+
+        print(f"{'workers':>7} {'seconds':>8} {'fps':>8} {'speedup':>8}")
+        base = None
+        for workers in [int(v) for v in args.workers.split(",") if v]:
+            out = Path(tmp) / f"out-{workers}"
+            t0 = time.perf_counter()
+            batch.main([clip, "--out", str(out), "--workers", str(workers), "--chunk-frames", str(args.chunk_frames),
+                        "--all-frames"])
+            elapsed = time.perf_counter() - t0
+            frames = sum(1 for _ in open(out / "detections.jsonl"))
+            fps = frames / elapsed
+            base = base or fps
+            print(f"{workers:>7} {elapsed:>8.1f} {fps:>8.1f} {fps / base:>7.2f}x")
+    print(f"({os.cpu_count()} CPUs; includes worker start-up and the final merge)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Broadcaster fan-out: N subscribers (some slow) on one producer thread.
+#
+#   python -m benchmarks.bench_broadcast --clients 50 --fps 15 --seconds 5
+
+import argparse
+import asyncio
+import threading
+import time
+
+from app.broadcast import Broadcaster
+
+
+async def _client(broadcaster: "Broadcaster[bytes]", delay: float, received: list, index: int) -> None:
+    async for _, item in broadcaster.subscribe():
+        received[index] += 1
+        if delay:
+            # Simulated slow network: this client skips frames instead of queueing them
+            await asyncio.sleep(delay)
+
+
+async def _main(clients: int, fps: float, seconds: float, slow_fraction: float) -> None:
+    broadcaster: "Broadcaster[bytes]" = Broadcaster()
+    received = [0] * clients
+    slow = int(clients * slow_fraction)
+    tasks = [
+        asyncio.create_task(_client(broadcaster, 0.5 if i < slow else 0.0, received, i)) for i in range(clients)
+    ]
+    frame = b"\xff" * 60_000
+    published = 0
+
+    def produce() -> None:
+        nonlocal published
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            broadcaster.publish(frame)
+            published += 1
+            time.sleep(1.0 / fps)
+        broadcaster.close()
+
+    cpu0 = time.process_time()
+    producer = threading.Thread(target=produce)
+    producer.start()
+    await asyncio.gather(*tasks)
+    producer.join()
+    cpu = time.process_time() - cpu0
+
+    fast = received[slow:] or [0]
+    print(f"published {published} frames to {clients} clients ({slow} slow) in {seconds:.0f}s")
+    print(f"fast clients received avg {sum(fast) / len(fast):.1f}, slow clients avg {sum(received[:slow]) / max(slow, 1):.1f}")
+    print(f"cpu {cpu * 1000:.0f} ms total, {cpu * 1e6 / max(published * clients, 1):.1f} us per delivery slot")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Broadcaster fan-out cost")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--slow-fraction", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(_main(args.clients, args.fps, args.seconds, args.slow_fraction))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Bulk registration: one image at a time through register_face_from_bytes vs. a bulk job
+# (process-pool preprocessing, one recognizer update for the batch).
+#
+#   python -m benchmarks.bench_bulk_register --people 50 --images 4
+
+import argparse
+import importlib
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_tracking import _compose, _sample_face
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk face registration throughput")
+    parser.add_argument("--people", type=int, default=50)
+    parser.add_argument("--images", type=int, default=4, help="images per person")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    face = _sample_face()
+    rng = np.random.default_rng(0)
+    images = []
+    for p in range(args.people):
+        for i in range(args.images):
+            # Slightly different brightness per image so crops are not identical
+            variant = cv2.convertScaleAbs(face, alpha=1.0, beta=float(rng.integers(-20, 20)))
+            ok, jpeg = cv2.imencode(".jpg", _compose(variant, rng), [int(cv2.IMWRITE_JPEG_QUALITY), 90])
+            images.append((f"person{p:04d}", f"person{p:04d}/{i}.jpg", jpeg.tobytes()))
+    total_mb = sum(len(b) for _, _, b in images) / 1e6
+    print(f"{len(images)} images ({total_mb:.1f} MB), {args.people} people, {args.workers} workers")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VEERDRISHTI_DATA_DIR"] = str(Path(tmp) / "sequential")
+        from app import face_db, gallery
+
+        gallery = importlib.reload(gallery)
+        face_db = importlib.reload(face_db)
+        face_db.initialize()
+        t0 = time.perf_counter()
+        for person, _, data in images:
+            face_db.register_face_from_bytes(person, data)
+        face_db.flush_pending_saves()
+        sequential = time.perf_counter() - t0
+        print(f"sequential register_face_from_bytes: {sequential:.1f} s ({len(images) / sequential:.1f} images/s)")
+
+        os.environ["VEERDRISHTI_DATA_DIR"] = str(Path(tmp) / "bulk")
+        os.environ["REGISTER_WORKERS"] = str(args.workers)
+        from app import registration
+
+        gallery = importlib.reload(gallery)
+        face_db = importlib.reload(face_db)
+        registration = importlib.reload(registration)
+        face_db.initialize()
+        archive = Path(tmp) / "roster.zip"
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+            for _, name, data in images:
+                zf.writestr(name, data)
+
+        # Warm the pool so worker start-up is not counted as processing time
+        registration._get_pool().submit(registration._prepare_files, []).result()
+        t0 = time.perf_counter()
+        job_id, job_dir = registration.new_job_dir()
+        target = job_dir / "upload-0000"
+        target.write_bytes(archive.read_bytes())
+        registration.submit(job_id, job_dir, [("roster.zip", target)])
+        while registration.get_job(job_id)["status"] in ("queued", "running"):
+            time.sleep(0.05)
+        face_db.flush_pending_saves()
+        bulk = time.perf_counter() - t0
+        job = registration.get_job(job_id)
+        registration.shutdown()
+        print(f"bulk job: {bulk:.1f} s ({len(images) / bulk:.1f} images/s, {sequential / bulk:.1f}x), "
+              f"{job['faces_enrolled']} faces for {job['people']} people, {job['failed_images']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Aggregate FPS as cameras and detection workers scale, using looped video files as cameras.
+#
+#   python -m benchmarks.bench_cameras --cameras 1,4,8 --workers 0,2,4 --seconds 10
+
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+
+def _write_clip(path: str, width: int, height: int, frames: int) -> None:
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8), (31, 31), 0)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (width, height))
+    for i in range(frames):
+        frame = background.copy()
+        # A moving bright block so frames differ
+        x = (i * 7) % max(width - 120, 1)
+        cv2.rectangle(frame, (x, height // 3), (x + 120, height // 3 + 240), (200, 200, 200), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-camera aggregate FPS")
+    parser.add_argument("--cameras", default="1,2,4")
+    parser.add_argument("--workers", default=f"0,{os.cpu_count() or 1}")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("VEERDRISHTI_DATA_DIR", tmp)
+        from app import inference
+
+        clip = os.path.join(tmp, "clip.avi")
+        _write_clip(clip, args.width, args.height, 100)
+
+        print(f"{'cameras':>8} {'workers':>8} {'agg_fps':>8} {'per_cam_fps':>12} {'detect_ms':>10}")
+        for workers in [int(v) for v in args.workers.split(",") if v]:
+            inference._DETECT_WORKERS = workers
+            for cameras in [int(v) for v in args.cameras.split(",") if v]:
+                ids = [f"cam{i}" for i in range(cameras)]
+                for camera_id in ids:
+                    inference.start_camera(camera_id, clip, target_fps=0, loop=True)
+                time.sleep(args.warmup)
+                before = {c: inference.get_pipeline_stats(c)["stages"]["encode"]["frames"] for c in ids}
+                time.sleep(args.seconds)
+                stats = {c: inference.get_pipeline_stats(c)["stages"] for c in ids}
+                inference.stop_inference()
+
+                frames = sum(stats[c]["encode"]["frames"] - before[c] for c in ids)
+                agg = frames / args.seconds
+                detect_ms = sum(stats[c]["detect"]["avg_ms"] for c in ids) / cameras
+                print(f"{cameras:>8} {workers:>8} {agg:>8.2f} {agg / cameras:>12.2f} {detect_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# JPEG codecs: OpenCV vs. libjpeg-turbo (PyTurboJPEG, when installed) for frame encode, thumbnail
+# variants, encode throughput on the shared pool by thread count, and decode of large uploads at
+# full size vs. reduced DCT scale.
+#
+#   python -m benchmarks.bench_codec --frames 200 --threads 1,2,4 --upload 4000x3000
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import cv2
+import numpy as np
+
+
+def _frame(rng: np.random.Generator, width: int, height: int) -> np.ndarray:
+    # Smooth scene with edges and sensor noise, closer to a camera frame than flat color or white noise
+    base = cv2.GaussianBlur(rng.integers(0, 256, size=(height // 8, width // 8, 3), dtype=np.uint8), (3, 3), 0)
+    frame = cv2.resize(base, (width, height), interpolation=cv2.INTER_CUBIC)
+    for _ in range(20):
+        x, y = int(rng.integers(0, width - 100)), int(rng.integers(0, height - 100))
+        cv2.rectangle(frame, (x, y), (x + 100, y + 60), (0, 255, 0), 2)
+        cv2.putText(frame, "Intruder", (x, y - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    return cv2.add(frame, rng.integers(0, 4, size=frame.shape, dtype=np.uint8))
+
+
+def _best_ms(fn: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JPEG encode/decode cost per codec backend")
+    parser.add_argument("--frames", type=int, default=200, help="frames per pool throughput run")
+    parser.add_argument("--threads", default="1,2,4", help="comma separated pool sizes")
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--size", default="1280x720", help="camera frame size")
+    parser.add_argument("--upload", default="4000x3000", help="registration photo size")
+    parser.add_argument("--max-side", type=int, default=1600, help="UPLOAD_DECODE_MAX_SIDE")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    from app import codec
+
+    rng = np.random.default_rng(0)
+    width, height = (int(v) for v in args.size.split("x"))
+    frame = _frame(rng, width, height)
+    backends = {"opencv": None}
+    if codec._turbo is not None:
+        backends["turbojpeg"] = codec._turbo
+    else:
+        print("(PyTurboJPEG / libturbojpeg not available: OpenCV only)\n")
+    original = codec._turbo
+
+    print(f"{'backend':<10} {'encode':<16} {'ms':>7} {'KB':>7} {'MP/s':>7}")
+    for name, turbo in backends.items():
+        codec._turbo = turbo
+        for label, w, q in (
+            (f"{width}x{height} q{args.quality}", 0, args.quality),
+            ("thumb 320 q60", 320, 60),
+            ("640 q70", 640, 70),
+        ):
+            ms = _best_ms(lambda: codec.encode(frame, q, w), args.repeats)
+            size = len(codec.encode(frame, q, w) or b"")
+            print(f"{name:<10} {label:<16} {ms:>7.2f} {size / 1e3:>7.1f} {width * height / 1e3 / ms:>7.1f}")
+
+    # Several cameras' encodes in flight at once: both codecs release the GIL while compressing
+    frames: List[np.ndarray] = [np.roll(frame, i, axis=1) for i in range(8)]
+    print(f"\n{'backend':<10} {'threads':>7} {'frames/s':>9}")
+    for name, turbo in backends.items():
+        codec._turbo = turbo
+        for threads in [int(t) for t in args.threads.split(",") if t]:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                t0 = time.perf_counter()
+                list(pool.map(lambda i: codec.encode(frames[i % len(frames)], args.quality), range(args.frames)))
+                elapsed = time.perf_counter() - t0
+            print(f"{name:<10} {threads:>7} {args.frames / elapsed:>9.1f}")
+
+    # Registration uploads: the former path decoded in full color and converted to gray
+    up_w, up_h = (int(v) for v in args.upload.split("x"))
+    codec._turbo = original
+    _, buf = cv2.imencode(".jpg", _frame(rng, up_w, up_h), [int(cv2.IMWRITE_JPEG_QUALITY), 92])
+    data = buf.tobytes()
+
+    def full_color() -> np.ndarray:
+        return cv2.cvtColor(cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR), cv2.COLOR_BGR2GRAY)
+
+    print(f"\n{'backend':<10} {'decode ' + args.upload:<28} {'ms':>7} {'output':>11}")
+    out = full_color()
+    print(f"{'opencv':<10} {'full color + cvtColor':<28} {_best_ms(full_color, args.repeats):>7.1f} "
+          f"{f'{out.shape[1]}x{out.shape[0]}':>11}")
+    for name, turbo in backends.items():
+        codec._turbo = turbo
+        for label, max_side in (("gray full", 0), (f"gray max_side={args.max_side}", args.max_side)):
+            ms = _best_ms(lambda: codec.decode(data, gray=True, max_side=max_side), args.repeats)
+            out = codec.decode(data, gray=True, max_side=max_side)
+            print(f"{name:<10} {label:<28} {ms:>7.1f} {f'{out.shape[1]}x{out.shape[0]}':>11}")
+    codec._turbo = original
+
+
+if __name__ == "__main__":
+    main()
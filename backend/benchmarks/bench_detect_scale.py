@@ -0,0 +1,80 @@
+# Detection latency and recall against detection scale on sample images.
+#
+#   python -m benchmarks.bench_detect_scale --scales 1.0,0.75,0.5,0.35 --images 20
+
+import argparse
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from app import detectors
+from app.tracker import _iou
+
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+Box = Tuple[int, int, int, int]
+
+
+def _detectable_faces(limit: int = 8) -> List[np.ndarray]:
+    # Bundled face crops the cascade finds when shown large on a plain background
+    faces: List[np.ndarray] = []
+    for path in sorted((_BACKEND_DIR / "data" / "faces").glob("*/*/*.png")):
+        img = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            continue
+        probe = cv2.copyMakeBorder(cv2.resize(img, (200, 200)), 60, 60, 60, 60, cv2.BORDER_CONSTANT, value=90)
+        if detectors.detect_faces(probe):
+            faces.append(img)
+        if len(faces) >= limit:
+            break
+    return faces
+
+
+def _scenes(faces: List[np.ndarray], count: int) -> List[Tuple[np.ndarray, List[Box]]]:
+    rng = np.random.default_rng(0)
+    scenes = []
+    for _ in range(count):
+        frame = cv2.GaussianBlur(rng.integers(40, 140, size=(720, 1280), dtype=np.uint8), (31, 31), 0)
+        truth: List[Box] = []
+        for _ in range(int(rng.integers(1, 4))):
+            size = int(rng.integers(90, 260))
+            x, y = int(rng.integers(0, 1280 - size)), int(rng.integers(0, 720 - size))
+            if any(_iou((x, y, size, size), b) > 0 for b in truth):
+                continue
+            frame[y : y + size, x : x + size] = cv2.resize(faces[int(rng.integers(len(faces)))], (size, size))
+            truth.append((x, y, size, size))
+        scenes.append((frame, truth))
+    return scenes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Detection scale vs. latency and recall")
+    parser.add_argument("--scales", default="1.0,0.75,0.5,0.35")
+    parser.add_argument("--images", type=int, default=20)
+    args = parser.parse_args()
+
+    faces = _detectable_faces()
+    if not faces:
+        raise SystemExit("no detectable face crops found under data/faces")
+    scenes = _scenes(faces, args.images)
+    detectors.warm_up()
+
+    print(f"{'scale':>6} {'latency_ms':>11} {'recall':>7} {'false_pos':>10}")
+    for scale in [float(v) for v in args.scales.split(",") if v]:
+        hits, total, false_pos, elapsed = 0, 0, 0, 0.0
+        for frame, truth in scenes:
+            t0 = time.perf_counter()
+            found = detectors.detect_face_boxes(frame, scale)
+            elapsed += time.perf_counter() - t0
+            total += len(truth)
+            hits += sum(1 for b in truth if any(_iou(b, f) >= 0.3 for f in found))
+            false_pos += sum(1 for f in found if not any(_iou(b, f) >= 0.3 for b in truth))
+        print(f"{scale:>6.2f} {elapsed / len(scenes) * 1000:>11.1f} {hits / max(total, 1):>7.2f} {false_pos:>10}")
+
+
+if __name__ == "__main__":
+    main()
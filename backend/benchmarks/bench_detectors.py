@@ -0,0 +1,45 @@
+# Detector load (startup) cost vs. per-call cost, and registration with the shared registry.
+#
+#   python -m benchmarks.bench_detectors --calls 50
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from app import detectors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Detector startup and per-call timings")
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    gray = rng.integers(0, 256, size=(480, 640), dtype=np.uint8)
+
+    # Old behaviour: build (and parse) the cascade on every call
+    t0 = time.perf_counter()
+    for _ in range(args.calls):
+        cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=5, minSize=(50, 50))
+    per_call_build = (time.perf_counter() - t0) / args.calls
+
+    detectors.warm_up()
+    t0 = time.perf_counter()
+    for _ in range(args.calls):
+        detectors.detect_faces(gray)
+    per_call_cached = (time.perf_counter() - t0) / args.calls
+
+    for _ in range(max(1, args.calls // 10)):
+        detectors.detect_people(gray)
+
+    print(f"cascade build+detect per call: {per_call_build * 1000:.2f} ms")
+    print(f"cached detect per call:        {per_call_cached * 1000:.2f} ms")
+    print(json.dumps(detectors.get_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
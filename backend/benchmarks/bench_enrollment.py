@@ -0,0 +1,63 @@
+# Registration latency vs. gallery size: incremental LBPH update vs. full retrain.
+#
+#   python -m benchmarks.bench_enrollment --sizes 100,500,2000 --crops 5
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+
+def _synthetic_crops(rng: np.random.Generator, count: int) -> List[np.ndarray]:
+    return [rng.integers(0, 256, size=(100, 100), dtype=np.uint8) for _ in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Registration latency vs. gallery size")
+    parser.add_argument("--sizes", default="100,500,2000", help="comma separated gallery sizes (people)")
+    parser.add_argument("--crops", type=int, default=5, help="crops per person")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    rng = np.random.default_rng(0)
+    print(f"{'people':>8} {'incremental_ms':>15} {'persist_ms':>11} {'full_retrain_ms':>16} {'speedup':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["VEERDRISHTI_DATA_DIR"] = tmp
+            # Fresh module per gallery so paths and globals point at the temp dir
+            import importlib
+            from app import face_db, gallery
+
+            gallery = importlib.reload(gallery)
+            face_db = importlib.reload(face_db)
+            face_db.initialize()
+
+            for i in range(size):
+                gallery.append(f"p{i:06d}", _synthetic_crops(rng, args.crops))
+            face_db.train_from_disk()
+
+            crops = _synthetic_crops(rng, args.crops)
+            t0 = time.perf_counter()
+            face_db.enroll_faces("new_incremental", crops, "citizen")
+            incremental = time.perf_counter() - t0
+            # Model persistence happens off the request path; report it separately
+            t0 = time.perf_counter()
+            face_db.flush_pending_saves()
+            persist = time.perf_counter() - t0
+
+            gallery.append("new_full", _synthetic_crops(rng, args.crops))
+            t0 = time.perf_counter()
+            face_db.train_from_disk()
+            full = time.perf_counter() - t0
+
+        print(
+            f"{size:>8} {incremental * 1000:>15.1f} {persist * 1000:>11.1f} "
+            f"{full * 1000:>16.1f} {full / incremental:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
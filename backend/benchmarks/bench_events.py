@@ -0,0 +1,94 @@
+# Event log ingest rate and query latency on a synthetic history.
+#
+#   python -m benchmarks.bench_events --events 2000000 --people 500 --cameras 8
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app import events
+
+
+def _detections(rng: random.Random, people: int, per_frame: int) -> list:
+    out = []
+    for _ in range(per_frame):
+        person = rng.randrange(people + people // 10)
+        known = person < people
+        category = ("official", "citizen", "criminal")[person % 3] if known else "unknown"
+        out.append({
+            "label": f"person_{person:05d}" if known else "unknown",
+            "confidence": rng.uniform(20.0, 110.0),
+            "bbox": [rng.randrange(1000), rng.randrange(600), 80, 80],
+            "face_match": known,
+            "category": category,
+            "alert": category in ("criminal", "unknown"),
+            "track_id": rng.randrange(1, 10_000),
+        })
+    return out
+
+
+def _time_query(label: str, fn, repeats: int = 20) -> None:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        rows = fn()
+    ms = (time.perf_counter() - t0) * 1000.0 / repeats
+    print(f"{label:<44} {ms:>9.2f} ms  ({len(rows)} rows)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Detection event log benchmark")
+    parser.add_argument("--events", type=int, default=2_000_000)
+    parser.add_argument("--people", type=int, default=500)
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--per-frame", type=int, default=3)
+    parser.add_argument("--days", type=float, default=7.0, help="span of the synthetic history")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # A pool of payloads reused round-robin keeps generation cost out of the measurement
+    payloads = [_detections(rng, args.people, args.per_frame) for _ in range(1000)]
+    frames = args.events // args.per_frame
+    now = time.time()
+    span = args.days * 86400.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "events.db"
+        events.start(db_path)
+
+        t0 = time.perf_counter()
+        max_record_us = 0.0
+        for i in range(frames):
+            # Feed at the rate the writer drains, as the inference threads would not exceed it
+            while events.get_stats()["queued_frames"] > 5000:
+                time.sleep(0.001)
+            r0 = time.perf_counter()
+            events.record(f"cam{i % args.cameras}", payloads[i % len(payloads)], ts=now - span + span * i / frames)
+            max_record_us = max(max_record_us, (time.perf_counter() - r0) * 1e6)
+        events.flush(timeout=600.0)
+        elapsed = time.perf_counter() - t0
+        stats = events.get_stats()
+        print(f"ingest: {stats['rows_written']} rows in {elapsed:.1f} s = {stats['rows_written'] / elapsed:,.0f} rows/s")
+        print(f"  batches {stats['batches']}, dropped frames {stats['frames_dropped']}, "
+              f"slowest record() call {max_record_us:.0f} us")
+        print(f"  database size {db_path.stat().st_size / 1e6:.0f} MB")
+        print()
+
+        hour_ago = now - 3600.0
+        day_ago = now - 86400.0
+        _time_query("latest 100", lambda: events.query(limit=100))
+        _time_query("last hour, 100", lambda: events.query(start=hour_ago, limit=100))
+        _time_query("last hour, alerts only, 100", lambda: events.query(start=hour_ago, alert=True, limit=100))
+        _time_query("one person, all time, 100", lambda: events.query(person="person_00042", limit=100))
+        _time_query("one person, last day, 1000", lambda: events.query(start=day_ago, person="person_00042", limit=1000))
+        _time_query("one camera, criminals, 100", lambda: events.query(camera="cam3", category="criminal", limit=100))
+        _time_query("summary, last hour", lambda: events.summarize(start=hour_ago), repeats=5)
+        _time_query("summary, last day, alerts", lambda: events.summarize(start=day_ago, alert=True), repeats=3)
+
+        events.stop()
+
+
+if __name__ == "__main__":
+    main()
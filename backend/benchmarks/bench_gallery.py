@@ -0,0 +1,62 @@
+# Cold-start cost of loading every prepared crop: PNG tree scan vs. gallery store.
+#
+#   python -m benchmarks.bench_gallery --people 2000 --crops 5
+
+import argparse
+import importlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+def _read_png_tree(faces_dir: Path) -> int:
+    count = 0
+    for img_path in faces_dir.glob("*/*/*.png"):
+        img = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
+        if img is not None:
+            count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PNG tree vs. gallery store load time")
+    parser.add_argument("--people", type=int, default=2000)
+    parser.add_argument("--crops", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VEERDRISHTI_DATA_DIR"] = tmp
+        from app import gallery
+
+        gallery = importlib.reload(gallery)
+        gallery.initialize(Path(tmp))
+        gallery.reset()
+        for i in range(args.people):
+            crops = list(rng.integers(0, 256, size=(args.crops, 100, 100), dtype=np.uint8))
+            gallery.append(f"p{i:06d}", crops)
+        export_dir = Path(tmp) / "export"
+        gallery.export_png_tree(export_dir)
+
+        # Drop module state so the store is re-read from disk
+        gallery = importlib.reload(gallery)
+        t0 = time.perf_counter()
+        gallery.initialize(Path(tmp))
+        loaded = np.array(gallery.crops())
+        store_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        png_count = _read_png_tree(export_dir)
+        png_s = time.perf_counter() - t0
+
+    print(f"samples: {len(loaded)} (png: {png_count})")
+    print(f"gallery store load: {store_s * 1000:.1f} ms")
+    print(f"png tree scan:      {png_s * 1000:.1f} ms ({png_s / store_s:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Per-frame matching cost vs. faces per frame (batched match_faces vs. per-face match_face).
+#
+#   python -m benchmarks.bench_matching --people 200 --faces 1,4,16
+
+import argparse
+import importlib
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batched face matching latency")
+    parser.add_argument("--people", type=int, default=200)
+    parser.add_argument("--crops", type=int, default=5)
+    parser.add_argument("--faces", default="1,4,16", help="comma separated faces per frame")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VEERDRISHTI_DATA_DIR"] = tmp
+        from app import face_db, gallery
+
+        gallery = importlib.reload(gallery)
+        face_db = importlib.reload(face_db)
+        face_db.initialize()
+        for i in range(args.people):
+            gallery.append(f"p{i:06d}", list(rng.integers(0, 256, size=(args.crops, 100, 100), dtype=np.uint8)))
+        face_db.train_from_disk()
+
+        print(f"{'faces':>6} {'batched_ms':>11} {'per_face_ms':>12}")
+        for n in [int(v) for v in args.faces.split(",") if v]:
+            crops = [rng.integers(0, 256, size=(int(rng.integers(60, 160)),) * 2, dtype=np.uint8) for _ in range(n)]
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                face_db.match_faces(crops)
+            batched = (time.perf_counter() - t0) / args.repeat
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                for crop in crops:
+                    face_db.match_face(crop)
+            single = (time.perf_counter() - t0) / args.repeat
+            print(f"{n:>6} {batched * 1000:>11.2f} {single * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
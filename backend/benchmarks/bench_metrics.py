@@ -0,0 +1,120 @@
+# Cost of the built-in instrumentation: per-observation cost, per-frame pipeline overhead and
+# per-request HTTP middleware overhead with metrics on vs. off (METRICS=0), plus scrape time.
+#
+#   python -m benchmarks.bench_metrics --frames 200 --requests 2000
+
+import argparse
+import importlib
+import os
+import tempfile
+import time
+from typing import List
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_tracking import _compose, _sample_face
+
+
+def _observe_ns(n: int) -> None:
+    from app import metrics
+
+    hist = metrics.Histogram("bench_seconds", "bench", ("camera",)).labels("c1")
+    print(f"{'operation':<28} {'ns/op':>8}")
+    for enabled in (True, False):
+        metrics.set_enabled(enabled)
+        t0 = time.perf_counter()
+        for i in range(n):
+            hist.observe(0.003)
+        print(f"{'histogram observe ' + ('on' if enabled else 'off'):<28} {(time.perf_counter() - t0) * 1e9 / n:>8.0f}")
+    metrics.set_enabled(True)
+
+
+def _frame_ms(frames: List[np.ndarray], repeats: int) -> None:
+    from app import codec, detectors, inference, metrics
+
+    results = {True: [], False: []}
+    for _ in range(repeats):
+        for enabled in (True, False):
+            metrics.set_enabled(enabled)
+            # Fresh pipeline (not started) so tracking state is identical for both modes
+            pipeline = inference._Pipeline("bench", "bench", 0)
+            t0 = time.process_time()
+            for frame in frames:
+                s = time.perf_counter()
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                tracks = pipeline.tracker.step(gray, detectors.detect_face_boxes)
+                pipeline._count("detect", time.perf_counter() - s)
+                s = time.perf_counter()
+                found = inference.recognize_tracks(pipeline.tracker, gray, tracks)
+                pipeline._count("recognize", time.perf_counter() - s)
+                s = time.perf_counter()
+                out = frame.copy()
+                inference.annotate_and_build_payload(out, found)
+                pipeline._annotate_seconds.observe(time.perf_counter() - s)
+                pipeline._faces_per_frame.observe(len(found))
+                s1 = time.perf_counter()
+                codec.encode(out, 80)
+                pipeline._jpeg_seconds.observe(time.perf_counter() - s1)
+                pipeline._count("encode", time.perf_counter() - s)
+            results[enabled].append((time.process_time() - t0) * 1000.0 / len(frames))
+            pipeline.stop()
+    metrics.set_enabled(True)
+    on, off = min(results[True]), min(results[False])
+    print(f"\n{'pipeline frame':<28} {'ms/frame':>8}")
+    print(f"{'metrics off':<28} {off:>8.2f}")
+    print(f"{'metrics on':<28} {on:>8.2f}   overhead {100.0 * (on - off) / off:+.2f}%")
+
+
+def _request_us(requests: int, repeats: int) -> None:
+    from fastapi.testclient import TestClient
+
+    from app import main, metrics
+
+    client = TestClient(main.app)
+    results = {True: [], False: []}
+    for _ in range(repeats):
+        for enabled in (True, False):
+            metrics.set_enabled(enabled)
+            t0 = time.perf_counter()
+            for _ in range(requests):
+                client.get("/api/soldiers")
+            results[enabled].append((time.perf_counter() - t0) * 1e6 / requests)
+    metrics.set_enabled(True)
+    on, off = min(results[True]), min(results[False])
+    print(f"\n{'GET /api/soldiers':<28} {'us/req':>8}")
+    print(f"{'metrics off':<28} {off:>8.0f}")
+    print(f"{'metrics on':<28} {on:>8.0f}   overhead {100.0 * (on - off) / off:+.2f}%")
+
+    t0 = time.perf_counter()
+    body = metrics.render()
+    print(f"\nscrape: {(time.perf_counter() - t0) * 1000.0:.2f} ms, {len(body.splitlines())} lines")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Instrumentation overhead with metrics on vs. off")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--observations", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VEERDRISHTI_DATA_DIR"] = tmp
+        from app import face_db, gallery
+
+        gallery = importlib.reload(gallery)
+        face_db = importlib.reload(face_db)
+        face = _sample_face()
+        face_db.enroll_faces("sample", [face_db._prepare_face(face)])
+        face_db.flush_pending_saves()
+
+        rng = np.random.default_rng(0)
+        frames = [_compose(face, rng) for _ in range(args.frames)]
+        _observe_ns(args.observations)
+        _frame_ms(frames, args.repeats)
+        _request_us(args.requests, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
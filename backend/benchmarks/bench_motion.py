@@ -0,0 +1,79 @@
+# Detector load with and without the motion gate on a mostly empty corridor clip.
+#
+#   python -m benchmarks.bench_motion --clip path/to/corridor.mp4 --frames 300
+
+import argparse
+import time
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+
+from app import detectors
+from app.motion import MotionGate, merge_boxes
+
+
+def _synthetic_frames(frames: int) -> Iterator[np.ndarray]:
+    # Static textured corridor; a person-sized block walks through during 20% of the clip
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 256, size=(720, 1280), dtype=np.uint8), (21, 21), 0)
+    walk_start, walk_len = int(frames * 0.4), max(1, int(frames * 0.2))
+    for i in range(frames):
+        frame = cv2.add(background, rng.integers(0, 3, size=background.shape, dtype=np.uint8))
+        if walk_start <= i < walk_start + walk_len:
+            x = int((i - walk_start) / walk_len * 1100)
+            cv2.rectangle(frame, (x, 200), (x + 120, 560), 220, -1)
+        yield frame
+
+
+def _clip_frames(path: str, frames: int) -> Iterator[np.ndarray]:
+    cap = cv2.VideoCapture(path)
+    for _ in range(frames):
+        ok, frame = cap.read()
+        if not ok:
+            break
+        yield cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    cap.release()
+
+
+def _run(frames: Iterator[np.ndarray], gate: Optional[MotionGate]) -> float:
+    cpu, count = 0.0, 0
+    for gray in frames:
+        t0 = time.process_time()
+        if gate is None:
+            detectors.detect_face_boxes(gray)
+        else:
+            h, w = gray.shape[:2]
+            regions = gate.regions(gray)
+            if regions:
+                rois = merge_boxes(regions, pad=32, bounds=(w, h), min_size=(128, 256))
+                detectors.detect_face_boxes_in_rois([(x, y, gray[y : y + rh, x : x + rw]) for (x, y, rw, rh) in rois])
+                gate.record_detection(gated=False, scanned_fraction=sum(rw * rh for (_, _, rw, rh) in rois) / (w * h))
+            else:
+                gate.record_detection(gated=True)
+        cpu += time.process_time() - t0
+        count += 1
+    return cpu / max(count, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Motion gate savings")
+    parser.add_argument("--clip", default=None)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--threshold", type=int, default=25)
+    parser.add_argument("--min-area", type=float, default=0.002)
+    args = parser.parse_args()
+
+    def frames() -> Iterator[np.ndarray]:
+        return _clip_frames(args.clip, args.frames) if args.clip else _synthetic_frames(args.frames)
+
+    ungated = _run(frames(), None)
+    gate = MotionGate(threshold=args.threshold, min_area=args.min_area)
+    gated = _run(frames(), gate)
+    print(f"no gate:   {ungated * 1000:.1f} ms CPU/frame")
+    print(f"with gate: {gated * 1000:.1f} ms CPU/frame ({ungated / max(gated, 1e-9):.1f}x less)")
+    print(f"gate: {gate.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
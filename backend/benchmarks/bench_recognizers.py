@@ -0,0 +1,97 @@
+# Match latency vs. gallery size: LBPH predict vs. the embedding index (exact matmul and coarse
+# cluster index) on synthetic data.
+#
+#   python -m benchmarks.bench_recognizers --sizes 100,1000,10000,100000 --dim 128
+
+import argparse
+import time
+
+import numpy as np
+
+from app.recognizers import EmbeddingIndex, LBPHistogramEmbedder, LBPHRecognizer
+
+
+def _synthetic_gallery(rng: np.random.Generator, identities: int, samples: int, dim: int):
+    # Identity centres plus per-sample noise, L2-normalized like real embeddings
+    centres = rng.standard_normal((identities, dim)).astype(np.float32)
+    vectors = np.repeat(centres, samples, axis=0) + 0.3 * rng.standard_normal((identities * samples, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    labels = np.repeat(np.arange(identities, dtype=np.int32), samples)
+    return centres, vectors, labels
+
+
+def _queries(rng: np.random.Generator, centres: np.ndarray, n: int):
+    truth = rng.integers(0, len(centres), size=n)
+    q = centres[truth] + 0.3 * rng.standard_normal((n, centres.shape[1])).astype(np.float32)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    return q, truth
+
+
+def _time_search(index: EmbeddingIndex, queries: np.ndarray, batch: int, repeat: int):
+    index.search(queries[:batch])
+    t0 = time.perf_counter()
+    runs = 0
+    for _ in range(repeat):
+        for start in range(0, len(queries), batch):
+            index.search(queries[start : start + batch])
+            runs += 1
+    elapsed = time.perf_counter() - t0
+    return elapsed / runs * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recognizer match latency vs gallery size")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="comma separated identity counts")
+    parser.add_argument("--samples", type=int, default=2, help="samples per identity")
+    parser.add_argument("--dim", type=int, default=128, help="embedding size (128 ~ DNN embedders)")
+    parser.add_argument("--batch", type=int, default=4, help="faces per frame matched together")
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--lbph-max", type=int, default=2000, help="largest gallery to time LBPH on")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embedder = LBPHistogramEmbedder()
+    faces = rng.integers(0, 256, size=(256, 100, 100), dtype=np.uint8)
+    embedder.embed(faces[:8])
+    t0 = time.perf_counter()
+    embedder.embed(faces)
+    print(f"lbp-hist embedding: {(time.perf_counter() - t0) / len(faces) * 1000:.3f} ms/face ({embedder.dim} dims)")
+    print()
+    print(f"{'identities':>10} {'rows':>8} {'lbph_ms':>9} {'exact_ms':>9} {'ivf_ms':>8} {'build_s':>8} "
+          f"{'exact_top1':>10} {'ivf_top1':>9}")
+
+    for identities in [int(v) for v in args.sizes.split(",") if v]:
+        centres, vectors, labels = _synthetic_gallery(rng, identities, args.samples, args.dim)
+        queries, truth = _queries(rng, centres, args.queries)
+
+        exact = EmbeddingIndex(args.dim, ivf_min_rows=0)
+        exact.reset(vectors, labels)
+        exact_ms = _time_search(exact, queries, args.batch, 3)
+        exact_top1 = float(np.mean(exact.search(queries)[0][:, 0] == truth))
+
+        ivf_ms = ivf_top1 = build_s = float("nan")
+        if len(labels) >= 1000:
+            ivf = EmbeddingIndex(args.dim, ivf_min_rows=1)
+            t0 = time.perf_counter()
+            ivf.reset(vectors, labels)
+            build_s = time.perf_counter() - t0
+            ivf_ms = _time_search(ivf, queries, args.batch, 3)
+            ivf_top1 = float(np.mean(ivf.search(queries)[0][:, 0] == truth))
+
+        lbph_ms = float("nan")
+        if identities <= args.lbph_max:
+            lbph = LBPHRecognizer()
+            crops = rng.integers(0, 256, size=(identities * args.samples, 100, 100), dtype=np.uint8)
+            lbph.train(crops, labels)
+            t0 = time.perf_counter()
+            lbph.predict(crops[: args.batch * 4])
+            lbph_ms = (time.perf_counter() - t0) / 4 * 1000.0
+
+        print(f"{identities:>10} {len(labels):>8} {lbph_ms:>9.2f} {exact_ms:>9.2f} {ivf_ms:>8.2f} {build_s:>8.2f} "
+              f"{exact_top1:>10.2f} {ivf_top1:>9.2f}")
+    print()
+    print(f"latencies are per batch of {args.batch} faces; LBPH uses random 100x100 crops")
+
+
+if __name__ == "__main__":
+    main()
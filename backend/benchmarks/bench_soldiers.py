@@ -0,0 +1,99 @@
+# Telemetry engine at scale: vectorized simulator tick vs. the former per-unit dict loop,
+# snapshot serialization and bulk ingest; then payload size and cost of viewport, radius,
+# status and delta queries against the full roster.
+#
+#   python -m benchmarks.bench_soldiers --units 1000,5000,50000 --ingest-fraction 0.1
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+
+def _legacy_tick(soldiers: List[Dict]) -> None:
+    # The per-unit loop soldier_data ran before it moved to NumPy columns
+    statuses = ["ok", "ok", "ok", "warn", "ok", "ok", "ok", "critical"]
+    for s in soldiers:
+        lat, lon = s["gps"]
+        lat += random.uniform(-0.0002, 0.0002)
+        lon += random.uniform(-0.0002, 0.0002)
+        s["gps"] = [round(lat, 6), round(lon, 6)]
+        s["heart_rate"] = max(55, min(160, int(random.gauss(s["heart_rate"], 1.5))))
+        if random.random() < 0.2:
+            s["status"] = random.choice(statuses)
+
+
+def _time_ms(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Soldier telemetry update, serialization and ingest cost")
+    parser.add_argument("--units", default="1000,5000,50000", help="comma separated unit counts")
+    parser.add_argument("--ingest-fraction", type=float, default=0.1, help="share of units in one ingest batch")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    from app import soldier_data
+
+    print(f"{'units':>7} {'tick_ms':>8} {'legacy_ms':>10} {'json_ms':>8} {'cached_ms':>10} {'MB':>6} "
+          f"{'ingest_ms':>10} {'ingest/s':>10}")
+    for units in [int(u) for u in args.units.split(",") if u]:
+        soldier_data._init_soldiers(units)
+        tick = _time_ms(lambda: soldier_data.step(3.0), args.repeats)
+
+        legacy = soldier_data.get_soldiers()
+        legacy_ms = _time_ms(lambda: _legacy_tick(legacy), args.repeats)
+
+        snap = soldier_data.snapshot()
+        t0 = time.perf_counter()
+        body = snap.json()
+        json_ms = (time.perf_counter() - t0) * 1000.0
+        cached_ms = _time_ms(snap.json, args.repeats)
+
+        rng = np.random.default_rng(0)
+        rows = rng.choice(units, size=max(1, int(units * args.ingest_fraction)), replace=False)
+        batch = [
+            {"id": snap.ids[i], "lat": float(snap.lat[i]) + 1e-4, "lon": float(snap.lon[i]), "heart_rate": 88}
+            for i in rows.tolist()
+        ]
+        ingest_ms = _time_ms(lambda: soldier_data.ingest(batch), args.repeats)
+        print(
+            f"{units:>7} {tick:>8.2f} {legacy_ms:>10.2f} {json_ms:>8.1f} {cached_ms:>10.3f} {len(body) / 1e6:>6.1f} "
+            f"{ingest_ms:>10.1f} {len(batch) / (ingest_ms / 1000.0):>10.0f}"
+        )
+    print(f"(json via {'orjson' if soldier_data.orjson is not None else 'the json module'}; "
+          "the former engine serialized on every request)")
+
+    # Queries: built per request, so their cost should follow the result, not the roster
+    print(f"\n{'units':>7} {'query':<26} {'ms':>8} {'KB':>9} {'rows':>7}")
+    for units in [int(u) for u in args.units.split(",") if u]:
+        soldier_data._init_soldiers(units)
+        soldier_data.step(3.0)
+        since = soldier_data.snapshot().version
+        # A quiet interval: a few real units report, the simulator does not tick
+        soldier_data.ingest([{"id": f"S{i + 1}", "heart_rate": 90} for i in range(0, units, 100)])
+        snap = soldier_data.snapshot()
+        queries = {
+            "full (cached)": lambda: snap.json(),
+            "bbox ~2x2 km": lambda: soldier_data.query(snap, bbox=(28.604, 77.221, 28.622, 77.238)),
+            "near 500 m": lambda: soldier_data.query(snap, near=(28.6129, 77.2295, 500.0)),
+            "status=critical": lambda: soldier_data.query(snap, statuses=["critical"]),
+            "since (1% reported)": lambda: soldier_data.query(snap, since=since),
+        }
+        for name, fn in queries.items():
+            body = fn()
+            ms = _time_ms(fn, args.repeats)
+            rows = body.count(b'"id":')
+            print(f"{units:>7} {name:<26} {ms:>8.2f} {len(body) / 1e3:>9.1f} {rows:>7}")
+
+
+if __name__ == "__main__":
+    main()
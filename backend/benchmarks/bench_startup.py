@@ -0,0 +1,167 @@
+# Cold boot: the server is started as a fresh process against galleries of several sizes and polled
+# for time to first answered request, to all subsystems ready, to first frame and to first
+# recognition; then the recognizer load alone, rebuilt from the gallery crops vs. parsed from the
+# LBPH YAML the model used to be stored as.
+#
+#   python -m benchmarks.bench_startup --people 0,100,1000 --crops 5
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_enrollment import _synthetic_crops
+from benchmarks.bench_tracking import _sample_face, _static_clip
+
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        with urllib.request.urlopen(url, timeout=2.0) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as exc:
+        return json.loads(exc.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _build_gallery(data_dir: Path, people: int, crops: int, face: np.ndarray) -> None:
+    os.environ["VEERDRISHTI_DATA_DIR"] = str(data_dir)
+    from app import face_db, gallery
+
+    gallery = importlib.reload(gallery)
+    face_db = importlib.reload(face_db)
+    face_db.initialize()
+    rng = np.random.default_rng(0)
+    # The face in the clip is enrolled too, so recognition has something to find
+    face_db.enroll_faces("sample", [face_db._prepare_face(face)])
+    for i in range(people):
+        gallery.append(f"p{i:06d}", _synthetic_crops(rng, crops))
+    face_db.train_from_disk()
+    face_db.flush_pending_saves()
+
+
+def _boot(data_dir: Path, clip: str, timeout: float) -> Dict[str, Optional[float]]:
+    port = _free_port()
+    # Motion gate off: the generated clip is static, so the face would only be seen on the first frame
+    env = dict(os.environ, VEERDRISHTI_DATA_DIR=str(data_dir), CAMERAS=f"bench={clip}", INFERENCE_WORKERS="0",
+               MOTION_GATE="0")
+    t0 = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=_BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    out: Dict[str, Optional[float]] = {"first_request": None, "ready": None, "first_frame": None,
+                                       "first_recognition": None, "model_s": None}
+    try:
+        deadline = t0 + timeout
+        while time.monotonic() < deadline:
+            health = _get(f"http://127.0.0.1:{port}/api/health")
+            if health is not None:
+                now = time.monotonic() - t0
+                if out["first_request"] is None:
+                    out["first_request"] = now
+                if health.get("ready") and out["ready"] is None:
+                    out["ready"] = now
+                milestones = health.get("milestones", {})
+                model = health.get("subsystems", {}).get("model", {})
+                if out["ready"] is not None and "first_recognition" in milestones:
+                    # Server-side timestamps are from process start, like the client's t0
+                    out["first_frame"] = milestones.get("first_frame")
+                    out["first_recognition"] = milestones["first_recognition"]
+                    out["model_s"] = model.get("duration_s")
+                    break
+            time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return out
+
+
+def _load_times(data_dir: Path) -> Dict[str, float]:
+    # Recognizer only: rebuild from the memory-mapped crops vs. parse the YAML OpenCV writes
+    os.environ["VEERDRISHTI_DATA_DIR"] = str(data_dir)
+    from app import gallery
+
+    gallery = importlib.reload(gallery)
+    gallery.initialize(data_dir)
+    crops, labels = np.array(gallery.crops()), gallery.sample_labels()
+    t0 = time.perf_counter()
+    model = cv2.face.LBPHFaceRecognizer_create()
+    model.train(list(crops), labels)
+    rebuild = time.perf_counter() - t0
+    yaml_path = data_dir / "lbph_model.yml"
+    t0 = time.perf_counter()
+    model.write(str(yaml_path))
+    write = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    cv2.face.LBPHFaceRecognizer_create().read(str(yaml_path))
+    read = time.perf_counter() - t0
+    return {
+        "rebuild_s": rebuild, "yaml_read_s": read, "yaml_write_s": write,
+        "crops_mb": crops.nbytes / 1e6, "yaml_mb": yaml_path.stat().st_size / 1e6,
+    }
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold boot time to first request and first recognition")
+    parser.add_argument("--people", default="0,100,1000", help="comma separated gallery sizes")
+    parser.add_argument("--crops", type=int, default=5, help="crops per person")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for one boot")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        face = _sample_face()
+        clip = os.path.join(tmp, "clip.avi")
+        _static_clip(clip, face, 100)
+
+        print(f"{'people':>7} {'samples':>8} {'request_s':>10} {'ready_s':>8} {'frame_s':>8} "
+              f"{'recognize_s':>12} {'model_s':>8}")
+        sizes = [int(p) for p in args.people.split(",") if p]
+        for people in sizes:
+            data_dir = Path(tmp) / f"data-{people}"
+            _build_gallery(data_dir, people, args.crops, face)
+            runs = [_boot(data_dir, clip, args.timeout) for _ in range(args.runs)]
+            # Median per column over the runs
+            row = {}
+            for key in runs[0]:
+                values = sorted(r[key] for r in runs if r[key] is not None)
+                row[key] = values[len(values) // 2] if values else None
+            print(f"{people:>7} {people * args.crops + 1:>8} {_fmt(row['first_request']):>10} "
+                  f"{_fmt(row['ready']):>8} {_fmt(row['first_frame']):>8} {_fmt(row['first_recognition']):>12} "
+                  f"{_fmt(row['model_s']):>8}")
+
+        print(f"\n{'people':>7} {'rebuild_s':>10} {'yaml_read_s':>12} {'yaml_write_s':>13} {'crops_MB':>9} {'yaml_MB':>8}")
+        for people in sizes:
+            t = _load_times(Path(tmp) / f"data-{people}")
+            print(f"{people:>7} {t['rebuild_s']:>10.2f} {t['yaml_read_s']:>12.2f} {t['yaml_write_s']:>13.2f} "
+                  f"{t['crops_mb']:>9.1f} {t['yaml_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
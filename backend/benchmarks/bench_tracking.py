@@ -0,0 +1,122 @@
+# Per-frame CPU with and without face tracking on a recorded (or generated static) clip.
+#
+#   python -m benchmarks.bench_tracking --clip path/to/recording.mp4 --frames 300
+
+import argparse
+import importlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _compose(face: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    frame = np.full((720, 1280, 3), 70, dtype=np.uint8)
+    frame[200:500, 480:780] = cv2.cvtColor(cv2.resize(face, (300, 300)), cv2.COLOR_GRAY2BGR)
+    # Sensor noise so frames are not bit-identical
+    return cv2.add(frame, rng.integers(0, 3, size=frame.shape, dtype=np.uint8))
+
+
+def _sample_face() -> np.ndarray:
+    # A bundled face crop the detector finds in a composed frame, otherwise a blurred noise patch
+    from app import detectors
+
+    rng = np.random.default_rng(1)
+    for path in sorted((_BACKEND_DIR / "data" / "faces").glob("*/*/*.png")):
+        img = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            continue
+        if detectors.detect_face_boxes(cv2.cvtColor(_compose(img, rng), cv2.COLOR_BGR2GRAY)):
+            return img
+    return cv2.GaussianBlur(rng.integers(0, 256, size=(100, 100), dtype=np.uint8), (5, 5), 0)
+
+
+def _static_clip(path: str, face: np.ndarray, frames: int) -> None:
+    rng = np.random.default_rng(1)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (1280, 720))
+    for _ in range(frames):
+        writer.write(_compose(face, rng))
+    writer.release()
+
+
+def _run(clip: str, frames: int, tracker_factory) -> float:
+    from app import detectors, face_db, inference
+
+    cap = cv2.VideoCapture(clip)
+    tracker = tracker_factory()
+    cpu = 0.0
+    processed = 0
+    while processed < frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        t0 = time.process_time()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if tracker is None:
+            boxes = detectors.detect_face_boxes(gray)
+            face_db.match_faces([gray[y : y + h, x : x + w] for (x, y, w, h) in boxes])
+        else:
+            tracks = tracker.step(gray, detectors.detect_face_boxes)
+            pending = [(tid, inference._clip_box(box, gray.shape)) for tid, box, needs in tracks if needs]
+            if pending:
+                crops = [gray[y : y + h, x : x + w] for _, (x, y, w, h) in pending]
+                for (tid, _), identity in zip(pending, face_db.match_faces(crops)):
+                    tracker.set_identity(tid, identity)
+        cpu += time.process_time() - t0
+        processed += 1
+    cap.release()
+    return cpu / max(processed, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tracking CPU savings on a clip")
+    parser.add_argument("--clip", default=None, help="recorded clip; a static synthetic clip is generated if omitted")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--detect-every", type=int, default=5)
+    parser.add_argument("--recognize-every", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VEERDRISHTI_DATA_DIR"] = tmp
+        from app import face_db, gallery
+        from app.tracker import FaceTracker
+
+        gallery = importlib.reload(gallery)
+        face_db = importlib.reload(face_db)
+        face = _sample_face()
+        face_db.enroll_faces("sample", [face_db._prepare_face(face)])
+
+        clip: Optional[str] = args.clip
+        if clip is None:
+            clip = os.path.join(tmp, "static.avi")
+            _static_clip(clip, face, args.frames)
+
+        baseline = _run(clip, args.frames, lambda: None)
+        trackers: List[FaceTracker] = []
+
+        def make() -> FaceTracker:
+            trackers.append(
+                FaceTracker(
+                    detect_every=args.detect_every,
+                    recognize_every=args.recognize_every,
+                    match_threshold=face_db.MATCH_THRESHOLD,
+                )
+            )
+            return trackers[-1]
+
+        tracked = _run(clip, args.frames, make)
+
+    print(f"every-frame detect+recognize: {baseline * 1000:.1f} ms CPU/frame")
+    print(f"tracked:                      {tracked * 1000:.1f} ms CPU/frame ({baseline / max(tracked, 1e-9):.1f}x less)")
+    print(f"tracker: {trackers[0].get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
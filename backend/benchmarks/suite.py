@@ -0,0 +1,336 @@
+# Reproducible benchmark suite: per-stage latency, end-to-end pipeline FPS, HTTP throughput under
+# concurrent load (server run in-process), registration/retrain time and memory against gallery
+# size. Everything runs offline on generated frames (built from a bundled face crop) and synthetic
+# galleries with fixed seeds. Results are written as JSON; --compare flags regressions against an
+# earlier run (exit code 1 if any).
+#
+#   python -m benchmarks.suite [--quick] [--out results.json] [--compare benchmarks/results/base.json]
+#   python -m benchmarks.suite --results new.json --compare base.json
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_enrollment import _synthetic_crops
+from benchmarks.bench_tracking import _compose, _sample_face, _static_clip
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+_RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# name -> {"value", "unit", "better": "lower" | "higher"}
+Results = Dict[str, Dict[str, Any]]
+
+
+def _put(results: Results, name: str, value: float, unit: str, better: str = "lower") -> None:
+    results[name] = {"value": round(float(value), 4), "unit": unit, "better": better}
+    print(f"  {name:<40} {value:>12.3f} {unit}")
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _rss_mb() -> float:
+    # Current resident set size; peak RSS where /proc is not available
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return _peak_rss_mb()
+
+
+def _median_ms(fn: Callable[[], Any], repeats: int) -> float:
+    fn()  # warm-up: thread-local detectors, allocator, caches
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000.0
+
+
+def _stages(results: Results, frames: List[np.ndarray], repeats: int) -> None:
+    from app import codec, detectors, face_db, inference
+    from app.tracker import FaceTracker
+
+    print("stages")
+    frame = frames[0]
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    boxes = detectors.detect_face_boxes(gray)
+    if not boxes:
+        raise SystemExit("no face found in the generated frame; check backend/data/faces")
+    crops = [gray[y : y + h, x : x + w] for (x, y, w, h) in boxes] * 4
+    found = [(x, y, w, h, "sample", 42.0, True, "citizen", 1) for (x, y, w, h) in boxes]
+
+    _put(results, "stage.detect_ms", _median_ms(lambda: detectors.detect_face_boxes(gray), repeats), "ms")
+    _put(results, "stage.detect_640_ms",
+         _median_ms(lambda: detectors.detect_face_boxes(gray, 640.0 / gray.shape[1]), repeats), "ms")
+    _put(results, "stage.prepare_ms_per_face",
+         _median_ms(lambda: face_db._prepare_faces(crops), repeats * 10) / len(crops), "ms")
+    _put(results, "stage.match_ms_per_face",
+         _median_ms(lambda: face_db.match_faces(crops), repeats * 10) / len(crops), "ms")
+    _put(results, "stage.annotate_ms",
+         _median_ms(lambda: inference.annotate_and_build_payload(frame.copy(), found), repeats * 10), "ms")
+    _put(results, "stage.jpeg_encode_ms", _median_ms(lambda: codec.encode(frame, 80), repeats * 10), "ms")
+    _put(results, "stage.jpeg_thumb_ms", _median_ms(lambda: codec.encode(frame, 60, 320), repeats * 10), "ms")
+
+    tracker = FaceTracker()
+    grays = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames]
+    t0 = time.perf_counter()
+    for g in grays:
+        tracker.step(g, detectors.detect_face_boxes)
+    _put(results, "stage.track_step_ms", (time.perf_counter() - t0) * 1000.0 / len(grays), "ms")
+
+
+def _pipeline(results: Results, frames: List[np.ndarray]) -> None:
+    # The pipeline's per-frame work run serially (no queues or pacing), so FPS is the CPU-bound rate
+    from app import codec, detectors, inference
+    from app.tracker import FaceTracker
+
+    print("pipeline")
+    tracker = FaceTracker()
+    t0 = time.perf_counter()
+    for frame in frames:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        tracks = tracker.step(gray, detectors.detect_face_boxes)
+        found = inference.recognize_tracks(tracker, gray, tracks)
+        out = frame.copy()
+        inference.annotate_and_build_payload(out, found)
+        codec.encode(out, 80)
+    elapsed = time.perf_counter() - t0
+    _put(results, "pipeline.fps", len(frames) / elapsed, "fps", "higher")
+    _put(results, "pipeline.ms_per_frame", elapsed * 1000.0 / len(frames), "ms")
+
+
+async def _load(url: str, total: int, concurrency: int) -> Dict[str, float]:
+    import httpx
+
+    latencies: List[float] = []
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+
+        async def worker() -> None:
+            for _ in remaining:
+                t0 = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000.0,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000.0,
+    }
+
+
+def _http(results: Results, clip: str, clip_frames: int, requests: int, concurrency: int) -> None:
+    # Client and server share one interpreter, so these are for comparing runs, not capacity planning
+    try:
+        import httpx  # noqa: F401  (used by _load)
+    except ImportError:
+        print("http: skipped, the load client needs httpx (pip install -r requirements.txt)")
+        return
+    import uvicorn
+
+    from app import inference, main
+
+    print(f"http ({concurrency} concurrent clients)")
+    os.environ["CAMERAS"] = f"bench={clip}"
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning",
+                                           access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 60.0
+        while not server.started or inference.get_latest_frame("bench") is None:
+            if time.monotonic() > deadline:
+                raise SystemExit("server did not publish a frame within 60 s")
+            time.sleep(0.1)
+        # Let the short clip play out so the camera threads are idle while the endpoints are measured
+        time.sleep(clip_frames / inference._TARGET_FPS + 1.0)
+        for path in ("/api/detections", "/api/frame.jpg", "/api/soldiers", "/api/health"):
+            stats = asyncio.run(_load(f"http://127.0.0.1:{port}{path}", requests, concurrency))
+            name = path.rsplit("/", 1)[-1]
+            _put(results, f"http.{name}.rps", stats["rps"], "req/s", "higher")
+            _put(results, f"http.{name}.p99_ms", stats["p99_ms"], "ms")
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10.0)
+
+
+def _registration(results: Results, sizes: List[int], crops_per_person: int, data_root: Path) -> None:
+    print("registration")
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        # Fresh modules per gallery so paths and globals point at their own directory
+        os.environ["VEERDRISHTI_DATA_DIR"] = str(data_root / f"gallery-{size}")
+        from app import face_db, gallery
+
+        gallery = importlib.reload(gallery)
+        face_db = importlib.reload(face_db)
+        face_db.initialize()
+        for i in range(size):
+            gallery.append(f"p{i:06d}", _synthetic_crops(rng, crops_per_person))
+        t0 = time.perf_counter()
+        face_db.train_from_disk()
+        _put(results, f"register.{size}.retrain_s", time.perf_counter() - t0, "s")
+        t0 = time.perf_counter()
+        face_db.enroll_faces("new_person", _synthetic_crops(rng, crops_per_person))
+        _put(results, f"register.{size}.enroll_ms", (time.perf_counter() - t0) * 1000.0, "ms")
+        t0 = time.perf_counter()
+        face_db.flush_pending_saves()
+        _put(results, f"register.{size}.model_save_ms", (time.perf_counter() - t0) * 1000.0, "ms")
+        # Cold load as on server start: gallery index plus model file or rebuild from the crops
+        face_db = importlib.reload(face_db)
+        t0 = time.perf_counter()
+        face_db.initialize()
+        _put(results, f"register.{size}.model_load_s", time.perf_counter() - t0, "s")
+        _put(results, f"register.{size}.rss_mb", _rss_mb(), "MB")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_BACKEND_DIR, capture_output=True,
+                                text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=_BACKEND_DIR,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return f"{commit}-dirty" if commit and dirty else commit or None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    # Prints both runs side by side; returns the names that got worse by more than tolerance
+    regressions: List[str] = []
+    print(f"\n{'metric':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, entry in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (entry["value"] - base["value"]) / base["value"]
+        worse = change > tolerance if entry["better"] == "lower" else change < -tolerance
+        if worse:
+            regressions.append(name)
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<40} {base['value']:>12.3f} {entry['value']:>12.3f} {change * 100:>+7.1f}%{flag}")
+    base_meta, meta = baseline.get("meta", {}), current.get("meta", {})
+    if base_meta.get("host") != meta.get("host"):
+        print("(runs are from different hosts; differences may not be due to code changes)")
+    if base_meta.get("config") != meta.get("config"):
+        print("(runs used different settings; only metrics present in both are compared)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vision pipeline and API benchmark suite with JSON results")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast check")
+    parser.add_argument("--out", default=None, help="result file (default benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="earlier result file to flag regressions against")
+    parser.add_argument("--results", default=None, help="compare this existing result file instead of running")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="relative change counted as a regression")
+    parser.add_argument("--only", default="stages,pipeline,http,registration", help="comma separated sections")
+    parser.add_argument("--frames", type=int, default=None)
+    parser.add_argument("--gallery-sizes", default=None, help="comma separated people counts")
+    parser.add_argument("--requests", type=int, default=None, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.results:
+        current = json.loads(Path(args.results).read_text())
+    else:
+        frames_n = args.frames or (30 if args.quick else 150)
+        sizes = [int(s) for s in (args.gallery_sizes or ("100" if args.quick else "100,1000")).split(",") if s]
+        requests = args.requests or (200 if args.quick else 2000)
+        repeats = 5 if args.quick else 15
+        sections = set(args.only.split(","))
+
+        results: Results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            # Detection in-thread so stage timings are not pool round trips; set before app is imported
+            os.environ["VEERDRISHTI_DATA_DIR"] = str(Path(tmp) / "main")
+            os.environ["INFERENCE_WORKERS"] = "0"
+            from app import face_db
+
+            face = _sample_face()
+            face_db.enroll_faces("sample", [face_db._prepare_face(face)])
+            rng = np.random.default_rng(7)
+            for i in range(200):
+                face_db.enroll_faces(f"p{i:04d}", _synthetic_crops(rng, 5))
+            face_db.flush_pending_saves()
+            rng = np.random.default_rng(0)
+            frames = [_compose(face, rng) for _ in range(frames_n)]
+
+            if "stages" in sections:
+                _stages(results, frames, repeats)
+            if "pipeline" in sections:
+                _pipeline(results, frames)
+            if "http" in sections:
+                clip = str(Path(tmp) / "clip.avi")
+                _static_clip(clip, face, 20)
+                _http(results, clip, 20, requests, args.concurrency)
+            if "registration" in sections:
+                _registration(results, sizes, 5, Path(tmp))
+            _put(results, "memory.peak_rss_mb", _peak_rss_mb(), "MB")
+
+        current = {
+            "meta": {
+                "commit": _git_commit(),
+                "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "host": platform.node(),
+                "platform": platform.platform(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "opencv": cv2.__version__,
+                "cpus": os.cpu_count(),
+                "config": {"quick": args.quick, "frames": frames_n, "gallery_sizes": sizes, "requests": requests,
+                           "concurrency": args.concurrency, "sections": sorted(sections)},
+            },
+            "results": results,
+        }
+        out = Path(args.out) if args.out else _RESULTS_DIR / (
+            f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{current['meta']['commit'] or 'nogit'}.json"
+        )
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"\nwrote {out}")
+
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), current, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance * 100:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nno regressions beyond {args.tolerance * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+from typing import List
+
+from app.alerts import AlertEngine
+
+
+_CRIMINAL = {"alert": True, "face_match": True, "label": "x", "category": "criminal", "bbox": [0, 0, 50, 50]}
+
+
+def _types(engine: AlertEngine) -> List[str]:
+    items, _ = engine.events_since(0)
+    return [e["type"] for e in items]
+
+
+def _engine() -> AlertEngine:
+    return AlertEngine(open_hits=3, open_window_s=2.0, close_after_s=10.0, update_interval_s=5.0)
+
+
+def test_opens_after_hits_within_window_then_cools_down_and_closes() -> None:
+    engine = _engine()
+    engine.ingest("cam", [_CRIMINAL], now=0.0)
+    engine.ingest("cam", [_CRIMINAL], now=1.0)
+    assert _types(engine) == []
+    engine.ingest("cam", [_CRIMINAL], now=1.5)
+    assert _types(engine) == ["open"]
+    # Inside the update cooldown: no event
+    engine.ingest("cam", [_CRIMINAL], now=3.0)
+    assert _types(engine) == ["open"]
+    engine.ingest("cam", [_CRIMINAL], now=6.5)
+    assert _types(engine) == ["open", "update"]
+    # Stays open through a gap shorter than close_after_s, closes after a longer one
+    engine.ingest("cam", [], now=15.0)
+    assert _types(engine) == ["open", "update"]
+    engine.ingest("cam", [], now=16.6)
+    assert _types(engine) == ["open", "update", "close"]
+    assert engine.active() == []
+
+
+def test_sparse_sightings_never_open() -> None:
+    engine = _engine()
+    for now in (0.0, 3.0, 6.0, 9.0):
+        engine.ingest("cam", [_CRIMINAL], now=now)
+    assert _types(engine) == []
+
+
+def test_unknown_face_on_new_track_continues_alert() -> None:
+    engine = _engine()
+    unknown = {"alert": True, "face_match": False, "label": "unknown", "bbox": [100, 100, 60, 60]}
+    for now in (0.0, 0.5, 1.0):
+        engine.ingest("cam", [{**unknown, "track_id": 1}], now=now)
+    # Same place, new track id (tracker lost and re-found the face)
+    engine.ingest("cam", [{**unknown, "track_id": 2, "bbox": [104, 102, 60, 60]}], now=1.5)
+    assert _types(engine) == ["open"]
+    assert [a["track_id"] for a in engine.active()] == [2]
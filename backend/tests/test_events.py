@@ -0,0 +1,74 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator, List
+
+os.environ.setdefault("VEERDRISHTI_DATA_DIR", tempfile.mkdtemp(prefix="veerdrishti-test-"))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import events, main  # noqa: E402
+
+
+client = TestClient(main.app)
+
+_DETECTION = [{"label": "alice", "category": "citizen", "confidence": 40.0, "bbox": [1, 2, 3, 4]}]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def event_log(tmp_path_factory: pytest.TempPathFactory) -> Iterator[None]:
+    # One database for the module (query connections are cached per thread); tests use their own camera
+    events.start(Path(tmp_path_factory.mktemp("events")) / "events.db")
+    yield
+    events.stop()
+
+
+def _record(camera: str, timestamps: List[float]) -> None:
+    for ts in timestamps:
+        assert events.record(camera, _DETECTION, ts=ts)
+    assert events.flush()
+
+
+def _pages(camera: str, limit: int) -> List[List[int]]:
+    pages, params = [], {"camera": camera, "limit": limit}
+    while True:
+        body = client.get("/api/events", params=params).json()
+        pages.append([e["id"] for e in body["events"]])
+        if body["next_before_id"] is None:
+            return pages
+        params.update(before_id=body["next_before_id"], before_ts=body["next_before_ts"])
+
+
+def test_paging_visits_out_of_order_rows_once_newest_first() -> None:
+    _record("page", [5.0, 3.0, 5.0, 1.0, 5.0, 4.0])
+    rows = events.query(camera="page", limit=100)
+    assert [r["ts"] for r in rows] == [5.0, 5.0, 5.0, 4.0, 3.0, 1.0]
+    pages = _pages("page", 2)
+    assert [i for page in pages for i in page] == [r["id"] for r in rows]
+
+
+def test_cursor_survives_deletion_of_its_row() -> None:
+    _record("retention", [10.0, 20.0, 30.0, 40.0])
+    first = client.get("/api/events", params={"camera": "retention", "limit": 2}).json()
+    cursor = first["events"][-1]
+    with events._reader() as conn:
+        conn.execute("DELETE FROM events WHERE id = ?", (cursor["id"],))
+
+    body = client.get("/api/events", params={
+        "camera": "retention", "before_id": first["next_before_id"], "before_ts": first["next_before_ts"],
+    }).json()
+    assert [e["ts"] for e in body["events"]] == [20.0, 10.0]
+
+    resp = client.get("/api/events", params={"camera": "retention", "before_id": cursor["id"]})
+    assert resp.status_code == 410
+
+
+def test_full_page_at_clamped_limit_has_a_cursor(monkeypatch: pytest.MonkeyPatch) -> None:
+    _record("clamp", [1.0, 2.0, 3.0, 4.0, 5.0])
+    monkeypatch.setattr(events, "QUERY_MAX_LIMIT", 2)
+    for limit in (0, 20000):
+        body = client.get("/api/events", params={"camera": "clamp", "limit": limit}).json()
+        expected = 1 if limit == 0 else 2
+        assert len(body["events"]) == expected
+        assert body["next_before_id"] == body["events"][-1]["id"]
@@ -0,0 +1,60 @@
+import importlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Iterator
+
+os.environ.setdefault("VEERDRISHTI_DATA_DIR", tempfile.mkdtemp(prefix="veerdrishti-test-"))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from app import face_db, gallery, recognizers  # noqa: E402
+
+
+def _reload() -> Any:
+    # Paths and the backend are read at import, as on a server restart
+    importlib.reload(recognizers)
+    importlib.reload(gallery)
+    return importlib.reload(face_db)
+
+
+@pytest.fixture
+def embedding_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Any]:
+    monkeypatch.setenv("VEERDRISHTI_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("RECOGNIZER_BACKEND", "embedding")
+    yield _reload()
+    monkeypatch.undo()
+    _reload()
+
+
+def _crops(seed: int, n: int = 3) -> list:
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=gallery.FACE_SHAPE, dtype=np.uint8) for _ in range(n)]
+
+
+def test_model_saved_before_newest_enrollment_is_rebuilt(embedding_db: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    embedding_db.enroll_faces("alice", _crops(1))
+    embedding_db.flush_pending_saves()
+    # Crash before the background saver writes the model for bob's enrollment
+    monkeypatch.setattr(embedding_db, "_schedule_save", lambda: None)
+    embedding_db.enroll_faces("bob", _crops(2))
+    assert embedding_db._MODEL_PATH.exists()
+
+    db = _reload()
+    db.initialize()
+    assert db._recognizer is not None and db._recognizer.samples == gallery.sample_count() == 6
+    assert db._label_to_id == {"alice": 0, "bob": 1}
+    assert db.match_faces(_crops(2, 1))[0][0] == "bob"
+
+
+def test_current_model_is_loaded_not_rebuilt(embedding_db: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    embedding_db.enroll_faces("alice", _crops(1))
+    embedding_db.enroll_faces("bob", _crops(2))
+    embedding_db.flush_pending_saves()
+
+    db = _reload()
+    monkeypatch.setattr(db, "_train_from_disk", lambda: pytest.fail("model was rebuilt"))
+    db.initialize()
+    assert db._recognizer.samples == 6
+
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+os.environ.setdefault("VEERDRISHTI_DATA_DIR", tempfile.mkdtemp(prefix="veerdrishti-test-"))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import inference, main  # noqa: E402
+from app.broadcast import Broadcaster  # noqa: E402
+
+
+client = TestClient(main.app)
+
+
+def test_unknown_camera_is_404_not_an_idle_camera() -> None:
+    for path in ("/api/frame.jpg", "/api/detections"):
+        resp = client.get(path, params={"camera": "no-such-camera"})
+        assert resp.status_code == 404, path
+        assert resp.json() == {"error": "unknown camera no-such-camera"}
+
+
+def test_no_frame_yet_is_204() -> None:
+    assert client.get("/api/frame.jpg").status_code == 204
+
+
+class _FakeCamera:
+    # What the frame endpoints read from a camera pipeline
+    def __init__(self) -> None:
+        self.broadcaster: Broadcaster = Broadcaster()
+        self.latest: Optional[inference.PublishedFrame] = None
+
+    def publish(self) -> inference.PublishedFrame:
+        seq = self.broadcaster.latest()[0] + 1
+        self.latest = inference.PublishedFrame(seq, "test", b"jpeg-%d" % seq, {"frame_size": [4, 4], "detections": []})
+        self.broadcaster.publish(self.latest)
+        return self.latest
+
+
+@pytest.fixture
+def camera(monkeypatch: pytest.MonkeyPatch) -> _FakeCamera:
+    fake = _FakeCamera()
+    monkeypatch.setitem(inference._pipelines, "fake", fake)
+    fake.publish()
+    return fake
+
+
+def test_etag_revalidation_answers_304_until_a_new_frame(camera: _FakeCamera) -> None:
+    first = client.get("/api/frame.jpg", params={"camera": "fake"})
+    assert first.status_code == 200 and first.content == b"jpeg-1"
+    etag = first.headers["etag"]
+    assert first.headers["x-frame-seq"] == "1"
+    assert client.get("/api/frame.jpg", params={"camera": "fake"}, headers={"If-None-Match": etag}).status_code == 304
+    camera.publish()
+    resp = client.get("/api/frame.jpg", params={"camera": "fake"}, headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.content == b"jpeg-2"
+
+
+def test_since_long_poll_times_out_with_304_and_wakes_on_publish(camera: _FakeCamera) -> None:
+    resp = client.get("/api/detections", params={"camera": "fake", "since": 1, "timeout": 0.2})
+    assert resp.status_code == 304
+
+    timer = threading.Timer(0.3, camera.publish)
+    timer.start()
+    t0 = time.monotonic()
+    resp = client.get("/api/frame.jpg", params={"camera": "fake", "since": 1, "timeout": 10})
+    timer.join()
+    assert resp.status_code == 200 and resp.headers["x-frame-seq"] == "2"
+    assert time.monotonic() - t0 < 5
+
+
+def test_since_ahead_of_latest_seq_is_stale_and_answered_at_once(camera: _FakeCamera) -> None:
+    # The camera restarted and numbers its frames from 1 again
+    t0 = time.monotonic()
+    resp = client.get("/api/frame.jpg", params={"camera": "fake", "since": 500, "timeout": 10})
+    assert resp.status_code == 200 and resp.headers["x-frame-seq"] == "1"
+    assert time.monotonic() - t0 < 5
@@ -0,0 +1,34 @@
+import os
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault("VEERDRISHTI_DATA_DIR", tempfile.mkdtemp(prefix="veerdrishti-test-"))
+
+import numpy as np  # noqa: E402
+
+from app import gallery  # noqa: E402
+
+
+def _crops(seed: int, n: int) -> list:
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=gallery.FACE_SHAPE, dtype=np.uint8) for _ in range(n)]
+
+
+def test_torn_crops_tail_is_ignored_and_truncated(tmp_path: Path) -> None:
+    gallery.initialize(tmp_path)
+    try:
+        gallery.append("alice", _crops(1, 2))
+        # Crash mid-append: crop bytes written, index not replaced
+        with open(gallery._crops_path(), "ab") as f:
+            f.write(b"\xff" * (gallery._FACE_BYTES + 123))
+        gallery._gallery_dir = None
+        gallery.initialize(tmp_path)
+        assert gallery.sample_count() == 2 and len(gallery.crops()) == 2
+
+        bob = _crops(2, 1)
+        gallery.append("bob", bob)
+        assert gallery._crops_path().stat().st_size == 3 * gallery._FACE_BYTES
+        assert list(gallery.sample_labels()) == [0, 0, 1]
+        assert np.array_equal(gallery.crops()[2], bob[0])
+    finally:
+        gallery._gallery_dir = None
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+os.environ.setdefault("VEERDRISHTI_DATA_DIR", tempfile.mkdtemp(prefix="veerdrishti-test-"))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from app import registration  # noqa: E402
+
+
+def _crashing_prepare(paths: Sequence[str]) -> List[Optional[np.ndarray]]:
+    # Runs in a pool worker: takes the whole process down on the poisoned file
+    if any("crash" in Path(p).name for p in paths):
+        os._exit(1)
+    return registration._prepare_files(paths)
+
+
+def _job(tmp_path: Path, names: Sequence[str]) -> "registration._Job":
+    uploads = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(b"not an image")
+        uploads.append((name, path))
+    return registration._Job("test", tmp_path, uploads, "citizen")
+
+
+def test_worker_crash_fails_only_its_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(registration, "_prepare_files", _crashing_prepare)
+    monkeypatch.setattr(registration, "_FILES_PER_TASK", 1)
+    monkeypatch.setattr(registration, "_WORKERS", 2)
+    names = ["a_1.jpg", "b_1.jpg", "crash_1.jpg", "c_1.jpg", "d_1.jpg"]
+    job = _job(tmp_path, names)
+    try:
+        registration._run(job)
+        # The pool was replaced and keeps serving later jobs
+        later = _job(tmp_path, ["e_1.jpg"])
+        registration._run(later)
+    finally:
+        registration.shutdown()
+    reasons = {e["file"]: e["reason"] for e in job.errors}
+    assert job.processed == len(names)
+    assert reasons.pop("crash_1.jpg") == "worker process crashed"
+    assert set(reasons.values()) == {"could not decode image"}
+    assert later.errors == [{"file": "e_1.jpg", "reason": "could not decode image"}]
+
+
+def test_oversized_archive_members_are_not_extracted(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(registration, "_MAX_IMAGE_BYTES", 1000)
+    archive = tmp_path / "faces.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("alice/1.jpg", b"\0" * 500)
+        z.writestr("bob/1.jpg", b"\0" * 10_000_000)
+    job = registration._Job("test", tmp_path, [("faces.zip", archive)], "citizen")
+    images = registration._expand(job)
+    assert [(person, name) for name, person, _, _ in images] == [("alice", "faces.zip:alice/1.jpg")]
+    assert job.errors == [{"file": "faces.zip:bob/1.jpg", "reason": "larger than 0.001 MB"}]
+
+
+def test_oversized_archive_is_rejected_whole(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(registration, "_MAX_ARCHIVE_BYTES", 5_000_000)
+    archive = tmp_path / "faces.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(3):
+            z.writestr(f"p{i}/1.jpg", b"\0" * 2_000_000)
+    job = registration._Job("test", tmp_path, [("faces.zip", archive)], "citizen")
+    assert registration._expand(job) == []
+    assert job.failed == 1 and job.errors[0]["file"] == "faces.zip"
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+os.environ.setdefault("VEERDRISHTI_DATA_DIR", tempfile.mkdtemp(prefix="veerdrishti-test-"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import main  # noqa: E402
+
+
+client = TestClient(main.app)
+
+
+def test_telemetry_rejects_malformed_gps() -> None:
+    for gps in (5, [1], [1, 2, 3], "28.6,77.2"):
+        resp = client.post("/api/soldiers/telemetry", json={"units": [{"id": "X1", "gps": gps, "heart_rate": 80}]})
+        assert resp.status_code == 400, gps
+        assert resp.json() == {"error": "'gps' must be [lat, lon]"}
+
+
+def test_telemetry_accepts_gps_pair() -> None:
+    resp = client.post("/api/soldiers/telemetry", json={"units": [{"id": "X2", "gps": [28.6, 77.2], "heart_rate": 80}]})
+    assert resp.status_code == 200
+
+
+def _ingest(*units: dict) -> int:
+    resp = client.post("/api/soldiers/telemetry", json={"units": list(units)})
+    assert resp.status_code == 200
+    return resp.json()["version"]
+
+
+def test_delta_returns_only_units_changed_since_version() -> None:
+    version = _ingest({"id": "D1", "lat": 10.0, "lon": 10.0, "heart_rate": 80},
+                      {"id": "D2", "lat": 10.0, "lon": 10.0, "heart_rate": 80})
+    _ingest({"id": "D2", "heart_rate": 90})
+    body = client.get("/api/soldiers", params={"since": version}).json()
+    assert body["delta"] is True
+    assert [s["id"] for s in body["soldiers"]] == ["D2"]
+    assert body["soldiers"][0]["heart_rate"] == 90
+
+    current = body["version"]
+    body = client.get("/api/soldiers", params={"since": current}).json()
+    assert body["delta"] is True and body["soldiers"] == []
+
+
+def test_filtered_delta_lists_units_that_left_the_area() -> None:
+    area = "20.0,20.0,20.1,20.1"
+    version = _ingest({"id": "A1", "lat": 20.05, "lon": 20.05, "heart_rate": 80},
+                      {"id": "A2", "lat": 20.06, "lon": 20.06, "heart_rate": 80})
+    _ingest({"id": "A2", "lat": 25.0, "lon": 25.0}, {"id": "A3", "lat": 20.02, "lon": 20.02, "heart_rate": 70})
+    body = client.get("/api/soldiers", params={"since": version, "bbox": area}).json()
+    assert body["delta"] is True
+    assert body["removed"] == ["A2"]
+    assert [s["id"] for s in body["soldiers"]] == ["A3"]
+
+
+def test_unknown_version_gets_full_filtered_result() -> None:
+    area = "30.0,30.0,30.1,30.1"
+    version = _ingest({"id": "F1", "lat": 30.05, "lon": 30.05, "heart_rate": 80})
+    # Ahead of the current version, as after a server restart
+    body = client.get("/api/soldiers", params={"since": version + 1000, "bbox": area}).json()
+    assert body["delta"] is False
+    assert "removed" not in body
+    assert [s["id"] for s in body["soldiers"]] == ["F1"]
@@ -0,0 +1,36 @@
+from typing import List
+
+import numpy as np
+
+from app.tracker import Box, FaceTracker
+
+
+def _step(tracker: FaceTracker, boxes: List[Box]) -> dict:
+    gray = np.zeros((240, 320), dtype=np.uint8)
+    return {tid: box for tid, box, _ in tracker.step(gray, lambda g: list(boxes))}
+
+
+def test_overlapping_detection_keeps_its_track_and_new_face_gets_new_id() -> None:
+    tracker = FaceTracker(detect_every=1, max_missed=2)
+    assert _step(tracker, [(10, 10, 50, 50)]) == {1: (10, 10, 50, 50)}
+    assert _step(tracker, [(200, 100, 50, 50), (14, 12, 50, 50)]) == {1: (14, 12, 50, 50), 2: (200, 100, 50, 50)}
+
+
+def test_track_dropped_after_max_missed_detections() -> None:
+    tracker = FaceTracker(detect_every=1, max_missed=2)
+    _step(tracker, [(10, 10, 50, 50)])
+    assert 1 in _step(tracker, [])
+    assert 1 in _step(tracker, [])
+    assert _step(tracker, []) == {}
+    # A face that comes back is a new track
+    assert list(_step(tracker, [(10, 10, 50, 50)])) == [2]
+
+
+def test_recognition_requested_once_until_identity_set() -> None:
+    tracker = FaceTracker(detect_every=5, recognize_every=30)
+    gray = np.zeros((240, 320), dtype=np.uint8)
+    first = tracker.step(gray, lambda g: [(10, 10, 50, 50)])
+    assert [needs for _, _, needs in first] == [True]
+    tracker.set_identity(1, ("alice", 40.0, True, "citizen"))
+    second = tracker.step(gray, lambda g: [(10, 10, 50, 50)])
+    assert [needs for _, _, needs in second] == [False]
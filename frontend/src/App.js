@@ -7,33 +7,24 @@ export default function App() {
   const canvasRef = useRef(null);
   const idInputRef = useRef(null);
 
-  const [frameUrl, setFrameUrl] = useState(`${API_BASE}/api/frame.jpg?ts=${Date.now()}`);
+  const frameUrl = `${API_BASE}/api/stream.mjpg`;
   const [detections, setDetections] = useState({ frame_size: [0, 0], detections: [] });
   const [soldiers, setSoldiers] = useState([]);
   const [alerts, setAlerts] = useState([]);
   const beepRef = useRef(null);
   const [soundEnabled, setSoundEnabled] = useState(false);
 
-  // Refresh image every 1s to avoid caching
+  // Live detections pushed by the backend (server-sent events)
   useEffect(() => {
-    const id = setInterval(() => {
-      setFrameUrl(`${API_BASE}/api/frame.jpg?ts=${Date.now()}`);
-    }, 1000);
-    return () => clearInterval(id);
-  }, []);
-
-  // Poll detections every 1s
-  useEffect(() => {
-    const id = setInterval(async () => {
+    const source = new EventSource(`${API_BASE}/api/detections/stream`);
+    source.onmessage = (e) => {
       try {
-        const res = await fetch(`${API_BASE}/api/detections`);
-        const json = await res.json();
-        setDetections(json);
-      } catch (e) {
+        setDetections(JSON.parse(e.data));
+      } catch (err) {
         // swallow
       }
-    }, 1000);
-    return () => clearInterval(id);
+    };
+    return () => source.close();
   }, []);
 
   // Draw detections on canvas overlay scaled to displayed image